@@ -0,0 +1,123 @@
+"""
+Cost of sorting search terms before any lookup, per term.
+
+    python -m benchmarks.classification               # 100k and 1M terms
+    python -m benchmarks.classification 50000 200000 --runs 3
+
+`per term` is what every lookup used to do on its own before reaching the
+network: skip repeated terms with `dict.fromkeys`, log (and format) debug
+messages, compile the `City, ST` pattern, build the query params and cache key.
+`one pass` is `classify_locations`, which does the same for the whole batch.
+Logging is disabled, as it is by default.  The terms are 60% ZIP codes, 30%
+cities (a third of them with an unknown state code) and 10% other invalid
+terms, with one term in four repeated.
+"""
+
+import argparse
+import gc
+import logging
+import re
+import time
+
+from src.cache import normalize_query
+from src.classify import classify_locations
+from src.config import COUNTRY_CODE, DIRECT_PATH, ZIP_PATH
+
+SIZES = (100_000, 1_000_000)
+RUNS = 5
+
+STATES = ("FL", "WI", "PR", "NY", "GU", "ZZ")
+INVALID = ("bad", "Toronto ON", "1234", "Miami, Florida")
+
+
+def _letters(n):
+    """Distinct alphabetic city names: a, b, ..., z, ba, bb, ..."""
+    name = ""
+    while True:
+        n, digit = divmod(n, 26)
+        name = chr(97 + digit) + name
+        if not n:
+            return name
+
+
+def make_terms(count):
+    terms = []
+    for n in range(count):
+        n = n - n % 4 if n % 4 == 3 else n
+        if n % 10 < 6:
+            terms.append(f"{n % 100_000:05d}")
+        elif n % 10 < 9:
+            terms.append(f"City {_letters(n)}, {STATES[n % len(STATES)]}")
+        else:
+            terms.append(INVALID[n % len(INVALID)])
+    return terms
+
+
+def per_term(terms):
+    logger = logging.getLogger("benchmarks.classification")
+    buckets = ([], [], [])
+    for term in dict.fromkeys(terms):
+        logger.log(logging.DEBUG, f"getting geoloc data for `{term}`...")
+        if term.isdigit() and len(term) == 5:
+            params = {"zip": f"{term},{COUNTRY_CODE}"}
+            buckets[0].append((term, normalize_query(ZIP_PATH, params)))
+            continue
+        match = re.compile(r"^([a-z\s-]+),? ([a-z]{2})$", flags=re.IGNORECASE).match(
+            term
+        )
+        if match is None:
+            buckets[2].append(term)
+            continue
+        params = {"q": f"{match.group(1)},{match.group(2)},{COUNTRY_CODE}"}
+        buckets[1].append((term, normalize_query(DIRECT_PATH, params)))
+    return buckets
+
+
+def one_pass(terms):
+    plan = classify_locations(terms)
+    return plan.zip_codes, plan.cities, plan.invalid
+
+
+STAGES = {"per term": per_term, "one pass": one_pass}
+
+
+def best_times(terms, runs=RUNS):
+    """Best time of every stage, alternating between them so drift hits all alike"""
+    best = dict.fromkeys(STAGES, float("inf"))
+    for _ in range(runs):
+        for name, stage in STAGES.items():
+            # Don't charge a stage for the garbage of the previous one
+            gc.collect()
+            start = time.perf_counter()
+            stage(terms)
+            best[name] = min(best[name], time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument(
+        "sizes", nargs="*", type=int, help="Numbers of terms (default: 100000 1000000)"
+    )
+    parser.add_argument(
+        "--runs",
+        type=int,
+        default=RUNS,
+        help=f"Runs per stage, the best counts (default: {RUNS})",
+    )
+    args = parser.parse_args()
+    if any(size < 1 for size in args.sizes) or args.runs < 1:
+        parser.error("sizes and --runs must be positive")
+
+    logging.disable(logging.CRITICAL)
+    print(f"{'terms':>10} {'stage':<10} {'seconds':>9} {'ns/term':>9} {'terms/s':>12}")
+    for size in args.sizes or SIZES:
+        for name, elapsed in best_times(make_terms(size), args.runs).items():
+            print(
+                f"{size:>10} {name:<10} {elapsed:>9.3f} {elapsed / size * 1e9:>9.0f} "
+                f"{size / elapsed:>12,.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
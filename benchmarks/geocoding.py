@@ -0,0 +1,283 @@
+"""
+Throughput and latency of GeoLocationData against the local mock server.
+
+    python -m benchmarks.geocoding                       # every scenario, 2000 lookups each
+    python -m benchmarks.geocoding --lookups 500 sequential cached
+    python -m benchmarks.geocoding --save baseline.json
+    python -m benchmarks.geocoding --baseline baseline.json   # exit 1 on a regression
+
+Each scenario starts a fresh server (see benchmarks.mock_server) and a fresh
+client process, runs every lookup as its own `get_geoloc_data` call from
+`workers` threads and reports lookups/s, p50/p95/p99 latency per lookup, logged
+errors, exceptions by type and the client's peak resident memory (Unix only).
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Optional
+
+from benchmarks.mock_server import Faults, MockGeocodingServer
+from src.GeoLocationData import GeoLocationData
+
+try:
+    import aiohttp  # type: ignore[import-not-found]
+except ImportError:
+    aiohttp = None  # type: ignore[assignment]
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None  # type: ignore[assignment]
+
+
+@dataclass
+class Scenario:
+    name: str
+    workers: int = 1
+    cache_size: int = 0
+    # Number of distinct search terms, None makes every lookup unique
+    distinct: Optional[int] = None
+    faults: Faults = field(default_factory=lambda: Faults(latency=0.005))
+    timeout: tuple[float, float] = (1.0, 1.0)
+    rate_limit_retries: int = 1
+    use_async: bool = False
+
+
+SCENARIOS = [
+    Scenario("sequential"),
+    Scenario("concurrent", workers=16),
+    Scenario("cached", workers=16, cache_size=1024, distinct=100),
+    Scenario(
+        "faults",
+        workers=16,
+        faults=Faults(
+            latency=0.005,
+            not_found_rate=0.03,
+            server_error_rate=0.02,
+            rate_limit_rate=0.01,
+            timeout_rate=0.005,
+            retry_after=0.05,
+            hang=1.0,
+        ),
+        timeout=(1.0, 0.25),
+    ),
+    Scenario("async", workers=64, use_async=True),
+]
+
+
+@dataclass
+class Report:
+    scenario: str
+    lookups: int
+    seconds: float
+    lookups_per_second: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    logged_errors: int
+    failures: dict
+    peak_mb: float
+
+
+def _city(number: int) -> str:
+    letters = ""
+    while True:
+        number, digit = divmod(number, 26)
+        letters += chr(97 + digit)
+        if not number:
+            return f"City {letters}, NY"
+
+
+def make_terms(count: int, distinct: Optional[int]) -> list[str]:
+    """Alternates zip codes and `City, ST` terms"""
+    pool = distinct or count
+    return [
+        f"{10000 + n % pool:05d}" if n % 2 else _city(n % pool) for n in range(count)
+    ]
+
+
+def _client_options(scenario: Scenario, base_url: str) -> dict:
+    return {
+        "cache_size": scenario.cache_size,
+        "base_url": base_url,
+        "timeout": scenario.timeout,
+        "rate_limit": None,
+        "rate_limit_retries": scenario.rate_limit_retries,
+    }
+
+
+def _run_threads(scenario, base_url, terms, failures, lock) -> tuple[list[float], int]:
+    with GeoLocationData(
+        max_workers=scenario.workers, **_client_options(scenario, base_url)
+    ) as geo:
+
+        def lookup(term: str) -> float:
+            start = time.perf_counter()
+            try:
+                geo.get_geoloc_data([term])
+            except Exception as e:
+                with lock:
+                    failures[type(e).__name__] += 1
+            return time.perf_counter() - start
+
+        if scenario.workers == 1:
+            latencies = [lookup(term) for term in terms]
+        else:
+            with ThreadPoolExecutor(max_workers=scenario.workers) as executor:
+                latencies = list(executor.map(lookup, terms))
+        return latencies, len(geo.drain_errors())
+
+
+def _run_async(scenario, base_url, terms, failures) -> tuple[list[float], int]:
+    from src.AsyncGeoLocationData import AsyncGeoLocationData
+
+    async def run() -> tuple[list[float], int]:
+        async with AsyncGeoLocationData(
+            max_concurrency=scenario.workers, **_client_options(scenario, base_url)
+        ) as geo:
+
+            async def lookup(term: str) -> float:
+                start = time.perf_counter()
+                try:
+                    await geo.get_geoloc_data([term])
+                except Exception as e:
+                    failures[type(e).__name__] += 1
+                return time.perf_counter() - start
+
+            latencies = await asyncio.gather(*(lookup(term) for term in terms))
+            return list(latencies), len(geo.drain_errors())
+
+    return asyncio.run(run())
+
+
+def _peak_rss() -> int:
+    """Peak resident memory of this process in bytes, 0 where it isn't available"""
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _run_client(scenario: Scenario, base_url: str, lookups: int) -> Report:
+    # Failures are counted in the report, keep them off the terminal
+    logging.disable(logging.CRITICAL)
+    terms = make_terms(lookups, scenario.distinct)
+    failures: Counter = Counter()
+    start = time.perf_counter()
+    if scenario.use_async:
+        latencies, logged_errors = _run_async(scenario, base_url, terms, failures)
+    else:
+        latencies, logged_errors = _run_threads(
+            scenario, base_url, terms, failures, threading.Lock()
+        )
+    elapsed = time.perf_counter() - start
+
+    percentiles = statistics.quantiles(latencies, n=100, method="inclusive")
+    return Report(
+        scenario=scenario.name,
+        lookups=lookups,
+        seconds=round(elapsed, 3),
+        lookups_per_second=round(lookups / elapsed, 1),
+        p50_ms=round(percentiles[49] * 1000, 2),
+        p95_ms=round(percentiles[94] * 1000, 2),
+        p99_ms=round(percentiles[98] * 1000, 2),
+        logged_errors=logged_errors,
+        failures=dict(failures),
+        peak_mb=round(_peak_rss() / 1e6, 2),
+    )
+
+
+def run_scenario(scenario: Scenario, lookups: int) -> Report:
+    """Runs the client in a fresh process so its peak memory is the scenario's own"""
+    with MockGeocodingServer(scenario.faults) as server:
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            return executor.submit(
+                _run_client, scenario, server.base_url, lookups
+            ).result()
+
+
+def print_reports(reports: list[Report]) -> None:
+    print(
+        f"{'scenario':<12} {'lookups':>8} {'lookups/s':>10} {'p50 ms':>8} "
+        f"{'p95 ms':>8} {'p99 ms':>8} {'errors':>7} {'peak MB':>8}  failures"
+    )
+    for r in reports:
+        print(
+            f"{r.scenario:<12} {r.lookups:>8} {r.lookups_per_second:>10.1f} "
+            f"{r.p50_ms:>8.2f} {r.p95_ms:>8.2f} {r.p99_ms:>8.2f} "
+            f"{r.logged_errors:>7} {r.peak_mb:>8.2f}  {r.failures or ''}"
+        )
+
+
+def find_regressions(
+    reports: list[Report], baseline: dict, tolerance: float
+) -> list[str]:
+    """Scenarios whose throughput dropped or p95 grew by more than tolerance"""
+    regressions = []
+    for report in reports:
+        before = baseline.get(report.scenario)
+        if before is None:
+            continue
+        if report.lookups_per_second < before["lookups_per_second"] * (1 - tolerance):
+            regressions.append(
+                f"{report.scenario}: {report.lookups_per_second} lookups/s, "
+                f"baseline {before['lookups_per_second']}"
+            )
+        if report.p95_ms > before["p95_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{report.scenario}: p95 {report.p95_ms} ms, baseline {before['p95_ms']} ms"
+            )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("scenarios", nargs="*", help="Scenarios to run (default: all)")
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--save", metavar="FILE", help="Write the reports as json")
+    parser.add_argument(
+        "--baseline", metavar="FILE", help="Fail on a regression against saved reports"
+    )
+    parser.add_argument(
+        "--tolerance", type=float, default=0.2, help="Allowed slowdown (default: 0.2)"
+    )
+    args = parser.parse_args()
+
+    known = {scenario.name: scenario for scenario in SCENARIOS}
+    if unknown := set(args.scenarios) - set(known):
+        parser.error(f"unknown scenarios {sorted(unknown)}, choose from {list(known)}")
+    selected = [known[name] for name in args.scenarios] or SCENARIOS
+
+    reports = []
+    for scenario in selected:
+        if scenario.use_async and aiohttp is None:
+            print(
+                f"Skipping `{scenario.name}`: aiohttp is not installed", file=sys.stderr
+            )
+            continue
+        reports.append(run_scenario(scenario, args.lookups))
+    print_reports(reports)
+
+    if args.save:
+        with open(args.save, "w") as fp:
+            json.dump({r.scenario: asdict(r) for r in reports}, fp, indent=4)
+    if args.baseline:
+        with open(args.baseline) as fp:
+            regressions = find_regressions(reports, json.load(fp), args.tolerance)
+        for regression in regressions:
+            print(f"[REGRESSION] {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""
+Local stand-in for the OpenWeatherMap geocoding API.
+
+Serves `zip`, `direct` and `reverse` under `/geo/1.0/` with answers derived from
+the query, so the same term always gets the same place.  Latency and failures
+(404, 429, 5xx and requests that hang past the client's read timeout) are
+injected at configurable rates from a seeded generator, which keeps runs
+repeatable.  Run it on its own with
+
+    python -m benchmarks.mock_server --port 8099 --latency 20
+
+and point a client at it with `GeoLocationData(base_url="http://127.0.0.1:8099/geo/1.0/")`.
+"""
+
+import argparse
+import json
+import multiprocessing
+import random
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlsplit
+
+API_ROOT = "/geo/1.0/"
+
+
+@dataclass
+class Faults:
+    """Server behaviour, rates are fractions of requests between 0 and 1"""
+
+    latency: float = 0.0
+    jitter: float = 0.0
+    not_found_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    server_error_rate: float = 0.0
+    timeout_rate: float = 0.0
+    hang: float = 30.0
+    retry_after: Optional[float] = None
+    seed: int = 0
+
+
+def _place(query: str) -> dict:
+    """Stable coordinates within the continental US for any query string"""
+    checksum = zlib.crc32(query.encode("utf-8"))
+    return {
+        "name": f"Place {checksum % 100_000}",
+        "lat": round(25 + (checksum % 2_400) / 100, 4),
+        "lon": round(-124 + (checksum // 2_400 % 5_700) / 100, 4),
+        "country": "US",
+    }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "_Server"
+    protocol_version = "HTTP/1.1"
+    # One write per response, a separate write for the body would wait on delayed ACKs
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+    def _send(self, status: int, body, headers: Optional[dict] = None) -> None:
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        endpoint = url.path.removeprefix(API_ROOT)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        faults = self.server.faults
+        self.server.count("requests")
+
+        if endpoint not in ("zip", "direct", "reverse"):
+            self.server.count(404)
+            return self._send(404, {"cod": "404", "message": "Internal error"})
+
+        delay = faults.latency + faults.jitter * self.server.random()
+        if delay:
+            time.sleep(delay)
+
+        roll = self.server.random()
+        for rate, status in (
+            (faults.timeout_rate, None),
+            (faults.rate_limit_rate, 429),
+            (faults.server_error_rate, 500),
+            (faults.not_found_rate, 404),
+        ):
+            if roll < rate:
+                break
+            roll -= rate
+        else:
+            status = 200
+
+        self.server.count(status or "timeouts")
+        match status:
+            case None:
+                time.sleep(faults.hang)
+                self.close_connection = True
+            case 429:
+                headers = {}
+                if faults.retry_after is not None:
+                    headers["Retry-After"] = str(faults.retry_after)
+                self._send(429, {"cod": 429, "message": "Too many requests"}, headers)
+            case 500:
+                self._send(500, {"cod": 500, "message": "Internal server error"})
+            case 404:
+                self._send(404, {"cod": "404", "message": "not found"})
+            case _:
+                query = (
+                    params.get("zip")
+                    or params.get("q")
+                    or (f"{params.get('lat')},{params.get('lon')}")
+                )
+                place = _place(query)
+                self._send(200, place if endpoint == "zip" else [place])
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+    def __init__(self, address: tuple[str, int], faults: Faults) -> None:
+        super().__init__(address, _Handler)
+        self.faults = faults
+        self.stats: dict = {}
+        self._random = random.Random(faults.seed)
+        self._lock = threading.Lock()
+
+    def random(self) -> float:
+        with self._lock:
+            return self._random.random()
+
+    def count(self, key) -> None:
+        with self._lock:
+            self.stats[key] = self.stats.get(key, 0) + 1
+
+
+def _serve(faults: Faults, host: str, port: int, ready) -> None:
+    server = _Server((host, port), faults)
+    ready.put(server.server_address[1])
+    server.serve_forever()
+
+
+class MockGeocodingServer:
+    """
+    Runs the stand-in server in a child process so it does not compete with the
+    client for the GIL.  Use it as a context manager:
+
+        with MockGeocodingServer(Faults(latency=0.02)) as server:
+            GeoLocationData(base_url=server.base_url)
+    """
+
+    def __init__(
+        self, faults: Optional[Faults] = None, host: str = "127.0.0.1", port: int = 0
+    ) -> None:
+        self.faults = faults or Faults()
+        self.host = host
+        self.port = port
+        self._process: Optional[multiprocessing.Process] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}{API_ROOT}"
+
+    def start(self) -> "MockGeocodingServer":
+        ready: "multiprocessing.Queue[int]" = multiprocessing.Queue()
+        self._process = multiprocessing.Process(
+            target=_serve, args=(self.faults, self.host, self.port, ready), daemon=True
+        )
+        self._process.start()
+        self.port = ready.get(timeout=10)
+        return self
+
+    def stop(self) -> None:
+        if self._process is not None:
+            self._process.terminate()
+            self._process.join()
+            self._process = None
+
+    def __enter__(self) -> "MockGeocodingServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local stand-in geocoding API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument(
+        "--latency", type=float, default=0, help="Milliseconds added to every response"
+    )
+    parser.add_argument(
+        "--jitter",
+        type=float,
+        default=0,
+        help="Up to this many random extra milliseconds",
+    )
+    parser.add_argument(
+        "--not-found", type=float, default=0, help="Fraction of 404 answers"
+    )
+    parser.add_argument(
+        "--rate-limit", type=float, default=0, help="Fraction of 429 answers"
+    )
+    parser.add_argument(
+        "--server-error", type=float, default=0, help="Fraction of 500 answers"
+    )
+    parser.add_argument(
+        "--timeout", type=float, default=0, help="Fraction of requests that hang"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    faults = Faults(
+        latency=args.latency / 1000,
+        jitter=args.jitter / 1000,
+        not_found_rate=args.not_found,
+        rate_limit_rate=args.rate_limit,
+        server_error_rate=args.server_error,
+        timeout_rate=args.timeout,
+        seed=args.seed,
+    )
+    server = _Server((args.host, args.port), faults)
+    print(f"Serving on http://{args.host}:{server.server_address[1]}{API_ROOT}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"Served: {server.stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Compares the CLI's original output path (`json.dumps` with GeoResultEncoder) with
+the streaming writers of src.serializers.
+
+    python -m benchmarks.serialization               # 10k, 100k and 1M results
+    python -m benchmarks.serialization 50000 200000
+
+Every writer sends its output to os.devnull.  Time is measured on a plain run and
+peak memory on a second run under tracemalloc, which would skew the timings.
+"""
+
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+from geolocutil import GeoResultEncoder
+from src.GeoLocationData import GeoResult
+from src.serializers import write_results
+
+SIZES = (10_000, 100_000, 1_000_000)
+TEXT_FORMATS = ("json", "compact", "ndjson", "csv")
+
+
+def make_results(count):
+    return [
+        GeoResult(
+            name=f"Place {n % 30_000}",
+            lat=18.0 + n % 5_000 * 0.0123,
+            lon=-66.0 - n % 7_000 * 0.0171,
+            search_term=f"{n % 100_000:05d}",
+        )
+        for n in range(count)
+    ]
+
+
+def encoder_baseline(results, fp):
+    fp.write(json.dumps(results, cls=GeoResultEncoder, indent=4, ensure_ascii=False))
+
+
+def writer(output_format):
+    def write(results, fp):
+        write_results(output_format, results, fp, ensure_ascii=False)
+
+    return write
+
+
+def measure(write, results, binary=False):
+    mode, encoding = ("wb", None) if binary else ("w", "utf-8")
+    with open(os.devnull, mode, encoding=encoding) as fp:
+        start = time.perf_counter()
+        write(results, fp)
+        elapsed = time.perf_counter() - start
+
+        tracemalloc.start()
+        write(results, fp)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return elapsed, peak
+
+
+def main(sizes):
+    candidates = [("GeoResultEncoder", encoder_baseline, False)]
+    candidates += [(name, writer(name), False) for name in TEXT_FORMATS]
+    candidates.append(("binary", writer("binary"), True))
+
+    print(
+        f"{'results':>10} {'writer':<18} {'seconds':>9} {'rows/s':>12} {'peak MB':>9}"
+    )
+    for size in sizes:
+        results = make_results(size)
+        for name, write, binary in candidates:
+            elapsed, peak = measure(write, results, binary)
+            print(
+                f"{size:>10} {name:<18} {elapsed:>9.3f} {size / elapsed:>12,.0f} "
+                f"{peak / 1e6:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main([int(size) for size in sys.argv[1:]] or SIZES)
@@ -0,0 +1,187 @@
+"""
+Startup cost of the CLI, measured with `python -X importtime`.
+
+    python -m benchmarks.startup                         # every command, 10 runs each
+    python -m benchmarks.startup --runs 20 help
+    python -m benchmarks.startup --save startup.json
+    python -m benchmarks.startup --baseline startup.json   # exit 1 on a regression
+
+Each command runs in a fresh interpreter.  Import time only counts the modules
+the command loads on top of a bare `python -c pass`, so site-packages hooks of
+the environment don't blur the numbers.  The best of all runs is reported along
+with the slowest imports.  Commands that must stay light (`-h`, argument
+errors) also fail when they load one of HEAVY_MODULES.
+"""
+
+import argparse
+import json
+import math
+import os
+import subprocess
+import sys
+import time
+from dataclasses import asdict, dataclass
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT = os.path.join(ROOT, "geolocutil.py")
+
+# Packages only a lookup may load
+HEAVY_MODULES = ("requests", "urllib3", "dotenv", "asyncio", "sqlite3", "numpy")
+
+
+@dataclass
+class Command:
+    name: str
+    argv: list[str]
+    # Whether loading HEAVY_MODULES is a failure
+    light: bool = False
+
+
+COMMANDS = [
+    Command("help", [SCRIPT, "-h"], light=True),
+    Command("bad-args", [SCRIPT, "--input", "-", "90210"], light=True),
+    Command("import-client", ["-c", "import src.GeoLocationData"]),
+    Command("import-async", ["-c", "import src.AsyncGeoLocationData"]),
+]
+
+
+@dataclass
+class Report:
+    command: str
+    wall_ms: float
+    import_ms: float
+    modules: int
+    slowest: dict
+    heavy: list
+
+
+def parse_importtime(stderr: str) -> dict[str, tuple[int, int]]:
+    """`{module: (self us, cumulative us)}` from the output of -X importtime"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line.removeprefix("import time:").split("|")
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def _run(argv: list[str]) -> tuple[float, dict[str, tuple[int, int]]]:
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", *argv],
+        cwd=ROOT,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    return time.perf_counter() - start, parse_importtime(completed.stderr)
+
+
+def imported_modules(argv: list[str]) -> set[str]:
+    """Modules loaded by argv that a bare interpreter does not load"""
+    _, interpreter = _run(["-c", "pass"])
+    _, modules = _run(argv)
+    return set(modules) - set(interpreter)
+
+
+def measure(command: Command, runs: int) -> Report:
+    if runs < 1:
+        raise ValueError("runs must be at least 1")
+    _, interpreter = _run(["-c", "pass"])
+    best: tuple[float, dict] = (math.inf, {})
+    for _ in range(runs):
+        wall, modules = _run(command.argv)
+        added = {
+            name: times for name, times in modules.items() if name not in interpreter
+        }
+        if wall < best[0]:
+            best = (wall, added)
+
+    wall, added = best
+    slowest = sorted(added.items(), key=lambda item: item[1][0], reverse=True)[:5]
+    return Report(
+        command=command.name,
+        wall_ms=round(wall * 1000, 2),
+        import_ms=round(sum(self_us for self_us, _ in added.values()) / 1000, 2),
+        modules=len(added),
+        slowest={name: round(self_us / 1000, 2) for name, (self_us, _) in slowest},
+        heavy=(
+            sorted({name.split(".")[0] for name in added} & set(HEAVY_MODULES))
+            if command.light
+            else []
+        ),
+    )
+
+
+def print_reports(reports: list[Report]) -> None:
+    print(
+        f"{'command':<14} {'wall ms':>8} {'import ms':>10} {'modules':>8}  slowest imports (self ms)"
+    )
+    for r in reports:
+        slowest = ", ".join(f"{name} {ms}" for name, ms in r.slowest.items())
+        print(
+            f"{r.command:<14} {r.wall_ms:>8.2f} {r.import_ms:>10.2f} {r.modules:>8}  {slowest}"
+        )
+
+
+def find_regressions(
+    reports: list[Report], baseline: dict, tolerance: float
+) -> list[str]:
+    """Light commands that load a heavy module, and commands slower than tolerance allows"""
+    regressions = [
+        f"{report.command}: imports {', '.join(report.heavy)}"
+        for report in reports
+        if report.heavy
+    ]
+    for report in reports:
+        before = baseline.get(report.command)
+        if before is None:
+            continue
+        if report.import_ms > before["import_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{report.command}: {report.import_ms} ms of imports, baseline {before['import_ms']} ms"
+            )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("commands", nargs="*", help="Commands to run (default: all)")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--save", metavar="FILE", help="Write the reports as json")
+    parser.add_argument(
+        "--baseline", metavar="FILE", help="Fail on a regression against saved reports"
+    )
+    parser.add_argument(
+        "--tolerance", type=float, default=0.5, help="Allowed slowdown (default: 0.5)"
+    )
+    args = parser.parse_args()
+    if args.runs < 1:
+        parser.error("--runs must be positive")
+
+    known = {command.name: command for command in COMMANDS}
+    if unknown := set(args.commands) - set(known):
+        parser.error(f"unknown commands {sorted(unknown)}, choose from {list(known)}")
+    selected = [known[name] for name in args.commands] or COMMANDS
+
+    reports = [measure(command, args.runs) for command in selected]
+    print_reports(reports)
+
+    if args.save:
+        with open(args.save, "w") as fp:
+            json.dump({r.command: asdict(r) for r in reports}, fp, indent=4)
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as fp:
+            baseline = json.load(fp)
+    regressions = find_regressions(reports, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"[REGRESSION] {regression}", file=sys.stderr)
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,14 +2,25 @@ import argparse
 import json
 import sys
 from argparse import RawTextHelpFormatter
-from src.GeoLocationData import GeoLocationData, GeoResult
+from itertools import islice
+from typing import Optional
+from src.serializers import FORMATS, write_results
+
+# The client, its caches and the .env file are only loaded once the arguments have
+# been parsed (see `main`), so `-h` and argument errors return right away
 
 
 WIDTH = 89
 SEPARATOR = '-'
+# Number of --input lines looked up ahead of the one being printed
+PREFETCH = 32
+# Number of --input lines looked up per batch with --checkpoint
+CHECKPOINT_BATCH = 256
 
 class GeoResultEncoder(json.JSONEncoder):
     def default(self, obj):
+        from src.GeoLocationData import GeoResult
+
         if isinstance(obj, GeoResult):
             return {
                 "search_term": obj.search_term,
@@ -44,6 +55,107 @@ def table_print(locations):
         to_print(search_term, name, lat, lon)
     line_separator()
 
+
+def read_locations(source):
+    """Yields one search term per non blank line without reading the whole input"""
+    for line in source:
+        location = line.strip()
+        if location:
+            yield location
+
+
+def resolved_results(geolocation, source, show_errors):
+    """Yields a GeoResult per line of source as soon as it is resolved, errors go to stderr"""
+    from src.GeoLocationData import GeoError
+
+    records = geolocation.iter_geoloc_data(read_locations(source), prefetch=PREFETCH, include_errors=True)
+    for record in records:
+        if isinstance(record, GeoError):
+            geolocation.drain_errors()
+            if show_errors:
+                print(record.message, file=sys.stderr)
+            continue
+        yield record
+
+
+def checkpointed_results(geolocation, source, journal, show_errors, failures):
+    """
+    Like resolved_results, but looks the lines up in batches of CHECKPOINT_BATCH that
+    are recorded in journal.  Stops after the first batch that did not complete and
+    appends its failure to failures.
+    """
+    locations = read_locations(source)
+    while chunk := list(islice(locations, CHECKPOINT_BATCH)):
+        batch = geolocation.get_geoloc_batch(chunk, journal)
+        geolocation.drain_errors()
+        yield from batch.results
+        if show_errors:
+            for error in batch.errors:
+                print(error.message, file=sys.stderr)
+        if not batch.complete:
+            failures.append(batch.failure)
+            return
+
+
+def stream_print(geolocation, source, output_format, output, ensure_ascii, show_errors, journal=None):
+    """
+    Writes results in output_format while the input is still being read.  Returns
+    the failure that stopped a checkpointed run early, None when it completed.
+    """
+    failures = []
+    if journal is None:
+        results = resolved_results(geolocation, source, show_errors)
+    else:
+        results = checkpointed_results(geolocation, source, journal, show_errors, failures)
+    write_results(output_format, results, output, ensure_ascii, flush=is_stdout(output))
+    return failures[0] if failures else None
+
+
+def open_output(path, output_format):
+    """The file to write to, stdout (in binary mode for `binary`) when path is None"""
+    binary = output_format == "binary"
+    if path is None:
+        return sys.stdout.buffer if binary else sys.stdout
+    if binary:
+        return open(path, "wb")
+    return open(path, "w", encoding="utf-8", newline="")
+
+
+def is_stdout(output):
+    return output is sys.stdout or output is getattr(sys.stdout, "buffer", None)
+
+
+def close_output(output):
+    if is_stdout(output):
+        output.flush()
+    else:
+        output.close()
+
+
+def print_stats(metrics, stats_format):
+    match stats_format:
+        case "json":
+            print(metrics.to_json(), file=sys.stderr)
+        case "prometheus":
+            print(metrics.to_prometheus(), end="", file=sys.stderr)
+        case _:
+            print(metrics.summary(), file=sys.stderr)
+
+
+def connect_to_server(address, explicit):
+    """A client for the lookup server at address, None when no server is running there"""
+    if not address:
+        return None
+    from src.client import GeoLocationClient
+
+    client = GeoLocationClient(address)
+    if client.is_running():
+        return client
+    if explicit:
+        print(f"No server running on {address}, looking up locally", file=sys.stderr)
+    return None
+
+
 def main() -> None:
     __help_message = (
         "A list of locations (\"City, ST\" or zip code in 5 digit format \"12345\") - US Cities and Zip codes only.\nExamples:\n\t'Madison, WI'\n\t'12345'\n\t"
@@ -57,10 +169,22 @@ def main() -> None:
     parser.add_argument("-p", "--print", action="store_true", help="Outputs pretty print to stdout instead of json string")
     parser.add_argument("-j", "--json", action="store_true", help="Converts all strings to ascii in json output")
     parser.add_argument("-e", "--errors", action="store_true", help="Prints out Error messages to stdout")
+    parser.add_argument("--no-cache", action="store_true", help="Bypasses the on-disk cache of previous lookups")
+    parser.add_argument("--warm-cache", action="store_true", help="Looks up every location again and refreshes the on-disk cache")
+    parser.add_argument("--purge-cache", action="store_true", help="Empties the on-disk cache and exits")
+    parser.add_argument("--input", metavar="FILE", type=argparse.FileType("r", encoding="utf-8"), help="Reads locations line by line from FILE (`-` for stdin) and streams NDJSON results")
+    parser.add_argument("--format", choices=FORMATS, help="Output format (default: json, ndjson with --input).\ncompact is json without whitespace, binary is a columnar format for large batches")
+    parser.add_argument("--output", metavar="FILE", help="Writes results to FILE instead of stdout")
+    parser.add_argument("--stats", action="store_true", help="Prints lookup timings, API status codes, retries and cache hit rate to stderr when done")
+    parser.add_argument("--stats-format", choices=("text", "json", "prometheus"), default="text", help="Format of --stats (default: text)")
+    parser.add_argument("--checkpoint", metavar="FILE", help="Records every finished lookup in FILE, so a run stopped by an error (rate limit,\nconnection, API key) can be continued with --resume")
+    parser.add_argument("--resume", action="store_true", help="Continues the run recorded in the --checkpoint FILE without repeating its lookups")
+    parser.add_argument("--server", metavar="ADDRESS", help="Forwards lookups to `python -m src.server` at ADDRESS (`host:port` or `unix:/path`)\nwhen it is running (default: $GEOLOC_SERVER).  Not used with --no-cache, --warm-cache, --stats or --checkpoint")
+    parser.add_argument("--cache-path", help="Location of the on-disk cache (default: $GEOLOC_CACHE_PATH or ~/.cache/geolocutil)")
 
     parser.add_argument(
         "locations",
-        nargs="+",
+        nargs="*",
         help=__help_message,
     )
 
@@ -69,19 +193,94 @@ def main() -> None:
         sys.exit(1)
 
     args = parser.parse_args()
-    geolocation = GeoLocationData()
-    geolocs = geolocation(args.locations)
+
+    if not args.purge_cache:
+        if args.input and args.locations:
+            parser.error("locations cannot be combined with --input")
+        if not args.input and not args.locations:
+            parser.error("the following arguments are required: locations")
+        if args.resume and not args.checkpoint:
+            parser.error("--resume needs the --checkpoint FILE of the run to continue")
+
+    from src import config
+    from src.GeoLocationData import GeoLocationData, GeoLocationError
+    from src.journal import Journal
+    from src.disk_cache import DiskCache
+    from src.gazetteer import Gazetteer
+    from src.metrics import Metrics
+
+    args.cache_path = args.cache_path or config.DISK_CACHE_PATH
+
+    if args.purge_cache:
+        with DiskCache(args.cache_path) as cache:
+            print(f"Removed {cache.purge()} cached entries from {args.cache_path}")
+        return
+
+    output_format = args.format or ("ndjson" if args.input else "json")
+    output = open_output(args.output, output_format)
+
+    geolocation = metrics = None
+    disk_cache: Optional[DiskCache] = None
+    if not (args.no_cache or args.warm_cache or args.stats or args.checkpoint):
+        geolocation = connect_to_server(args.server or config.SERVER_ADDRESS, args.server is not None)
+    if geolocation is None:
+        disk_cache = None if args.no_cache else DiskCache(args.cache_path, refresh=args.warm_cache)
+        resolver = Gazetteer(config.GAZETTEER_PATH) if config.GAZETTEER_PATH else None
+        metrics = Metrics() if args.stats else None
+        geolocation = GeoLocationData(disk_cache=disk_cache, resolver=resolver, observer=metrics)
+    journal = Journal(args.checkpoint, resume=args.resume) if args.checkpoint else None
+    failure = None
+    with geolocation:
+        if args.input:
+            with args.input:
+                try:
+                    failure = stream_print(geolocation, args.input, output_format, output, args.json, args.errors, journal)
+                except (GeoLocationError, TimeoutError) as e:
+                    failure = str(e)
+        else:
+            if journal is None:
+                # A server client (see connect_to_server) takes no journal, it is only used without --checkpoint
+                batch = geolocation.get_geoloc_batch(args.locations)
+            else:
+                batch = geolocation.get_geoloc_batch(args.locations, journal)
+            failure = batch.failure
+    for resource in (disk_cache, journal):
+        if resource is not None:
+            resource.close()
+
+    if failure is not None and journal is not None:
+        failure += f"\nFinished lookups are recorded, continue with `--checkpoint {args.checkpoint} --resume`."
+
+    if args.input:
+        close_output(output)
+        if metrics is not None:
+            print_stats(metrics, args.stats_format)
+        if failure is not None:
+            sys.exit(failure)
+        if not args.errors:
+            print("Any queries not included was skipped due to an error.  Please use `-e` in the function call to include errors in the output.", file=sys.stderr)
+        return
 
     if args.print is True:
-        table_print(geolocs)
+        table_print(batch.results)
     else:
-        print(json.dumps(geolocs, cls=GeoResultEncoder, indent=4, ensure_ascii=args.json))
+        write_results(output_format, batch.results, output, args.json)
+        if output_format in ("json", "compact"):
+            output.write("\n")
+    close_output(output)
+    if metrics is not None:
+        # Once the results are written and flushed, so the stats follow them
+        print_stats(metrics, args.stats_format)
 
+    # Keep csv and binary output on stdout clean
+    messages = sys.stderr if args.output is None and output_format != "json" else sys.stdout
     if args.errors:
-        for error in geolocation.errors:
-            print(error)
+        for error in batch.errors:
+            print(error.message, file=messages)
     else:
-        print("Any queries not included was skipped due to an error.  Please use `-e` in the function call to include errors in the output.")
+        print("Any queries not included was skipped due to an error.  Please use `-e` in the function call to include errors in the output.", file=messages)
+    if failure is not None:
+        sys.exit(failure)
 
 
 if __name__ == "__main__":
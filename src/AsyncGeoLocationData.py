@@ -0,0 +1,563 @@
+import asyncio
+import json
+import logging
+import time
+from collections import Counter
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Iterable, Optional, Protocol, Sequence, Union
+
+import requests
+
+from src.GeoLocationData import (
+    BaseGeoLocationData,
+    BatchResult,
+    GeoResult,
+    LocationResult,
+    NotFoundError,
+    GeoLocationError,
+    _deadline,
+    _error_sink,
+    _provider,
+)
+from src.cache import normalize_query
+from src.classify import Query, classify_locations
+from src.config import REVERSE_PATH
+from src.journal import Journal
+from src.metrics import LookupEvent
+from src.coalesce import AsyncSingleFlight
+
+try:
+    import aiohttp  # type: ignore[import-not-found]
+except ImportError:  # pragma: no cover - optional dependency
+    aiohttp = None  # type: ignore[assignment]
+
+
+DEFAULT_MAX_CONCURRENCY = 100
+
+
+@dataclass
+class BufferedResponse:
+    """Fully read HTTP response with the subset of the `requests.Response` API
+    that `BaseGeoLocationData._handle_response` relies on"""
+
+    status_code: int
+    text: str
+    url: str
+    headers: dict = field(default_factory=dict)
+
+    def json(self):
+        try:
+            return json.loads(self.text)
+        except json.JSONDecodeError as e:
+            raise requests.JSONDecodeError(e.msg, e.doc, e.pos) from e
+
+
+class AsyncTransport(Protocol):
+    """
+    Anything able to perform an awaitable GET.  Implementations must raise
+    `requests.ConnectionError` / `requests.ReadTimeout` so that the error handling
+    matches the synchronous client.
+    """
+
+    async def get(
+        self, url: str, params: dict, timeout: tuple[float, float]
+    ) -> BufferedResponse: ...
+
+    async def close(self) -> None: ...
+
+
+class AiohttpTransport:
+    """Default transport backed by a single pooled `aiohttp.ClientSession`"""
+
+    def __init__(self, limit: int = DEFAULT_MAX_CONCURRENCY) -> None:
+        if aiohttp is None:
+            raise ImportError(
+                "aiohttp is required for AsyncGeoLocationData. Install it with `pip install aiohttp`."
+            )
+        self._limit = limit
+        self._session: Optional["aiohttp.ClientSession"] = None
+
+    def _get_session(self) -> "aiohttp.ClientSession":
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self._limit)
+            )
+        return self._session
+
+    async def get(
+        self, url: str, params: dict, timeout: tuple[float, float]
+    ) -> BufferedResponse:
+        connect_timeout, read_timeout = timeout
+        client_timeout = aiohttp.ClientTimeout(
+            sock_connect=connect_timeout, sock_read=read_timeout
+        )
+        try:
+            async with self._get_session().get(
+                url, params=params, timeout=client_timeout
+            ) as response:
+                text = await response.text()
+                return BufferedResponse(
+                    response.status, text, str(response.url), dict(response.headers)
+                )
+        except (aiohttp.ServerTimeoutError, asyncio.TimeoutError) as e:
+            raise requests.ReadTimeout(str(e)) from e
+        except aiohttp.ClientConnectionError as e:
+            raise requests.ConnectionError(str(e)) from e
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+class AsyncGeoLocationData(BaseGeoLocationData):
+    """
+    asyncio flavour of `GeoLocationData`.  Parsing, validation, error messages and
+    exceptions are shared with the synchronous class (see BaseGeoLocationData);
+    the lookups and the network layer are awaitable.
+
+        async with AsyncGeoLocationData(max_concurrency=200) as geo:
+            results = await geo(["90210", "Miami, FL"])
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        transport: Optional[AsyncTransport] = None,
+        **kwargs,
+    ) -> None:
+        """
+        Args:
+            max_concurrency: Maximum number of requests in flight at once
+            transport: Object used to perform the GET requests, defaults to an
+                `AiohttpTransport` created on first use
+            **kwargs: Caching, resolver and provider options of BaseGeoLocationData.
+                The transports of the providers must be async as well.
+        """
+        super().__init__(**kwargs)
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self._max_concurrency = max_concurrency
+        self._transport: Optional[AsyncTransport] = transport
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._tier_semaphores = {
+            provider: asyncio.Semaphore(provider.max_concurrency)
+            for provider in self._providers
+            if provider.max_concurrency is not None
+        }
+        self._in_flight = AsyncSingleFlight()
+
+    async def __aenter__(self) -> "AsyncGeoLocationData":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        if self._transport is not None:
+            await self._transport.close()
+
+    def _get_transport(self) -> AsyncTransport:
+        if self._transport is None:
+            self._transport = AiohttpTransport(self._max_concurrency)
+        return self._transport
+
+    def _tier_transport(self) -> AsyncTransport:
+        return self._tier().transport or self._get_transport()
+
+    async def __call__(
+        self, locations: Union[tuple[str, ...], list[str], str]
+    ) -> list[GeoResult]:
+        self._log(logging.DEBUG, "class called as a function")
+        return await self.get_geoloc_data(locations)
+
+    async def get_geoloc_data(
+        self,
+        locations: Union[tuple[str, ...], list[str], str],
+        deadline: Optional[float] = None,
+    ) -> list[GeoResult]:
+        """
+        Get geolocation data for one or more locations concurrently.
+
+        Args:
+            locations: Single location string or collection of location strings
+            deadline: Seconds the whole batch may take.  A lookup still running
+                when they are up raises DeadlineExceededError.
+
+        Returns:
+            List of GeoResult objects containing location data, in input order
+        """
+
+        self._log(logging.DEBUG, "Processing locations: %s", locations)
+
+        deadline = self._absolute(deadline)
+        if isinstance(locations, str):
+            locations = self._parse_locations(locations)
+
+        plan = classify_locations(locations)
+        self._reject_invalid(plan.invalid)
+        tasks = [
+            asyncio.ensure_future(self._get_geoloc_data(location, query, deadline))
+            for location, query in plan.queries.items()
+        ]
+        try:
+            results = await asyncio.gather(*tasks)
+        finally:
+            self._cancel_pending(tasks)
+
+        return self._fan_out(locations, dict(zip(plan.queries, results)))
+
+    async def iter_geoloc_data(
+        self, locations: Union[tuple[str, ...], list[str], str]
+    ) -> AsyncIterator[GeoResult]:
+        """
+        Same as `get_geoloc_data` but yields each GeoResult as soon as its lookup
+        completes, so results are in completion order rather than input order.
+        """
+
+        if isinstance(locations, str):
+            locations = self._parse_locations(locations)
+
+        occurrences = Counter(locations)
+        tasks = [
+            asyncio.ensure_future(self._get_geoloc_data_with_location(l))
+            for l in occurrences
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                location, result = await next_done
+                if result is not None:
+                    for _ in range(occurrences[location]):
+                        yield self._to_geo_result(location, result)
+        finally:
+            self._cancel_pending(tasks)
+
+    async def get_geoloc_batch(
+        self,
+        locations: Union[Iterable[str], str],
+        journal: Optional[Journal] = None,
+        deadline: Optional[float] = None,
+    ) -> BatchResult:
+        """
+        Same as `GeoLocationData.get_geoloc_batch`, with all the lookups running at
+        once.  The first one to fail cancels those still running, they are left
+        unfinished.
+        """
+        deadline = self._absolute(deadline)
+        locations, outcomes, pending = self._start_batch(locations, journal)
+        tasks = {
+            asyncio.ensure_future(
+                self._get_outcome(location, query, deadline)
+            ): location
+            for location, query in pending
+        }
+        failures: dict[str, str] = {}
+        try:
+            running = set(tasks)
+            while running and not failures:
+                done, running = await asyncio.wait(
+                    running, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    location = tasks[task]
+                    try:
+                        outcomes[location] = self._record(
+                            journal, location, task.result()
+                        )
+                    except (GeoLocationError, TimeoutError) as e:
+                        failures[location] = self._fail(e, location)
+        finally:
+            self._cancel_pending(tasks)
+
+        return self._batch_result(locations, outcomes, failures)
+
+    async def reverse_geocode(self, lat: float, lon: float) -> Optional[GeoResult]:
+        """Same as `GeoLocationData.reverse_geocode`"""
+        lat, lon = float(lat), float(lon)
+        location = f"{lat},{lon}"
+        token = self._set_deadline(None)
+        try:
+            result = await self._get_reverse_geoloc_data(lat, lon, location)
+        finally:
+            if token is not None:
+                _deadline.reset(token)
+        return self._to_geo_result(location, result) if result is not None else None
+
+    async def reverse_geocode_many(
+        self, lats: Sequence[float], lons: Sequence[float]
+    ) -> list[Optional[GeoResult]]:
+        """Same as `GeoLocationData.reverse_geocode_many`, all coordinates at once"""
+        coordinates = self._pair_coordinates(lats, lons)
+        unique_coordinates = list(dict.fromkeys(coordinates))
+        tasks = [
+            asyncio.ensure_future(self.reverse_geocode(*c)) for c in unique_coordinates
+        ]
+        try:
+            results = await asyncio.gather(*tasks)
+        finally:
+            self._cancel_pending(tasks)
+
+        by_coordinate = dict(zip(unique_coordinates, results))
+        return [by_coordinate[coordinate] for coordinate in coordinates]
+
+    async def _get_reverse_geoloc_data(
+        self, lat: float, lon: float, location: str
+    ) -> Optional[LocationResult]:
+        if not self._check_coordinates(lat, lon, location):
+            return None
+        if (result := self._nearest_known(lat, lon)) is not None:
+            return result
+        self._log(logging.DEBUG, "using %s for `%s`...", REVERSE_PATH, location)
+        return await self._fetch(REVERSE_PATH, {"lat": lat, "lon": lon}, location)
+
+    async def _get_outcome(
+        self,
+        location: str,
+        query: Optional[Query] = None,
+        deadline: Optional[float] = None,
+    ) -> tuple[Optional[LocationResult], list[str]]:
+        """The result of one lookup along with the errors it logged, in its own task"""
+        errors: list[str] = []
+        token = _error_sink.set(errors)
+        try:
+            return await self._get_geoloc_data(location, query, deadline), errors
+        finally:
+            _error_sink.reset(token)
+
+    @staticmethod
+    def _cancel_pending(tasks: Iterable[asyncio.Future]) -> None:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+    async def _get_geoloc_data_with_location(
+        self, location: str
+    ) -> tuple[str, Optional[LocationResult]]:
+        return location, await self._get_geoloc_data(location)
+
+    async def _get_geoloc_data(
+        self,
+        location: str,
+        query: Optional[Query] = None,
+        deadline: Optional[float] = None,
+    ) -> Optional[LocationResult]:
+        # Every lookup runs in its own task, so the deadline only applies to it
+        token = self._set_deadline(deadline)
+        try:
+            if self._observer is None:
+                return await self._lookup(location, query)
+            started = time.perf_counter()
+            result = None
+            try:
+                result = await self._lookup(location, query)
+            finally:
+                self._observer.on_lookup(
+                    LookupEvent(
+                        location, time.perf_counter() - started, result is not None
+                    )
+                )
+            return result
+        finally:
+            if token is not None:
+                _deadline.reset(token)
+
+    async def _lookup(
+        self, location: str, query: Optional[Query] = None
+    ) -> Optional[LocationResult]:
+        if query is None and (query := self._classify(location)) is None:
+            return None
+        params = query.params
+        if self._resolver is not None:
+            # The gazetteer reads a memory mapped file, a page fault must not block the loop
+            result = await asyncio.to_thread(self._resolve_locally, query.path, params)
+            if result is not None:
+                return result
+        self._log(logging.DEBUG, "using %s for `%s`...", query.path, location)
+        return await self._fetch(query.path, params, location, query.key)
+
+    async def _fetch(
+        self, path: str, params: dict, location: str, key: Optional[str] = None
+    ) -> Optional[LocationResult]:
+        key = key or normalize_query(path, params)
+        found, result = await self._load_cached(key, self._serving_stale())
+        try:
+            if not found:
+                result = await self._in_flight.do(
+                    key,
+                    lambda: self._request_and_cache(key, path, params, location),
+                    self._remaining(),
+                )
+            elif result is None:
+                raise NotFoundError(location)
+        except (NotFoundError, TimeoutError) as e:
+            self._on_fetch_error(e, location, path)
+            return None
+        return result
+
+    async def _request_and_cache(
+        self, key: str, path: str, params: dict, location: str
+    ) -> Optional[LocationResult]:
+        try:
+            result = await self._ask_providers(path, params, location)
+        except NotFoundError:
+            await self._store_cached(key, None)
+            raise
+
+        if result is not None:
+            await self._store_cached(key, result)
+        return result
+
+    async def _load_cached(
+        self, key: str, stale: bool
+    ) -> tuple[bool, Optional[LocationResult]]:
+        """
+        `_get_cached` with the SQLite read in a worker thread: its busy timeout
+        must not block the event loop.
+        """
+        found, result = self._get_memory_cached(key, stale)
+        if found or self._disk_cache is None:
+            return found, result
+        found, result = await asyncio.to_thread(self._get_disk_cached, key, stale)
+        if found:
+            self._promote_cached(key, result, stale)
+        return found, result
+
+    async def _store_cached(self, key: str, result: Optional[LocationResult]) -> None:
+        self._put_cached(key, result, disk=False)
+        if self._disk_cache is not None:
+            await asyncio.to_thread(self._put_disk_cached, key, result)
+
+    async def _send(
+        self, url: str, params: dict, path: str, location: str, retry: bool
+    ) -> BufferedResponse:
+        timeout = self._attempt_timeout(location)
+        hedging = self._hedging
+        if hedging is None or (delay := hedging.delay()) is None:
+            return await self._get(url, params, path, location, retry, timeout)
+
+        first = asyncio.ensure_future(
+            self._get(url, params, path, location, retry, timeout)
+        )
+        attempts = [first]
+        try:
+            done, _ = await asyncio.wait(attempts, timeout=delay)
+            if not done and self._may_hedge(hedging):
+                self._log(logging.DEBUG, "Hedging `%s` after %.3fs...", location, delay)
+                timeout = self._cut_to_deadline(timeout)
+                attempts.append(
+                    asyncio.ensure_future(
+                        self._get(url, params, path, location, retry, timeout, True)
+                    )
+                )
+
+            errors: list[Exception] = []
+            for next_done in asyncio.as_completed(attempts):
+                try:
+                    response = await next_done
+                except Exception as e:
+                    errors.append(e)
+                    continue
+                if not first.done() or first.exception() is not None:
+                    hedging.on_hedge_won()
+                return response
+            raise errors[-1]
+        finally:
+            # Unlike threads, the slower attempt can be cancelled
+            self._cancel_pending(attempts)
+
+    async def _ask_providers(
+        self, path: str, params: dict, location: str
+    ) -> Optional[LocationResult]:
+        """Same as `GeoLocationData._ask_providers`"""
+        errors: list[Exception] = []
+        answered = False
+        for provider in self._providers_for(path):
+            token = _provider.set(provider)
+            try:
+                result = await self._requests_handler(path, params, location)
+            except Exception as e:
+                errors.append(self._on_provider_error(provider, e, location))
+                continue
+            finally:
+                _provider.reset(token)
+            if result is not None:
+                return result
+            answered = True
+        return self._no_provider_found(location, errors, answered)
+
+    async def _get(
+        self,
+        url: str,
+        params: dict,
+        path: str,
+        location: str,
+        retry: bool,
+        timeout: tuple[float, float],
+        hedge: bool = False,
+    ) -> BufferedResponse:
+        if self._observer is None and self._hedging is None:
+            return await self._tier_transport().get(url, params=params, timeout=timeout)
+
+        self._on_request_start(path)
+        started = time.perf_counter()
+        response, error = None, None
+        try:
+            response = await self._tier_transport().get(
+                url, params=params, timeout=timeout
+            )
+            return response
+        except Exception as e:
+            error = type(e).__name__
+            raise
+        finally:
+            self._on_request_end(
+                path,
+                location,
+                response,
+                time.perf_counter() - started,
+                retry,
+                error,
+                hedge,
+            )
+
+    async def _attempt(
+        self, url: str, params: dict, path: str, location: str, retry: bool
+    ) -> BufferedResponse:
+        provider = self._tier()
+        breaker = self._enter_circuit(provider, location)
+        try:
+            if (rate_limiter := provider.rate_limiter) is not None:
+                await asyncio.sleep(self._reserve_rate_limit(rate_limiter, location))
+            async with self._tier_semaphores.get(
+                provider, nullcontext()
+            ), self._semaphore:
+                response = await self._send(url, params, path, location, retry)
+        except BaseException as e:
+            if breaker is not None:
+                self._on_circuit_error(breaker, e)
+            raise
+        if breaker is not None:
+            self._on_circuit_response(breaker, response)
+        return response
+
+    async def _requests_handler(
+        self,
+        path: str,
+        _params: dict,
+        location: str,
+        max_retries: int = 3,
+        throttled: int = 0,
+    ) -> Optional[LocationResult]:
+        url, params = self._get_url_and_params(path, _params)
+        while True:
+            try:
+                response = await self._attempt(
+                    url, params, path, location, retry=max_retries < 3 or throttled > 0
+                )
+                return self._read_response(response, location)
+            except Exception as e:
+                retry = self._retry_after(e, url, location, max_retries, throttled)
+            if retry.delay > 0:
+                await asyncio.sleep(retry.delay)
+            max_retries, throttled = retry.max_retries, retry.throttled
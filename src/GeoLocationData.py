@@ -1,159 +1,706 @@
-import requests
+from __future__ import annotations
+
 import sys
-import re
 import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    CancelledError,
+    Future,
+    ThreadPoolExecutor,
+    as_completed,
+    wait,
+)
+from contextvars import ContextVar, Token, copy_context
 from dataclasses import dataclass
+from datetime import timedelta
+from itertools import repeat
+from src import config
 from src.config import (
-    COUNTRY_CODE,
     BASE_URL,
-    ZIP_PATH,
-    DIRECT_PATH,
-    API_KEY,
+    REVERSE_PATH,
     CONNECTION_TIMEOUT,
     READ_TIMEOUT,
+    POOL_SIZE,
+    CACHE_SIZE,
+    CACHE_TTL,
+    NEGATIVE_CACHE_SIZE,
+    NEGATIVE_CACHE_TTL,
+    RATE_LIMIT_RETRIES,
+    ERROR_LOG_SIZE,
+)
+from src.cache import ResultCache, normalize_query
+from src.circuit_breaker import CLOSED, CircuitBreaker
+from src.classify import Query, classify, classify_locations, parse_locations
+from src.disk_cache import DiskCache
+from src.error_log import ErrorLog
+from src.hedging import HedgePolicy
+from src.journal import Journal
+from src.coalesce import SingleFlight
+from src.rate_limiter import TokenBucket, backoff_delay, parse_retry_after
+from src.spatial import SpatialIndex, as_float_list
+from src.metrics import LookupEvent, Observer, RequestEvent
+from src.providers import OpenWeatherMap, Provider
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Union,
+    Optional,
+    Protocol,
+    Iterable,
+    Iterator,
+    Sequence,
 )
-from typing import Union, Optional
+
+if TYPE_CHECKING:
+    import requests
 
 LOG_LEVEL = logging.CRITICAL
 
+# Default of `rate_limit`: config.RATE_LIMIT_PER_MINUTE, read when the instance is created
+_CONFIGURED: Any = object()
+
+# Guards the one time setup of the module logger
+_logger_lock = threading.Lock()
+
 
 class GeoLocationError(Exception):
     """Base exception for GeoLocation errors"""
 
+    # Kind of the error in the ErrorLog
+    kind = "error"
+
 
 class ConnectionError(GeoLocationError):
     """Raised when connection fails"""
 
+    kind = "connection_error"
+
 
 class RateLimitError(GeoLocationError):
     """Raised when API rate limit is exceeded"""
 
+    kind = "rate_limit"
+
+    def __init__(self, message: str = "", retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
 
 class UnauthorizedError(GeoLocationError):
     """Raised when API key is invalid"""
 
+    kind = "unauthorized"
 
-@dataclass
+
+class NotFoundError(GeoLocationError):
+    """Raised when a query yields no results, handled before it leaves the class"""
+
+    kind = "not_found"
+
+
+class DeadlineExceededError(GeoLocationError):
+    """Raised when a lookup or a batch runs out of time, retries included"""
+
+    kind = "deadline"
+
+
+class CircuitOpenError(GeoLocationError):
+    """Raised instead of sending a request while the circuit breaker is open"""
+
+    kind = "circuit_open"
+
+
+class UnhandledError(GeoLocationError):
+    """Raised when a request fails in a way none of the other errors describe"""
+
+    kind = "unhandled"
+
+
+@dataclass(slots=True)
 class LocationResult:
     name: str
     lat: float
     lon: float
 
     def __getitem__(self, item):
-        return self.__dict__[item]
+        try:
+            return getattr(self, item)
+        except AttributeError:
+            raise KeyError(item) from None
 
 
-@dataclass
+@dataclass(slots=True)
 class GeoResult(LocationResult):
     search_term: str
 
 
+@dataclass(slots=True)
+class GeoError:
+    """Error record yielded by `iter_geoloc_data` for a search term that failed"""
+
+    search_term: str
+    message: str
+
+
+@dataclass
+class BatchResult:
+    """
+    What `get_geoloc_batch` got done.  `unfinished` lists the locations that failed
+    or were not attempted after a failure, they have a GeoError in `errors` too.
+    """
+
+    results: list[GeoResult]
+    errors: list[GeoError]
+    unfinished: list[str]
+    failure: Optional[str] = None
+
+    @property
+    def complete(self) -> bool:
+        return not self.unfinished
+
+
 ERROR_MESSAGES = {
     "invalid_format": "[SKIPPED] - INVALID FORMAT for `{}`. Please use `City, ST` or `5 DIGIT ZIP` format.",
     "not_found": "[NOTFOUND] - `{}` is not valid or yields no results.",
+    "invalid_coordinates": "[SKIPPED] - INVALID COORDINATES `{}`. Latitude must be within ±90 and longitude within ±180.",
     "connection_error": "[CONNECTION ERROR] - Unable to connect to {} within {} second{}.",
     "rate_limit": "[RATE LIMIT ERROR]: Unable to get {} due to rate limit - {} - {}",
+    "not_attempted": "[NOT ATTEMPTED] - `{}` was not looked up after an earlier failure.",
+    "deadline": "[DEADLINE EXCEEDED] - Gave up on `{}`, its deadline passed.",
+    "circuit_open": "[CIRCUIT OPEN] - `{}` was not sent, the API keeps failing. Retrying in {:.0f}s.",
 }
 
 
-@dataclass
-class LogMessage:
-    message: str
-    level: int
-    should_exit: bool = False
+class Transport(Protocol):
+    """Anything with a `requests.Session` compatible `get`, e.g. a session or a mock"""
+
+    def get(
+        self, url: str, *, params: dict, timeout: tuple[float, float]
+    ) -> requests.Response: ...
+
+    def close(self) -> None: ...
+
+
+class Response(Protocol):
+    """What is read of an answer: a `requests.Response` or the buffered one of
+    the async client"""
+
+    @property
+    def status_code(self) -> int: ...
+
+    @property
+    def url(self) -> str: ...
+
+    @property
+    def text(self) -> str: ...
+
+    def json(self) -> Any: ...
+
+
+class LocalResolver(Protocol):
+    """Offline source (e.g. `src.gazetteer.Gazetteer`) consulted before the API"""
+
+    def resolve(
+        self, path: str, params: dict
+    ) -> Optional[tuple[str, float, float]]: ...
+
+
+# Errors logged while a single lookup of `iter_geoloc_data` runs are also collected here
+_error_sink: ContextVar[Optional[list[str]]] = ContextVar("_error_sink", default=None)
+
+
+# `time.monotonic()` by which the running lookup must be done, retries and backoff included
+@dataclass(frozen=True)
+class _Retry:
+    """The next attempt of a request after a failed one, `delay` seconds later"""
+
+    delay: float
+    max_retries: int
+    throttled: int
 
 
-class GeoLocationData:
+_deadline: ContextVar[Optional[float]] = ContextVar("_deadline", default=None)
 
-    def __init__(self) -> None:
-        self._errors: list[str] = []
-        self._current_location: str = ""
+# Provider the running request goes to, None for the first one
+_provider: ContextVar[Optional[Provider]] = ContextVar("_provider", default=None)
+
+
+class BaseGeoLocationData:
+    """
+    What `GeoLocationData` and `AsyncGeoLocationData` share: configuration, the
+    caches, error log and observer, validation, deadlines and reading the API's
+    answers.  The subclasses add the lookups and the requests, blocking or
+    awaitable.
+    """
+
+    def __init__(
+        self,
+        cache_size: int = CACHE_SIZE,
+        cache_ttl: float = CACHE_TTL,
+        negative_cache_ttl: float = NEGATIVE_CACHE_TTL,
+        disk_cache: Optional[DiskCache] = None,
+        resolver: Optional[LocalResolver] = None,
+        rate_limit: Union[float, TokenBucket, None] = _CONFIGURED,
+        rate_limit_retries: int = RATE_LIMIT_RETRIES,
+        spatial_index: Optional[SpatialIndex] = None,
+        base_url: str = BASE_URL,
+        timeout: tuple[float, float] = (CONNECTION_TIMEOUT, READ_TIMEOUT),
+        observer: Optional[Observer] = None,
+        max_errors: int = ERROR_LOG_SIZE,
+        hedging: Optional[HedgePolicy] = None,
+        lookup_deadline: Optional[float] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        providers: Optional[Sequence[Provider]] = None,
+    ) -> None:
+        """
+        Args:
+            cache_size: Number of results kept in the in-memory LRU cache, 0 disables
+                caching
+            cache_ttl: Seconds a found result stays cached
+            negative_cache_ttl: Seconds a `not found` answer stays cached
+            disk_cache: Persistent cache consulted after the in-memory one, shared
+                between processes
+            resolver: Offline lookup tried first for every query, the API is only
+                called when it has no answer
+            rate_limit: Calls per minute allowed by the API plan, None disables the
+                client side limiter.  The rate is lowered on every 429 and recovers
+                as calls succeed.  Defaults to RATE_LIMIT_PER_MINUTE, taken from
+                $GEOLOC_RATE_LIMIT.  Pass a TokenBucket (e.g. a SharedTokenBucket)
+                to share one budget between several instances.
+            rate_limit_retries: How many times a 429 is retried with exponential
+                backoff (or the server's Retry-After) before RateLimitError is raised
+            spatial_index: Index of known places that answers `reverse_geocode`
+                without calling the API when a place is close enough.  Every result
+                this instance resolves is added to it.
+            base_url: Root of the geocoding API, e.g. a local stand-in server
+            timeout: `(connect, read)` timeouts in seconds for every request
+            observer: Receives timing, status, retry and cache events, e.g. a
+                `src.metrics.Metrics`.  Nothing is measured without one.
+            max_errors: Most error records kept in `error_log`, older ones are
+                dropped while the counts per kind keep growing
+            hedging: Sends a duplicate of a request that runs longer than most
+                and uses whichever response comes first, see HedgePolicy.  None
+                sends every request once.
+            lookup_deadline: Seconds a lookup may take over all its attempts,
+                backoff and rate limit waits included, before it fails with
+                DeadlineExceededError.  None lets the timeouts and retries decide.
+            circuit_breaker: Refuses requests with CircuitOpenError while the API
+                keeps failing, instead of waiting out every timeout, see
+                CircuitBreaker.  None always sends them.
+            providers: APIs asked in order after the resolver and the caches
+                missed, the next one when a provider does not know the place or
+                fails, see `src.providers`.  None uses OpenWeatherMap at base_url
+                with rate_limit and circuit_breaker, which providers replace.
+        """
+        self._timeout = timeout
+        self._cache: Optional[ResultCache[LocationResult]] = (
+            ResultCache(
+                cache_size,
+                cache_ttl,
+                negative_max_size=min(cache_size, NEGATIVE_CACHE_SIZE),
+                negative_ttl=negative_cache_ttl,
+            )
+            if cache_size > 0
+            else None
+        )
+        self._disk_cache = disk_cache
+        self._resolver = resolver
+        if rate_limit is _CONFIGURED:
+            rate_limit = config.RATE_LIMIT_PER_MINUTE
+        if providers is None:
+            providers = [
+                OpenWeatherMap(
+                    base_url, rate_limit=rate_limit, circuit_breaker=circuit_breaker
+                )
+            ]
+        if not providers:
+            raise ValueError("providers must not be empty")
+        self._providers = tuple(providers)
+        self._rate_limit_retries = rate_limit_retries
+        self._spatial_index = spatial_index
+        self._observer = observer
+        self._errors = ErrorLog(max_errors)
+        self._hedging = hedging
+        self._lookup_deadline = lookup_deadline
         self._logger = self._setup_logger()
 
     @property
     def errors(self) -> list[str]:
+        """Messages of the latest errors, at most `max_errors` of them"""
+        return self._errors.messages()
+
+    @property
+    def error_log(self) -> ErrorLog:
+        """The latest errors as records, with counts per kind"""
         return self._errors
 
-    def __call__(
-        self, locations: Union[tuple[str, ...], list[str], str]
-    ) -> list[GeoResult]:
-        self._log(LogMessage("class called as a function", logging.DEBUG))
-        return self.get_geoloc_data(locations)
+    def drain_errors(self) -> list[str]:
+        """Return the errors collected so far and forget them"""
+        return self._errors.drain()
+
+    @property
+    def cache(self) -> Optional[ResultCache[LocationResult]]:
+        return self._cache
+
+    @property
+    def cache_hits(self) -> int:
+        return self._cache.hits if self._cache else 0
+
+    @property
+    def cache_misses(self) -> int:
+        return self._cache.misses if self._cache else 0
+
+    @property
+    def cache_evictions(self) -> int:
+        return self._cache.evictions if self._cache else 0
+
+    @property
+    def observer(self) -> Optional[Observer]:
+        return self._observer
+
+    @property
+    def spatial_index(self) -> Optional[SpatialIndex]:
+        return self._spatial_index
+
+    @property
+    def hedging(self) -> Optional[HedgePolicy]:
+        return self._hedging
+
+    @property
+    def circuit_breaker(self) -> Optional[CircuitBreaker]:
+        """Circuit breaker of the first provider"""
+        return self._providers[0].circuit_breaker
+
+    @property
+    def providers(self) -> tuple[Provider, ...]:
+        return self._providers
+
+    @property
+    def rate_limiter(self) -> Optional[TokenBucket]:
+        """Rate limiter of the first provider"""
+        return self._providers[0].rate_limiter
 
     @staticmethod
     def _setup_logger() -> logging.Logger:
+        """
+        The module logger.  Its level and stdout handler are set once, by the first
+        instance, and only when the application has not given it a handler itself.
+        """
         logger = logging.getLogger(__name__)
-        logger.setLevel(LOG_LEVEL)
-        formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
-        handler = logging.StreamHandler(sys.stdout)
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
+        with _logger_lock:
+            if not logger.handlers:
+                logger.setLevel(LOG_LEVEL)
+                formatter = logging.Formatter(
+                    "%(asctime)s - %(levelname)s - %(message)s"
+                )
+                handler = logging.StreamHandler(sys.stdout)
+                handler.setFormatter(formatter)
+                logger.addHandler(handler)
         return logger
 
-    def _log(self, log_message: LogMessage) -> None:
-        self._logger.log(log_message.level, log_message.message)
+    def _log(self, level: int, message: str, *args) -> None:
+        """Log `message % args`, formatted only when the level is enabled"""
+        if self._logger.isEnabledFor(level):
+            self._logger.log(level, message, *args)
 
-        if log_message.level in (logging.CRITICAL, logging.ERROR):
-            self._errors.append(log_message.message)
+    def _error(
+        self,
+        kind: str,
+        message: str,
+        location: Optional[str] = None,
+        level: int = logging.ERROR,
+    ) -> None:
+        """Log an error and keep it in the error log (and the sink of the lookup)"""
+        self._errors.add(kind, message, location)
+        if (sink := _error_sink.get()) is not None:
+            sink.append(message)
+        if self._logger.isEnabledFor(level):
+            self._logger.log(level, message)
 
-        if log_message.should_exit:
-            sys.exit(log_message.message)
+    def _tier(self) -> Provider:
+        """The provider the running request goes to"""
+        return _provider.get() or self._providers[0]
 
-    def _requests_handler(
-        self, path: str, _params: dict, max_retries: int = 3
-    ) -> Optional[LocationResult]:
-        url = f"{BASE_URL + path}"
-        params = {**_params, "appid": API_KEY, "limit": 1}
+    def _enter_circuit(
+        self, provider: Provider, location: str
+    ) -> Optional[CircuitBreaker]:
+        """The circuit breaker of provider once it let an attempt through"""
+        breaker = provider.circuit_breaker
+        if breaker is not None and not breaker.allow():
+            raise self._circuit_open_error(breaker, location)
+        return breaker
 
-        try:
-            response = requests.get(
-                url, params=params, timeout=(CONNECTION_TIMEOUT, READ_TIMEOUT)
+    def _on_circuit_error(self, breaker: CircuitBreaker, error: BaseException) -> None:
+        """
+        An attempt let through by breaker raised error.  Connection errors and
+        timeouts count as failures, anything else (a cancellation included) only
+        frees the half open probe.
+        """
+        import requests
+
+        if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+            self._on_circuit_failure(breaker)
+        else:
+            breaker.release()
+
+    def _on_circuit_response(self, breaker: CircuitBreaker, response: Response) -> None:
+        if response.status_code >= 500:
+            self._on_circuit_failure(breaker)
+        elif breaker.on_success():
+            self._log(
+                logging.WARNING,
+                "%s answered again, circuit breaker closed",
+                self._tier(),
+            )
+
+    def _on_circuit_failure(self, breaker: CircuitBreaker) -> None:
+        if breaker.on_failure():
+            self._log(
+                logging.WARNING,
+                "%s keeps failing, circuit breaker open for %ss",
+                self._tier(),
+                breaker.reset_timeout,
+            )
+
+    @staticmethod
+    def _circuit_open_error(breaker: CircuitBreaker, location: str) -> CircuitOpenError:
+        retry_in = breaker.snapshot()["retry_in"] or 0.0
+        return CircuitOpenError(
+            ERROR_MESSAGES["circuit_open"].format(location, retry_in)
+        )
+
+    def _serving_stale(self) -> bool:
+        """Whether expired cache entries may answer, while no provider is available"""
+        return all(
+            (breaker := provider.circuit_breaker) is not None
+            and breaker.serve_stale
+            and breaker.state != CLOSED
+            for provider in self._providers
+        )
+
+    @staticmethod
+    def _remaining() -> Optional[float]:
+        """Seconds left before the deadline of the running lookup, None without one"""
+        deadline = _deadline.get()
+        return None if deadline is None else deadline - time.monotonic()
+
+    def _expired(self) -> bool:
+        remaining = self._remaining()
+        return remaining is not None and remaining <= 0
+
+    def _attempt_timeout(self, location: str) -> tuple[float, float]:
+        """The `(connect, read)` timeouts of the next attempt, cut to the deadline"""
+        remaining = self._remaining()
+        if remaining is None:
+            return self._timeout
+        if remaining <= 0:
+            raise DeadlineExceededError(ERROR_MESSAGES["deadline"].format(location))
+        return min(self._timeout[0], remaining), min(self._timeout[1], remaining)
+
+    def _cut_to_deadline(self, timeout: tuple[float, float]) -> tuple[float, float]:
+        """timeout, shortened to the seconds left before the deadline"""
+        remaining = self._remaining()
+        if remaining is None:
+            return timeout
+        return min(timeout[0], remaining), min(timeout[1], remaining)
+
+    @staticmethod
+    def _reserve_before_deadline(
+        rate_limiter: TokenBucket, remaining: float, location: str
+    ) -> float:
+        """
+        Take a token of rate_limiter, returns the wait for it.  Raises
+        DeadlineExceededError, leaving the token, when the wait outlasts the
+        remaining seconds of the deadline.
+        """
+        wait = rate_limiter.try_reserve(max(0.0, remaining))
+        if wait is None:
+            raise DeadlineExceededError(ERROR_MESSAGES["deadline"].format(location))
+        return wait
+
+    def _reserve_rate_limit(self, rate_limiter: TokenBucket, location: str) -> float:
+        """Take a token of rate_limiter, returns the wait for it (see above)"""
+        remaining = self._remaining()
+        if remaining is None:
+            return rate_limiter.reserve()
+        return self._reserve_before_deadline(rate_limiter, remaining, location)
+
+    def _may_hedge(self, hedging: HedgePolicy) -> bool:
+        """Whether there is time, hedge budget and (without waiting) a rate limit token"""
+        if self._expired() or not hedging.try_hedge():
+            return False
+        rate_limiter = self._tier().rate_limiter
+        if rate_limiter is None or rate_limiter.try_reserve(0) is not None:
+            return True
+        hedging.release()
+        return False
+
+    @staticmethod
+    def _request_event(
+        path: str,
+        location: str,
+        response: Optional[Response],
+        seconds: float,
+        retry: bool,
+        error: Optional[str],
+        hedge: bool = False,
+    ) -> RequestEvent:
+        elapsed = getattr(response, "elapsed", None)
+        return RequestEvent(
+            path,
+            location,
+            response.status_code if response is not None else None,
+            seconds,
+            retry,
+            error,
+            elapsed.total_seconds() if isinstance(elapsed, timedelta) else None,
+            hedge,
+        )
+
+    def _on_request_start(self, path: str) -> None:
+        if self._observer is not None:
+            self._observer.on_request_start(path)
+
+    def _on_request_end(
+        self,
+        path: str,
+        location: str,
+        response: Optional[Response],
+        seconds: float,
+        retry: bool,
+        error: Optional[str],
+        hedge: bool,
+    ) -> None:
+        """Time a GET for the hedge policy and report it to the observer"""
+        if self._hedging is not None and response is not None:
+            self._hedging.record(seconds)
+        if self._observer is not None:
+            self._observer.on_request(
+                self._request_event(
+                    path, location, response, seconds, retry, error, hedge
+                )
             )
-            return self._handle_response(response)
 
-        except requests.ConnectionError as e:
+    def _decode(self, response: Response):
+        if self._observer is None:
+            return response.json()
+        started = time.perf_counter()
+        data = response.json()
+        self._observer.on_parse(time.perf_counter() - started)
+        return data
+
+    @staticmethod
+    def _on_rate_limit_response(rate_limiter: TokenBucket, response: Response) -> None:
+        """Speed the limiter back up once the API answered, not on a 429 or a 5xx"""
+        if 200 <= response.status_code < 300 or response.status_code == 404:
+            rate_limiter.on_success()
+
+    def _on_rate_limited(
+        self, error: RateLimitError, location: str, throttled: int
+    ) -> Optional[float]:
+        """Slow the limiter down and return how long to back off, None to give up"""
+        if (rate_limiter := self._tier().rate_limiter) is not None:
+            rate_limiter.on_throttled()
+        if throttled >= self._rate_limit_retries:
+            return None
+        delay = backoff_delay(throttled, error.retry_after)
+        self._log(
+            logging.WARNING,
+            "Rate limited on `%s`. Retrying in %.1fs (%d retries left)...",
+            location,
+            delay,
+            self._rate_limit_retries - throttled,
+        )
+        return delay
+
+    def _read_response(
+        self, response: Response, location: str
+    ) -> Optional[LocationResult]:
+        """The result of an attempt, once the rate limiter heard how it went"""
+        if (rate_limiter := self._tier().rate_limiter) is not None:
+            self._on_rate_limit_response(rate_limiter, response)
+        return self._handle_response(response, location)
+
+    def _retry_after(
+        self,
+        error: Exception,
+        url: str,
+        location: str,
+        max_retries: int,
+        throttled: int,
+    ) -> _Retry:
+        """
+        What follows an attempt that raised error: returns the attempt to make
+        next, or raises the exception the request fails with.  Read timeouts are
+        retried max_retries more times, 429s `rate_limit_retries` times.
+        """
+        import requests
+
+        if isinstance(error, requests.ConnectionError):
+            if self._expired():
+                raise DeadlineExceededError(
+                    ERROR_MESSAGES["deadline"].format(location)
+                ) from error
             raise ConnectionError(
                 ERROR_MESSAGES["connection_error"].format(
-                    url, CONNECTION_TIMEOUT, "" if CONNECTION_TIMEOUT == 1 else "s"
+                    url, self._timeout[0], "" if self._timeout[0] == 1 else "s"
                 )
-            ) from e
+            ) from error
 
-        except requests.ReadTimeout as e:
+        if isinstance(error, requests.ReadTimeout):
+            if self._expired():
+                raise DeadlineExceededError(
+                    ERROR_MESSAGES["deadline"].format(location)
+                ) from error
             if max_retries > 0:
                 self._log(
-                    LogMessage(
-                        f"Read timeout. Retrying {max_retries} more time(s)...",
-                        logging.WARNING,
-                    )
+                    logging.WARNING,
+                    "Read timeout. Retrying %d more time(s)...",
+                    max_retries,
                 )
-                return self._requests_handler(path, _params, max_retries - 1)
-            raise TimeoutError(f"Read timeout after {3 - max_retries} attempts") from e
+                return _Retry(0.0, max_retries - 1, throttled)
+            raise TimeoutError(
+                f"Read timeout after {3 - max_retries} attempts"
+            ) from error
 
-        except (RateLimitError, UnauthorizedError) as e:
-            raise e
+        if isinstance(error, RateLimitError):
+            delay = self._on_rate_limited(error, location, throttled)
+            if delay is None:
+                raise error
+            if (remaining := self._remaining()) is not None and delay > remaining:
+                raise DeadlineExceededError(
+                    ERROR_MESSAGES["deadline"].format(location)
+                ) from error
+            return _Retry(delay, max_retries, throttled + 1)
 
-        except Exception as e:
-            self._log(
-                LogMessage(
-                    f"[UNHANDLED EXCEPTION] - ({type(e).__name__}) - {str(e)}",
-                    logging.CRITICAL,
-                    should_exit=True,
-                )
-            )
-            return None
+        if isinstance(
+            error,
+            (UnauthorizedError, NotFoundError, DeadlineExceededError, CircuitOpenError),
+        ):
+            raise error
 
-    def _handle_response(self, response: requests.Response) -> Optional[LocationResult]:
+        raise UnhandledError(
+            f"[UNHANDLED EXCEPTION] - ({type(error).__name__}) - {str(error)}"
+        ) from error
+
+    def _get_url_and_params(self, path: str, _params: dict) -> tuple[str, dict]:
+        return self._tier().request(path, _params)
+
+    def _handle_response(
+        self, response: Response, location: str
+    ) -> Optional[LocationResult]:
         match response.status_code:
             case 200:
-                data = response.json()
-                if data:
-                    if isinstance(data, list):
-                        data = data[0]
-                    return LocationResult(data["name"], data["lat"], data["lon"])
-                self._handle_not_found()
+                place = self._tier().parse(self._decode(response))
+                if place:
+                    return LocationResult(*place)
+                raise NotFoundError(location)
 
             case 404:
-                self._handle_not_found()
+                raise NotFoundError(location)
 
             case 401:
                 message = self._get_error_message(response)
@@ -165,111 +712,963 @@ class GeoLocationData:
                 message = self._get_error_message(response)
                 raise RateLimitError(
                     ERROR_MESSAGES["rate_limit"].format(
-                        self._current_location, response.status_code, message
-                    )
+                        location, response.status_code, message
+                    ),
+                    retry_after=parse_retry_after(
+                        getattr(response, "headers", {}).get("Retry-After")
+                    ),
                 )
 
             case _:
                 message = self._get_error_message(response)
-                self._log(
-                    LogMessage(
-                        f"[ERROR] - {response.status_code} - {response.url} - {message} {self._current_location}",
-                        logging.CRITICAL,
-                    )
+                self._error(
+                    "http_error",
+                    f"[ERROR] - {response.status_code} - {response.url} - {message} {location}",
+                    location,
+                    logging.CRITICAL,
                 )
                 return None
 
         return None
 
     @staticmethod
-    def _get_error_message(response: requests.Response) -> str:
+    def _get_error_message(response: Response) -> str:
         """Extract error message from response"""
+        import requests
+
         try:
             return response.json().get("message", response.json())
         except requests.JSONDecodeError:
             return response.text
 
-    def get_geoloc_data(
-        self, locations: Union[tuple[str, ...], list[str], str]
-    ) -> list[GeoResult]:
+    def _start_batch(
+        self, locations: Union[Iterable[str], str], journal: Optional[Journal]
+    ) -> tuple[
+        list[str],
+        dict[str, tuple[Optional[LocationResult], list[str]]],
+        list[tuple[str, Query]],
+    ]:
         """
-        Get geolocation data for one or more locations.
+        The locations of a batch as a list, the outcomes known without a lookup
+        (invalid locations and those journal already holds) and the lookups to run
+        """
+        if isinstance(locations, str):
+            locations = self._parse_locations(locations)
+        locations = list(locations)
+        plan = classify_locations(locations)
 
-        Args:
-            locations: Single location string or collection of location strings
+        outcomes: dict[str, tuple[Optional[LocationResult], list[str]]] = {
+            location: (None, [message])
+            for location, message in zip(
+                plan.invalid, self._reject_invalid(plan.invalid)
+            )
+        }
+        pending = []
+        for location, query in plan.queries.items():
+            if journal is not None and (entry := journal.get(location)) is not None:
+                place, errors = entry
+                outcomes[location] = (LocationResult(*place) if place else None, errors)
+            else:
+                pending.append((location, query))
+        return locations, outcomes, pending
 
-        Returns:
-            List of GeoResult objects containing location data
-        """
+    @staticmethod
+    def _record(
+        journal: Optional[Journal],
+        location: str,
+        outcome: tuple[Optional[LocationResult], list[str]],
+    ) -> tuple[Optional[LocationResult], list[str]]:
+        """Write the outcome of a lookup to journal, returns it"""
+        if journal is not None:
+            result, errors = outcome
+            place = (result.name, result.lat, result.lon) if result else None
+            journal.record(location, place, errors)
+        return outcome
 
-        self._log(LogMessage(f"Processing locations: {locations}", logging.DEBUG))
+    def _fail(self, error: Exception, location: str) -> str:
+        """Log the error that stopped the lookup of location, returns its message"""
+        message = str(error) or type(error).__name__
+        self._error(getattr(error, "kind", "timeout"), message, location)
+        return message
 
-        if isinstance(locations, str):
-            locations = self._parse_locations(locations)
+    def _batch_result(
+        self,
+        locations: list[str],
+        outcomes: dict[str, tuple[Optional[LocationResult], list[str]]],
+        failures: dict[str, str],
+    ) -> BatchResult:
+        results: list[GeoResult] = []
+        errors: list[GeoError] = []
+        unfinished: list[str] = []
+        for location in locations:
+            if location in outcomes:
+                result = outcomes[location][0]
+                if result is not None:
+                    results.append(self._to_geo_result(location, result))
+        for location in dict.fromkeys(locations):
+            if location in outcomes:
+                errors.extend(
+                    GeoError(location, message) for message in outcomes[location][1]
+                )
+                continue
+            unfinished.append(location)
+            message = failures.get(location) or ERROR_MESSAGES["not_attempted"].format(
+                location
+            )
+            errors.append(GeoError(location, message))
+        return BatchResult(
+            results, errors, unfinished, next(iter(failures.values()), None)
+        )
+
+    @staticmethod
+    def _pair_coordinates(
+        lats: Sequence[float], lons: Sequence[float]
+    ) -> list[tuple[float, float]]:
+        lats, lons = as_float_list(lats), as_float_list(lons)
+        if len(lats) != len(lons):
+            raise ValueError("lats and lons must have the same length")
+        return list(zip(lats, lons))
+
+    def _check_coordinates(self, lat: float, lon: float, location: str) -> bool:
+        """Whether lat, lon is a coordinate, logs an error when it is not"""
+        if -90 <= lat <= 90 and -180 <= lon <= 180:
+            return True
+        message = ERROR_MESSAGES["invalid_coordinates"].format(location)
+        self._error("invalid_coordinates", message, location)
+        return False
 
+    def _nearest_known(self, lat: float, lon: float) -> Optional[LocationResult]:
+        """The place of the spatial index close enough to lat, lon, if any"""
+        if self._spatial_index is None:
+            return None
+        place = self._spatial_index.nearest(lat, lon)
+        return LocationResult(*place) if place is not None else None
+
+    def _fan_out(
+        self, locations: Sequence[str], results: dict[str, Optional[LocationResult]]
+    ) -> list[GeoResult]:
         return [
-            GeoResult(
-                search_term=location,
-                name=result["name"],
-                lat=result["lat"],
-                lon=result["lon"],
-            )
+            self._to_geo_result(location, result)
             for location in locations
-            if (result := self._get_geoloc_data(location)) is not None
+            if (result := results.get(location)) is not None
         ]
 
+    @staticmethod
+    def _to_geo_result(location: str, result: LocationResult) -> GeoResult:
+        return GeoResult(
+            search_term=location,
+            name=result["name"],
+            lat=result["lat"],
+            lon=result["lon"],
+        )
+
     @staticmethod
     def _parse_locations(location_str: str) -> list[str]:
         """Parse quoted locations from a string"""
-        locations = re.findall(r"[\"\'](.*?)[\"\']", location_str)
-        return locations if locations else [location_str]
-
-    def _get_geoloc_data(self, location: str) -> Optional[LocationResult]:
-        self._log(LogMessage(f"getting geoloc data for `{location}`...", logging.DEBUG))
-        self._current_location = location
-        if location.isdigit() and len(location) == 5:
-            return self._get_data_by_zip_code(location)
+        return parse_locations(location_str)
+
+    @staticmethod
+    def _absolute(seconds: Optional[float]) -> Optional[float]:
+        return None if seconds is None else time.monotonic() + seconds
+
+    def _set_deadline(self, deadline: Optional[float]) -> Optional[Token]:
+        """Start the deadline of one lookup, the earlier of deadline and lookup_deadline"""
+        if self._lookup_deadline is not None:
+            own = time.monotonic() + self._lookup_deadline
+            deadline = own if deadline is None else min(deadline, own)
+        return None if deadline is None else _deadline.set(deadline)
+
+    def _classify(self, location: str) -> Optional[Query]:
+        """The query for one location, logs an invalid format error when there is none"""
+        query = classify(location)
+        if query is None:
+            self._log_invalid_format([location])
+        return query
+
+    def _log_invalid_format(self, locations: list[str]) -> list[str]:
+        """Log an invalid format error for every location at once, returns the messages"""
+        messages = [
+            ERROR_MESSAGES["invalid_format"].format(location) for location in locations
+        ]
+        if not messages:
+            return messages
+        self._errors.extend("invalid_format", messages, locations)
+        if self._logger.isEnabledFor(logging.ERROR):
+            for message in messages:
+                self._logger.error(message)
+        if (sink := _error_sink.get()) is not None:
+            sink.extend(messages)
+        return messages
+
+    def _reject_invalid(self, locations: list[str]) -> list[str]:
+        """
+        Skip the invalid locations of a batch: their errors are logged in bulk and
+        the observer sees each of them as a lookup that found nothing.
+        """
+        messages = self._log_invalid_format(locations)
+        if self._observer is not None:
+            for location in locations:
+                self._observer.on_lookup(LookupEvent(location, 0.0, False))
+        return messages
+
+    def _resolve_locally(self, path: str, params: dict) -> Optional[LocationResult]:
+        if self._resolver is None:
+            return None
+        value = self._resolver.resolve(path, params)
+        return LocationResult(*value) if value is not None else None
+
+    def _get_cached(
+        self, key: str, stale: bool = False
+    ) -> tuple[bool, Optional[LocationResult]]:
+        """
+        `(found, result)` from the memory then the disk cache, None means not found.
+        stale also accepts expired results.
+        """
+        found, result = self._get_memory_cached(key, stale)
+        if found:
+            return True, result
+        found, result = self._get_disk_cached(key, stale)
+        if found:
+            self._promote_cached(key, result, stale)
+        return found, result
+
+    def _get_memory_cached(
+        self, key: str, stale: bool = False
+    ) -> tuple[bool, Optional[LocationResult]]:
+        if self._cache is None:
+            return False, None
+        found, result = self._cache.get(key, stale)
+        if self._observer is not None:
+            self._observer.on_cache("memory", found)
+        return found, result
+
+    def _get_disk_cached(
+        self, key: str, stale: bool = False
+    ) -> tuple[bool, Optional[LocationResult]]:
+        if self._disk_cache is None:
+            return False, None
+        found, value = self._disk_cache.get(key, stale)
+        if self._observer is not None:
+            self._observer.on_cache("disk", found)
+        if not found:
+            return False, None
+        return True, LocationResult(*value) if value is not None else None
+
+    def _promote_cached(
+        self, key: str, result: Optional[LocationResult], stale: bool
+    ) -> None:
+        # An expired result must not look fresh in memory
+        if not stale:
+            self._put_cached(key, result, disk=False)
+
+    def _put_cached(
+        self, key: str, result: Optional[LocationResult], disk: bool = True
+    ) -> None:
+        if self._cache is not None:
+            if result is None:
+                self._cache.put_not_found(key)
+            else:
+                self._cache.put(key, result)
+
+        if self._spatial_index is not None and result is not None:
+            self._spatial_index.add(result.name, result.lat, result.lon)
+
+        if disk:
+            self._put_disk_cached(key, result)
+
+    def _put_disk_cached(self, key: str, result: Optional[LocationResult]) -> None:
+        if self._disk_cache is None:
+            return
+        if result is None:
+            self._disk_cache.put_not_found(key)
         else:
-            return self._get_data_by_city_state(location)
+            self._disk_cache.put(key, (result.name, result.lat, result.lon))
 
-    def _get_data_by_city_state(self, city_state: str) -> Optional[LocationResult]:
-        self._log(
-            LogMessage("checking if {city_state} is in valid format...", logging.DEBUG)
-        )
-        is_valid_format, city_name, state_code = (
-            self._get_city_and_state_if_valid_pattern(city_state)
+    def _on_fetch_error(self, error: Exception, location: str, path: str) -> None:
+        """
+        A NotFoundError is logged, the lookup then returns None.  Waiting for the
+        same request of another lookup past the deadline raises
+        DeadlineExceededError, anything else is raised again.
+        """
+        if isinstance(error, NotFoundError):
+            self._handle_not_found(location, path)
+            return
+        if isinstance(error, TimeoutError) and self._expired():
+            raise DeadlineExceededError(
+                ERROR_MESSAGES["deadline"].format(location)
+            ) from error
+        raise error
+
+    def _providers_for(self, path: str) -> Iterator[Provider]:
+        """The providers that answer queries of path, in order"""
+        return (provider for provider in self._providers if path in provider.paths)
+
+    def _on_provider_error(
+        self, provider: Provider, error: Exception, location: str
+    ) -> Exception:
+        """
+        Returns the error of a provider that did not find location, so the next
+        one is asked.  Deadlines and errors that are not the API's are raised.
+        """
+        if isinstance(error, DeadlineExceededError) or not isinstance(
+            error, (GeoLocationError, TimeoutError)
+        ):
+            raise error
+        if not isinstance(error, NotFoundError):
+            self._log(
+                logging.WARNING, "%s failed on `%s`: %s", provider, location, error
+            )
+        return error
+
+    @staticmethod
+    def _no_provider_found(
+        location: str, errors: list[Exception], answered: bool
+    ) -> None:
+        """
+        After no provider found location: raises the error of the last one that
+        failed, returns None when one answered with an HTTP error, and raises
+        NotFoundError when they all said so (or none answers such queries).
+        """
+        failures = [e for e in errors if not isinstance(e, NotFoundError)]
+        if failures:
+            raise failures[-1]
+        if answered:
+            return None
+        raise errors[-1] if errors else NotFoundError(location)
+
+    def _handle_not_found(self, location: str, path: str = "") -> None:
+        if path == REVERSE_PATH:
+            err_message = ERROR_MESSAGES["not_found"].format(location)
+            self._error("not_found", err_message, location)
+            return
+        err_message = ERROR_MESSAGES["not_found"].format(
+            location
+            + ". Please double check the location and submit it as `City, ST` or `5 DIGIT ZIP` format"
         )
+        self._error("not_found", err_message, location)
 
-        if is_valid_format:
-            params = {"q": f"{city_name},{state_code},{COUNTRY_CODE}"}
-            self._log(LogMessage(f"using DIRECT for {city_state}...", logging.DEBUG))
-            return self._requests_handler(DIRECT_PATH, params)
 
-        message = ERROR_MESSAGES["invalid_format"].format(city_state)
-        self._log(LogMessage(message, logging.ERROR))
-        return None
+class GeoLocationData(BaseGeoLocationData):
+
+    def __init__(
+        self,
+        max_workers: int = 1,
+        pool_size: Optional[int] = None,
+        transport: Optional[Transport] = None,
+        **kwargs,
+    ) -> None:
+        """
+        Args:
+            max_workers: Number of lookups to run at once.  The default of 1 keeps
+                the sequential behaviour, anything higher runs a batch on a bounded
+                thread pool.  Results are always returned in input order.
+            pool_size: Number of keep-alive connections kept in the HTTP pool,
+                defaults to the larger of POOL_SIZE and max_workers
+            transport: Object used to perform the GET requests, defaults to a
+                pooled `requests.Session` created on first use
+            **kwargs: Caching, resolver, rate limit, provider and deadline
+                options of BaseGeoLocationData
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        super().__init__(**kwargs)
+        self._max_workers = max_workers
+        self._pool_size = pool_size or max(POOL_SIZE, max_workers)
+        self._transport = transport
+        self._owns_transport = transport is None
+        self._transport_lock = threading.Lock()
+        self._in_flight = SingleFlight()
+        self._hedge_executor: Optional[ThreadPoolExecutor] = None
 
-    def _get_data_by_zip_code(self, zip_code) -> Optional[LocationResult]:
-        params = {"zip": f"{zip_code},{COUNTRY_CODE}"}
-        self._log(LogMessage(f"using ZIP for {zip_code}...", logging.DEBUG))
-        return self._requests_handler(ZIP_PATH, params)
+    @property
+    def max_workers(self) -> int:
+        return self._max_workers
+
+    def __call__(
+        self, locations: Union[tuple[str, ...], list[str], str]
+    ) -> list[GeoResult]:
+        self._log(logging.DEBUG, "class called as a function")
+        return self.get_geoloc_data(locations)
+
+    def __enter__(self) -> "GeoLocationData":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the transport and release its pooled connections"""
+        with self._transport_lock:
+            if self._transport is not None:
+                self._transport.close()
+            if self._owns_transport:
+                self._transport = None
+            if self._hedge_executor is not None:
+                # Losing hedged requests may still run, they are not waited for
+                self._hedge_executor.shutdown(wait=False)
+                self._hedge_executor = None
+
+    def _get_transport(self) -> Transport:
+        transport = self._transport
+        if transport is None:
+            with self._transport_lock:
+                transport = self._transport
+                if transport is None:
+                    transport = self._transport = self._create_session(self._pool_size)
+        return transport
+
+    def _get_hedge_executor(self) -> ThreadPoolExecutor:
+        if self._hedge_executor is None:
+            with self._transport_lock:
+                if self._hedge_executor is None:
+                    # A request and its duplicate for every lookup that can run at once
+                    self._hedge_executor = ThreadPoolExecutor(
+                        max_workers=2 * max(self._pool_size, self._max_workers),
+                        thread_name_prefix="geoloc-hedge",
+                    )
+        return self._hedge_executor
 
     @staticmethod
-    def _get_city_and_state_if_valid_pattern(
-        city_state,
-    ) -> tuple[bool, str | None, str | None]:
-        city_state_pattern = re.compile(
-            r"^([a-z\s-]+),? ([a-z]{2})$", flags=re.IGNORECASE
+    def _create_session(pool_size: int) -> requests.Session:
+        # Imported here so that code paths which never reach the API (e.g. `--help`,
+        # cached or offline lookups) don't pay for loading requests
+        import requests
+
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size
         )
-        _match = city_state_pattern.match(city_state)
-        is_match = bool(_match)
-        city_name = _match.group(1) if _match else None
-        state_code = _match.group(2) if _match else None
-        return is_match, city_name, state_code
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
 
-    def _handle_not_found(self) -> None:
-        err_message = ERROR_MESSAGES["not_found"].format(
-            self._current_location
-            + ". Please double check the location and submit it as `City, ST` or `5 DIGIT ZIP` format"
+    def _tier_transport(self) -> Transport:
+        return self._tier().transport or self._get_transport()
+
+    def _requests_handler(
+        self,
+        path: str,
+        _params: dict,
+        location: str,
+        max_retries: int = 3,
+        throttled: int = 0,
+    ) -> Optional[LocationResult]:
+        url, params = self._get_url_and_params(path, _params)
+        while True:
+            try:
+                response = self._attempt(
+                    url, params, path, location, retry=max_retries < 3 or throttled > 0
+                )
+                return self._read_response(response, location)
+            except Exception as e:
+                retry = self._retry_after(e, url, location, max_retries, throttled)
+            if retry.delay > 0:
+                time.sleep(retry.delay)
+            max_retries, throttled = retry.max_retries, retry.throttled
+
+    def _attempt(
+        self, url: str, params: dict, path: str, location: str, retry: bool
+    ) -> requests.Response:
+        """
+        One attempt: through the circuit breaker, the rate limiter and the
+        concurrency limit of the provider, then to its API
+        """
+        provider = self._tier()
+        breaker = self._enter_circuit(provider, location)
+        try:
+            if provider.rate_limiter is not None:
+                self._wait_for_rate_limiter(provider.rate_limiter, location)
+            if provider.slots is None:
+                response = self._send(url, params, path, location, retry)
+            else:
+                with provider.slots:
+                    response = self._send(url, params, path, location, retry)
+        except BaseException as e:
+            if breaker is not None:
+                self._on_circuit_error(breaker, e)
+            raise
+        if breaker is not None:
+            self._on_circuit_response(breaker, response)
+        return response
+
+    def _wait_for_rate_limiter(self, rate_limiter: TokenBucket, location: str) -> None:
+        remaining = self._remaining()
+        if remaining is None:
+            rate_limiter.acquire()
+        elif (
+            wait := self._reserve_before_deadline(rate_limiter, remaining, location)
+        ) > 0:
+            time.sleep(wait)
+
+    def _send(
+        self, url: str, params: dict, path: str, location: str, retry: bool
+    ) -> requests.Response:
+        """GET through the transport, hedged once the hedge policy has a delay"""
+        timeout = self._attempt_timeout(location)
+        hedging = self._hedging
+        if hedging is None or (delay := hedging.delay()) is None:
+            return self._get(url, params, path, location, retry, timeout)
+        return self._hedged_get(
+            url, params, path, location, retry, timeout, hedging, delay
         )
-        self._log(LogMessage(err_message, logging.ERROR))
+
+    def _hedged_get(
+        self,
+        url: str,
+        params: dict,
+        path: str,
+        location: str,
+        retry: bool,
+        timeout: tuple[float, float],
+        hedging: HedgePolicy,
+        delay: float,
+    ) -> requests.Response:
+        """
+        Send the request, and a duplicate of it when no response came within delay.
+        The first response is returned, the other request finishes in the
+        background.  Raises the last error when both fail.
+        """
+        executor = self._get_hedge_executor()
+        # The attempts run on other threads, they need the provider of this one
+        attempts = [
+            executor.submit(
+                copy_context().run,
+                self._get,
+                url,
+                params,
+                path,
+                location,
+                retry,
+                timeout,
+            )
+        ]
+        if not wait(attempts, timeout=delay).done and self._may_hedge(hedging):
+            self._log(logging.DEBUG, "Hedging `%s` after %.3fs...", location, delay)
+            attempts.append(
+                executor.submit(
+                    copy_context().run,
+                    self._get,
+                    url,
+                    params,
+                    path,
+                    location,
+                    retry,
+                    self._cut_to_deadline(timeout),
+                    True,
+                )
+            )
+
+        errors: list[Exception] = []
+        for attempt in as_completed(attempts):
+            try:
+                response = attempt.result()
+            except Exception as e:
+                errors.append(e)
+                continue
+            if attempt is not attempts[0]:
+                hedging.on_hedge_won()
+            return response
+        raise errors[-1]
+
+    def _get(
+        self,
+        url: str,
+        params: dict,
+        path: str,
+        location: str,
+        retry: bool,
+        timeout: tuple[float, float],
+        hedge: bool = False,
+    ) -> requests.Response:
+        """
+        One GET through the transport, timed for the hedge policy and reported when
+        there is an observer
+        """
+        if self._observer is None and self._hedging is None:
+            return self._tier_transport().get(url, params=params, timeout=timeout)
+
+        self._on_request_start(path)
+        started = time.perf_counter()
+        response, error = None, None
+        try:
+            response = self._tier_transport().get(url, params=params, timeout=timeout)
+            return response
+        except Exception as e:
+            error = type(e).__name__
+            raise
+        finally:
+            self._on_request_end(
+                path,
+                location,
+                response,
+                time.perf_counter() - started,
+                retry,
+                error,
+                hedge,
+            )
+
+    def get_geoloc_data(
+        self,
+        locations: Union[tuple[str, ...], list[str], str],
+        deadline: Optional[float] = None,
+    ) -> list[GeoResult]:
+        """
+        Get geolocation data for one or more locations.
+
+        Args:
+            locations: Single location string or collection of location strings
+            deadline: Seconds the whole batch may take.  A lookup still running
+                when they are up raises DeadlineExceededError.
+
+        Returns:
+            List of GeoResult objects containing location data.  Repeated search
+            terms are only looked up once but get one GeoResult per occurrence,
+            invalid ones are never sent to the API.
+        """
+
+        self._log(logging.DEBUG, "Processing locations: %s", locations)
+
+        deadline = self._absolute(deadline)
+        if isinstance(locations, str):
+            locations = self._parse_locations(locations)
+
+        plan = classify_locations(locations)
+        self._reject_invalid(plan.invalid)
+        queries = plan.queries.values()
+        if self._max_workers > 1 and len(queries) > 1:
+            with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+                results = list(
+                    executor.map(
+                        self._get_geoloc_data, plan.queries, queries, repeat(deadline)
+                    )
+                )
+        else:
+            results = [
+                self._get_geoloc_data(location, query, deadline)
+                for location, query in plan.queries.items()
+            ]
+
+        return self._fan_out(locations, dict(zip(plan.queries, results)))
+
+    def get_geoloc_batch(
+        self,
+        locations: Union[Iterable[str], str],
+        journal: Optional[Journal] = None,
+        deadline: Optional[float] = None,
+    ) -> BatchResult:
+        """
+        Like `get_geoloc_data`, but an error that stops a lookup (RateLimitError
+        after its retries, UnauthorizedError, ConnectionError, a timeout) does not
+        lose the rest of the batch.  No new lookups are started after the first
+        one fails, those already running finish, and everything answered so far
+        is returned.
+
+        Args:
+            locations: Single location string or collection of location strings
+            journal: Checkpoint that every answer is written to as soon as it
+                arrives.  Locations it already holds are not looked up again, so
+                running a failed batch again with the same journal resumes it.
+            deadline: Seconds the whole batch may take.  The lookup running when
+                they are up fails with DeadlineExceededError and the locations
+                not answered by then are left unfinished.
+
+        Returns:
+            BatchResult with the results in input order and a GeoError for every
+            location that was not found, failed or was not attempted
+        """
+        deadline = self._absolute(deadline)
+        locations, outcomes, pending = self._start_batch(locations, journal)
+
+        stopped = threading.Event()
+
+        def lookup(
+            location: str, query: Query
+        ) -> Optional[tuple[Optional[LocationResult], list[str]]]:
+            # A lookup a worker picks up after the first failure is not attempted
+            if stopped.is_set():
+                return None
+            try:
+                outcome = self._get_outcome(location, query, deadline)
+            except (GeoLocationError, TimeoutError):
+                stopped.set()
+                raise
+            return self._record(journal, location, outcome)
+
+        failures: dict[str, str] = {}
+        if self._max_workers > 1 and len(pending) > 1:
+            with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+                futures = {
+                    executor.submit(lookup, location, query): location
+                    for location, query in pending
+                }
+                for future in as_completed(futures):
+                    location = futures[future]
+                    try:
+                        outcome = future.result()
+                    except CancelledError:
+                        continue
+                    except (GeoLocationError, TimeoutError) as e:
+                        failures[location] = self._fail(e, location)
+                        for other in futures:
+                            other.cancel()
+                        continue
+                    if outcome is not None:
+                        outcomes[location] = outcome
+        else:
+            for location, query in pending:
+                try:
+                    outcome = lookup(location, query)
+                except (GeoLocationError, TimeoutError) as e:
+                    failures[location] = self._fail(e, location)
+                    break
+                if outcome is not None:
+                    outcomes[location] = outcome
+
+        return self._batch_result(locations, outcomes, failures)
+
+    def reverse_geocode(self, lat: float, lon: float) -> Optional[GeoResult]:
+        """
+        Get the place closest to a coordinate.
+
+        Args:
+            lat: Latitude in degrees
+            lon: Longitude in degrees
+
+        Returns:
+            GeoResult for the place, with the `lat,lon` query as its search term, or
+            None when nothing was found (the error is logged like any other lookup)
+        """
+        lat, lon = float(lat), float(lon)
+        location = f"{lat},{lon}"
+        token = self._set_deadline(None)
+        try:
+            result = self._get_reverse_geoloc_data(lat, lon, location)
+        finally:
+            if token is not None:
+                _deadline.reset(token)
+        return self._to_geo_result(location, result) if result is not None else None
+
+    def reverse_geocode_many(
+        self, lats: Sequence[float], lons: Sequence[float]
+    ) -> list[Optional[GeoResult]]:
+        """
+        Reverse geocode a batch of coordinates, e.g. two NumPy arrays.
+
+        Args:
+            lats: Latitudes in degrees, any sequence or 1-d array
+            lons: Longitudes in degrees, same length as lats
+
+        Returns:
+            One entry per coordinate, None where nothing was found, so positions
+            line up with the input arrays
+        """
+        coordinates = self._pair_coordinates(lats, lons)
+        unique_coordinates = list(dict.fromkeys(coordinates))
+        if self._max_workers > 1 and len(unique_coordinates) > 1:
+            with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+                results = list(
+                    executor.map(lambda c: self.reverse_geocode(*c), unique_coordinates)
+                )
+        else:
+            results = [self.reverse_geocode(*c) for c in unique_coordinates]
+
+        by_coordinate = dict(zip(unique_coordinates, results))
+        return [by_coordinate[coordinate] for coordinate in coordinates]
+
+    def _get_reverse_geoloc_data(
+        self, lat: float, lon: float, location: str
+    ) -> Optional[LocationResult]:
+        if not self._check_coordinates(lat, lon, location):
+            return None
+        if (result := self._nearest_known(lat, lon)) is not None:
+            return result
+        self._log(logging.DEBUG, "using %s for `%s`...", REVERSE_PATH, location)
+        return self._fetch(REVERSE_PATH, {"lat": lat, "lon": lon}, location)
+
+    def iter_geoloc_data(
+        self,
+        locations: Union[Iterable[str], str],
+        prefetch: int = 0,
+        include_errors: bool = False,
+        ordered: bool = True,
+    ) -> Iterator[Union[GeoResult, GeoError]]:
+        """
+        Lazily get geolocation data for any iterable of locations, including
+        generators, without holding the whole input or output in memory.
+
+        Args:
+            locations: Single location string or iterable of location strings
+            prefetch: How many lookups may run ahead of the consumer on the thread
+                pool (sized by max_workers).  0 looks each location up only when the
+                consumer asks for it.
+            include_errors: Also yield a GeoError for every error of a location
+            ordered: Yield in input order, otherwise in completion order
+
+        Yields:
+            GeoResult objects (and GeoError records when include_errors is set)
+        """
+
+        if isinstance(locations, str):
+            locations = self._parse_locations(locations)
+
+        if prefetch <= 0:
+            for location in locations:
+                yield from self._get_records(location, include_errors)
+            return
+
+        pending_locations = iter(locations)
+        in_flight: deque[Future] = deque()
+        with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+
+            def submit_up_to_prefetch() -> None:
+                while len(in_flight) < prefetch:
+                    location = next(pending_locations, None)
+                    if location is None:
+                        return
+                    in_flight.append(
+                        executor.submit(self._get_records, location, include_errors)
+                    )
+
+            try:
+                submit_up_to_prefetch()
+                while in_flight:
+                    if ordered:
+                        future = in_flight.popleft()
+                    else:
+                        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                        future = next(f for f in in_flight if f in done)
+                        in_flight.remove(future)
+                    records = future.result()
+                    submit_up_to_prefetch()
+                    yield from records
+            finally:
+                for future in in_flight:
+                    future.cancel()
+
+    def _get_outcome(
+        self,
+        location: str,
+        query: Optional[Query] = None,
+        deadline: Optional[float] = None,
+    ) -> tuple[Optional[LocationResult], list[str]]:
+        """The result of one lookup along with the errors it logged"""
+        errors: list[str] = []
+        token = _error_sink.set(errors)
+        try:
+            return self._get_geoloc_data(location, query, deadline), errors
+        finally:
+            _error_sink.reset(token)
+
+    def _get_records(
+        self, location: str, include_errors: bool
+    ) -> list[Union[GeoResult, GeoError]]:
+        result, errors = self._get_outcome(location)
+        records: list[Union[GeoResult, GeoError]] = []
+        if result is not None:
+            records.append(self._to_geo_result(location, result))
+        if include_errors:
+            records.extend(GeoError(location, message) for message in errors)
+        return records
+
+    def _get_geoloc_data(
+        self,
+        location: str,
+        query: Optional[Query] = None,
+        deadline: Optional[float] = None,
+    ) -> Optional[LocationResult]:
+        """
+        Look up one location.  query is its classification when the caller already
+        has it, otherwise the location is classified here.  deadline is the
+        `time.monotonic()` of the batch deadline, the lookup deadline may come first.
+        """
+        token = self._set_deadline(deadline)
+        try:
+            if self._observer is None:
+                return self._lookup(location, query)
+            started = time.perf_counter()
+            result = None
+            try:
+                result = self._lookup(location, query)
+            finally:
+                self._observer.on_lookup(
+                    LookupEvent(
+                        location, time.perf_counter() - started, result is not None
+                    )
+                )
+            return result
+        finally:
+            if token is not None:
+                _deadline.reset(token)
+
+    def _lookup(
+        self, location: str, query: Optional[Query] = None
+    ) -> Optional[LocationResult]:
+        if query is None and (query := self._classify(location)) is None:
+            return None
+        params = query.params
+        if (result := self._resolve_locally(query.path, params)) is not None:
+            return result
+        self._log(logging.DEBUG, "using %s for `%s`...", query.path, location)
+        return self._fetch(query.path, params, location, query.key)
+
+    def _fetch(
+        self, path: str, params: dict, location: str, key: Optional[str] = None
+    ) -> Optional[LocationResult]:
+        """
+        Answer from the cache when possible, otherwise call the API and cache it.
+        Concurrent calls for the same normalized query share one API request.
+        key is the normalized query when the caller already computed it.
+        """
+        key = key or normalize_query(path, params)
+        found, result = self._get_cached(key, self._serving_stale())
+        try:
+            if not found:
+                result = self._in_flight.do(
+                    key,
+                    lambda: self._request_and_cache(key, path, params, location),
+                    self._remaining(),
+                )
+            elif result is None:
+                raise NotFoundError(location)
+        except (NotFoundError, TimeoutError) as e:
+            self._on_fetch_error(e, location, path)
+            return None
+        return result
+
+    def _request_and_cache(
+        self, key: str, path: str, params: dict, location: str
+    ) -> Optional[LocationResult]:
+        try:
+            result = self._ask_providers(path, params, location)
+        except NotFoundError:
+            self._put_cached(key, None)
+            raise
+
+        if result is not None:
+            self._put_cached(key, result)
+        return result
+
+    def _ask_providers(
+        self, path: str, params: dict, location: str
+    ) -> Optional[LocationResult]:
+        """
+        Ask the providers in order until one finds the place.  When none did, the
+        error of the last one that failed is raised, NotFoundError when they all
+        said so (or none answers such queries), and None when a provider answered
+        with an HTTP error.
+        """
+        errors: list[Exception] = []
+        answered = False
+        for provider in self._providers_for(path):
+            token = _provider.set(provider)
+            try:
+                result = self._requests_handler(path, params, location)
+            except Exception as e:
+                errors.append(self._on_provider_error(provider, e, location))
+                continue
+            finally:
+                _provider.reset(token)
+            if result is not None:
+                return result
+            answered = True
+        return self._no_provider_found(location, errors, answered)
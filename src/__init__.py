@@ -1,3 +0,0 @@
-from dotenv import load_dotenv
-
-load_dotenv()
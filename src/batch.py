@@ -0,0 +1,410 @@
+"""
+Sharded, multiprocess batch geocoding for very large input files.
+
+    python -m src.batch locations.txt results.ndjson --processes 8 --threads 8
+
+The input (one location per line) is split at line boundaries into shards of
+about BATCH_SHARD_BYTES.  A pool of processes, each with its own
+`GeoLocationData`, looks the shards up, so parsing and decoding responses is
+spread over every core.  All workers draw on one rate budget
+(`SharedTokenBucket`) and share the on-disk cache.
+
+Every finished shard is written to the job directory (`<output>.parts` by
+default) and is a checkpoint: running the same command again after an
+interruption only looks up the shards that are missing.  At the end the parts
+are merged into output in input order, in any of `serializers.FORMATS`, the
+errors into `<output>.errors.ndjson`, and the job directory is removed.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Callable, Iterator, Optional
+
+from src import config
+from src.config import BATCH_SHARD_BYTES
+from src.serializers import FORMATS, write_results
+
+MANIFEST = "manifest.json"
+
+
+@dataclass(frozen=True)
+class Shard:
+    """Byte range `[start, stop)` of the input, starting and ending on a line boundary"""
+
+    index: int
+    start: int
+    stop: int
+
+
+@dataclass
+class ShardReport:
+    index: int
+    rows: int
+    errors: int
+    seconds: float
+
+
+@dataclass
+class BatchReport:
+    shards: int
+    resumed: int
+    rows: int
+    errors: int
+    seconds: float
+
+
+@dataclass
+class WorkerOptions:
+    """How every worker process builds its `GeoLocationData`"""
+
+    threads: int = 8
+    cache_path: Optional[str] = None
+    gazetteer_path: Optional[str] = None
+    base_url: str = config.BASE_URL
+
+
+def plan_shards(path: str, shard_bytes: int = BATCH_SHARD_BYTES) -> list[Shard]:
+    """Split the file into shards of about shard_bytes without reading all of it"""
+    size = os.path.getsize(path)
+    shards: list[Shard] = []
+    start = 0
+    with open(path, "rb") as fp:
+        while start < size:
+            fp.seek(start + shard_bytes)
+            fp.readline()
+            stop = min(fp.tell(), size)
+            shards.append(Shard(len(shards), start, stop))
+            start = stop
+    return shards
+
+
+def read_shard(path: str, shard: Shard) -> Iterator[str]:
+    """The non blank, stripped lines of a shard"""
+    with open(path, "rb") as fp:
+        fp.seek(shard.start)
+        position = shard.start
+        while position < shard.stop:
+            line = fp.readline()
+            position += len(line)
+            if location := line.decode("utf-8").strip():
+                yield location
+
+
+def part_path(job_dir: str, index: int, errors: bool = False) -> str:
+    return os.path.join(
+        job_dir, f"shard-{index:06d}{'.errors' if errors else ''}.ndjson"
+    )
+
+
+# The worker processes' client, created once per process by `_init_worker`
+_geolocation = None
+
+
+def _init_worker(options: WorkerOptions, rate_limiter) -> None:
+    global _geolocation
+    import logging
+
+    from src.disk_cache import DiskCache
+    from src.gazetteer import Gazetteer
+    from src.GeoLocationData import GeoLocationData
+
+    # Errors are written to the error parts, keep them off the terminal
+    logging.disable(logging.CRITICAL)
+    _geolocation = GeoLocationData(
+        max_workers=options.threads,
+        disk_cache=DiskCache(options.cache_path) if options.cache_path else None,
+        resolver=Gazetteer(options.gazetteer_path) if options.gazetteer_path else None,
+        rate_limit=rate_limiter,
+        base_url=options.base_url,
+    )
+
+
+def _run_shard(input_path: str, job_dir: str, shard: Shard) -> ShardReport:
+    from src.GeoLocationData import GeoError
+
+    geolocation = _geolocation
+    if geolocation is None:
+        raise RuntimeError(
+            "Shards are looked up in worker processes set up by _init_worker"
+        )
+    started = time.perf_counter()
+    rows_path, errors_path = part_path(job_dir, shard.index), part_path(
+        job_dir, shard.index, True
+    )
+    records = geolocation.iter_geoloc_data(
+        read_shard(input_path, shard),
+        prefetch=geolocation.max_workers * 4,
+        include_errors=True,
+    )
+    error_count = 0
+    with open(errors_path + ".tmp", "w", encoding="utf-8") as errors:
+
+        def results():
+            nonlocal error_count
+            for record in records:
+                if isinstance(record, GeoError):
+                    errors.write(
+                        json.dumps(
+                            {
+                                "search_term": record.search_term,
+                                "message": record.message,
+                            }
+                        )
+                        + "\n"
+                    )
+                    error_count += 1
+                else:
+                    yield record
+
+        with open(rows_path + ".tmp", "w", encoding="utf-8") as rows:
+            row_count = write_results("ndjson", results(), rows)
+    geolocation.drain_errors()
+
+    # The rows part marks the shard as done, so it is renamed last
+    os.replace(errors_path + ".tmp", errors_path)
+    os.replace(rows_path + ".tmp", rows_path)
+    return ShardReport(
+        shard.index, row_count, error_count, round(time.perf_counter() - started, 3)
+    )
+
+
+def _prepare_job_dir(job_dir: str, input_path: str, shard_bytes: int) -> None:
+    """Create the job directory, or check that an existing one belongs to this input"""
+    stat = os.stat(input_path)
+    manifest = {
+        "input": os.path.abspath(input_path),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "shard_bytes": shard_bytes,
+    }
+    manifest_path = os.path.join(job_dir, MANIFEST)
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as fp:
+            if json.load(fp) != manifest:
+                raise ValueError(
+                    f"`{job_dir}` holds the checkpoints of another job, remove it to start over"
+                )
+        return
+    os.makedirs(job_dir, exist_ok=True)
+    with open(manifest_path, "w") as fp:
+        json.dump(manifest, fp)
+
+
+def _merged_rows(job_dir: str, shards: list[Shard]) -> Iterator:
+    from src.GeoLocationData import GeoResult
+
+    for shard in shards:
+        with open(part_path(job_dir, shard.index), encoding="utf-8") as fp:
+            for line in fp:
+                yield GeoResult(**json.loads(line))
+
+
+def _concatenate(paths: Iterator[str], output_path: str) -> int:
+    """Copy the files one after the other into output_path, returns the line count"""
+    lines = 0
+    with open(output_path, "wb") as output:
+        for path in paths:
+            with open(path, "rb") as part:
+                while chunk := part.read(1 << 20):
+                    output.write(chunk)
+                    lines += chunk.count(b"\n")
+    return lines
+
+
+def merge_parts(
+    job_dir: str, shards: list[Shard], output_path: str, output_format: str = "ndjson"
+) -> tuple[int, int]:
+    """
+    Join the parts into output_path in input order, errors into
+    `<output>.errors.ndjson`.  Returns the row and error counts.
+    """
+    errors = _concatenate(
+        (part_path(job_dir, shard.index, True) for shard in shards),
+        output_path + ".errors.ndjson",
+    )
+    if output_format == "ndjson":
+        # Parts are ndjson already
+        rows = _concatenate(
+            (part_path(job_dir, shard.index) for shard in shards), output_path
+        )
+        return rows, errors
+
+    if output_format == "binary":
+        with open(output_path, "wb") as binary:
+            return (
+                write_results(output_format, _merged_rows(job_dir, shards), binary),
+                errors,
+            )
+    with open(output_path, "w", encoding="utf-8", newline="") as output:
+        rows = write_results(output_format, _merged_rows(job_dir, shards), output)
+        if output_format in ("json", "compact"):
+            output.write("\n")
+    return rows, errors
+
+
+def run_batch(
+    input_path: str,
+    output_path: str,
+    processes: Optional[int] = None,
+    options: Optional[WorkerOptions] = None,
+    output_format: str = "ndjson",
+    job_dir: Optional[str] = None,
+    shard_bytes: int = BATCH_SHARD_BYTES,
+    rate_limit: Optional[float] = None,
+    progress: Optional[Callable[[ShardReport, int], None]] = None,
+) -> BatchReport:
+    """
+    Geocode every line of input_path into output_path.
+
+    Args:
+        input_path: Text file with one location per line
+        output_path: Where the merged results are written
+        processes: Worker processes, defaults to the number of CPUs
+        options: How each worker builds its client (threads, caches, API address)
+        output_format: One of serializers.FORMATS
+        job_dir: Checkpoint directory, `<output_path>.parts` by default
+        shard_bytes: Input bytes per shard, a resumed job must use the same value
+        rate_limit: Calls per minute for all workers together, None for no limit
+        progress: Called with each finished shard and the total shard count
+
+    Raises:
+        Whatever stopped a worker (e.g. UnauthorizedError).  Finished shards are
+        kept in job_dir and the next run with the same arguments resumes from them.
+    """
+    from src.rate_limiter import SharedTokenBucket
+
+    if output_format not in FORMATS:
+        raise ValueError(
+            f"Unknown output format `{output_format}`, use one of {FORMATS}"
+        )
+    started = time.perf_counter()
+    options = options or WorkerOptions()
+    job_dir = job_dir or output_path + ".parts"
+    _prepare_job_dir(job_dir, input_path, shard_bytes)
+
+    shards = plan_shards(input_path, shard_bytes)
+    pending = [
+        shard for shard in shards if not os.path.exists(part_path(job_dir, shard.index))
+    ]
+    rate_limiter = SharedTokenBucket(rate_limit) if rate_limit else None
+
+    if pending:
+        with ProcessPoolExecutor(
+            max_workers=min(processes or os.cpu_count() or 1, len(pending)),
+            initializer=_init_worker,
+            initargs=(options, rate_limiter),
+        ) as executor:
+            futures = [
+                executor.submit(_run_shard, input_path, job_dir, shard)
+                for shard in pending
+            ]
+            try:
+                for future in as_completed(futures):
+                    report = future.result()
+                    if progress is not None:
+                        progress(report, len(shards))
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+
+    rows, errors = merge_parts(job_dir, shards, output_path, output_format)
+    shutil.rmtree(job_dir)
+    return BatchReport(
+        shards=len(shards),
+        resumed=len(shards) - len(pending),
+        rows=rows,
+        errors=errors,
+        seconds=round(time.perf_counter() - started, 3),
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Geocodes a large file of locations across several processes"
+    )
+    parser.add_argument("input", help="Text file with one location per line")
+    parser.add_argument("output", help="Where the results are written")
+    parser.add_argument(
+        "--format",
+        choices=FORMATS,
+        default="ndjson",
+        help="Output format (default: ndjson)",
+    )
+    parser.add_argument(
+        "--processes", type=int, help="Worker processes (default: one per CPU)"
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=8,
+        help="Lookups run at once by each process (default: 8)",
+    )
+    parser.add_argument(
+        "--job-dir", help="Checkpoint directory (default: OUTPUT.parts)"
+    )
+    parser.add_argument(
+        "--shard-bytes",
+        type=int,
+        default=BATCH_SHARD_BYTES,
+        help=f"Input bytes per shard (default: {BATCH_SHARD_BYTES})",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Bypasses the on-disk cache of previous lookups",
+    )
+    parser.add_argument(
+        "--cache-path",
+        help="Location of the on-disk cache (default: $GEOLOC_CACHE_PATH or ~/.cache/geolocutil)",
+    )
+    args = parser.parse_args()
+
+    from src.GeoLocationData import GeoLocationError
+
+    options = WorkerOptions(
+        threads=args.threads,
+        cache_path=None if args.no_cache else args.cache_path or config.DISK_CACHE_PATH,
+        gazetteer_path=config.GAZETTEER_PATH,
+    )
+
+    def progress(report: ShardReport, total: int) -> None:
+        print(
+            f"shard {report.index + 1}/{total}: {report.rows} rows, "
+            f"{report.errors} errors in {report.seconds:.1f}s",
+            file=sys.stderr,
+        )
+
+    try:
+        report = run_batch(
+            args.input,
+            args.output,
+            processes=args.processes,
+            options=options,
+            output_format=args.format,
+            job_dir=args.job_dir,
+            shard_bytes=args.shard_bytes,
+            rate_limit=config.RATE_LIMIT_PER_MINUTE,
+            progress=progress,
+        )
+    except ValueError as e:
+        sys.exit(str(e))
+    except (GeoLocationError, TimeoutError) as e:
+        sys.exit(
+            f"{e}\nFinished shards are kept, run the same command again to resume."
+        )
+    print(
+        f"{report.rows} rows and {report.errors} errors from {report.shards} shards "
+        f"({report.resumed} resumed) in {report.seconds:.1f}s",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
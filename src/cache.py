@@ -0,0 +1,148 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Generic, Optional, TypeVar
+
+V = TypeVar("V")
+
+
+def normalize_query(path: str, params: dict) -> str:
+    """
+    Build a cache key from the query params sent to the API so that every spelling
+    of the same query shares one entry, e.g. `Miami, FL`, `MIAMI , FL` and
+    `miami,fl` all become `direct:miami,fl,us`.  Coordinates are rounded to 4
+    decimals (about 11 m) so `reverse:25.7617,-80.1918` covers nearby points.
+    """
+    if "lat" in params and "lon" in params:
+        return f"{path}:{float(params['lat']):.4f},{float(params['lon']):.4f}"
+    value = params.get("zip") or params.get("q") or ""
+    parts = (" ".join(part.split()).lower() for part in value.split(","))
+    return f"{path}:{','.join(parts)}"
+
+
+class LRUCache(Generic[V]):
+    """Thread safe, size bounded, least recently used cache with a per-entry TTL"""
+
+    def __init__(
+        self,
+        max_size: int,
+        ttl: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.max_size = max_size
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: OrderedDict[str, tuple[float, V]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(
+        self, key: str, count_miss: bool = True, stale: bool = False
+    ) -> tuple[bool, Optional[V]]:
+        """
+        Returns a `(found, value)` pair and updates the hit/miss counters.  stale
+        also returns (and keeps) an expired entry.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if stale or expires_at > self._clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                del self._entries[key]
+                self.expirations += 1
+            if count_miss:
+                self.misses += 1
+            return False, None
+
+    def put(self, key: str, value: V) -> None:
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class ResultCache(Generic[V]):
+    """
+    Two LRU caches side by side: found results, and queries the API reported as not
+    found.  Negative entries get their own (usually much shorter) TTL and capacity so
+    a burst of typos cannot evict good results.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        ttl: float,
+        negative_max_size: Optional[int] = None,
+        negative_ttl: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.positive: LRUCache[V] = LRUCache(max_size, ttl, clock)
+        self.negative: LRUCache[None] = LRUCache(
+            negative_max_size or max_size,
+            ttl if negative_ttl is None else negative_ttl,
+            clock,
+        )
+        self._lock = threading.Lock()
+        self.misses = 0
+
+    def get(self, key: str, stale: bool = False) -> tuple[bool, Optional[V]]:
+        """
+        Returns `(True, value)` for a cached result, `(True, None)` for a cached not
+        found and `(False, None)` on a miss.  stale also returns expired results,
+        but not expired not found answers.
+        """
+        found, value = self.positive.get(key, count_miss=False, stale=stale)
+        if found:
+            return True, value
+        found, _ = self.negative.get(key, count_miss=False)
+        if found:
+            return True, None
+        with self._lock:
+            self.misses += 1
+        return False, None
+
+    def put(self, key: str, value: V) -> None:
+        self.positive.put(key, value)
+
+    def put_not_found(self, key: str) -> None:
+        self.negative.put(key, None)
+
+    def clear(self) -> None:
+        self.positive.clear()
+        self.negative.clear()
+
+    @property
+    def hits(self) -> int:
+        return self.positive.hits + self.negative.hits
+
+    @property
+    def evictions(self) -> int:
+        return self.positive.evictions + self.negative.evictions
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.positive.expirations + self.negative.expirations,
+            "negative_hits": self.negative.hits,
+            "size": len(self.positive),
+            "negative_size": len(self.negative),
+        }
@@ -0,0 +1,156 @@
+import threading
+import time
+from collections import deque
+from typing import Callable
+
+from src.config import (
+    CIRCUIT_FAILURE_RATIO,
+    CIRCUIT_HALF_OPEN_PROBES,
+    CIRCUIT_MIN_REQUESTS,
+    CIRCUIT_RESET_TIMEOUT,
+    CIRCUIT_WINDOW,
+)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Stops sending requests to an API that keeps failing.  Once `failure_ratio` of
+    the latest `window` requests (and at least `min_requests` of them) failed with
+    a connection error, a timeout or a 5xx, the circuit opens and requests are
+    refused at once instead of each waiting out its own timeouts.  After
+    `reset_timeout` seconds it goes half open and lets `half_open_probes` requests
+    through: a success closes it again, a failure opens it for another
+    `reset_timeout`.  With `serve_stale`, lookups answer from expired cache
+    entries while the circuit is not closed.
+
+    Thread safe, share one breaker between instances that call the same API.
+    """
+
+    def __init__(
+        self,
+        failure_ratio: float = CIRCUIT_FAILURE_RATIO,
+        window: int = CIRCUIT_WINDOW,
+        min_requests: int = CIRCUIT_MIN_REQUESTS,
+        reset_timeout: float = CIRCUIT_RESET_TIMEOUT,
+        half_open_probes: int = CIRCUIT_HALF_OPEN_PROBES,
+        serve_stale: bool = False,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if not 0 < failure_ratio <= 1:
+            raise ValueError("failure_ratio must be within (0, 1]")
+        if window < 1 or min_requests < 1 or half_open_probes < 1:
+            raise ValueError(
+                "window, min_requests and half_open_probes must be at least 1"
+            )
+        self.failure_ratio = failure_ratio
+        self.min_requests = min(min_requests, window)
+        self.reset_timeout = reset_timeout
+        self.half_open_probes = half_open_probes
+        self.serve_stale = serve_stale
+        self._clock = clock
+        # True for every failure among the latest outcomes
+        self._outcomes: deque[bool] = deque(maxlen=window)
+        self._failures = 0
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probes = 0
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if (
+            self._state == OPEN
+            and self._clock() - self._opened_at >= self.reset_timeout
+        ):
+            self._state, self._probes = HALF_OPEN, 0
+        return self._state
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now.  Every allowed request must be followed
+        by `on_success`, `on_failure` or `release`"""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and self._probes < self.half_open_probes:
+                self._probes += 1
+                return True
+            self.rejected += 1
+            return False
+
+    def on_success(self) -> bool:
+        """The API answered, returns True when that closed the circuit"""
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._close()
+                return True
+            self._add(False)
+            return False
+
+    def on_failure(self) -> bool:
+        """The request failed, returns True when that opened the circuit"""
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._open()
+                return True
+            self._add(True)
+            if (
+                self._state == CLOSED
+                and len(self._outcomes) >= self.min_requests
+                and self._failures >= self.failure_ratio * len(self._outcomes)
+            ):
+                self._open()
+                return True
+            return False
+
+    def release(self) -> None:
+        """An allowed request ended without telling whether the API is healthy"""
+        with self._lock:
+            if self._state == HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+
+    def _add(self, failed: bool) -> None:
+        if len(self._outcomes) == self._outcomes.maxlen:
+            self._failures -= self._outcomes[0]
+        self._outcomes.append(failed)
+        self._failures += failed
+
+    def _open(self) -> None:
+        self._state, self._opened_at = OPEN, self._clock()
+        self.opened += 1
+
+    def _close(self) -> None:
+        self._state = CLOSED
+        self._outcomes.clear()
+        self._failures = 0
+
+    def reset(self) -> None:
+        with self._lock:
+            self._close()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            state = self._current_state()
+            retry_in = self.reset_timeout - (self._clock() - self._opened_at)
+            return {
+                "state": state,
+                "failure_ratio": (
+                    round(self._failures / len(self._outcomes), 4)
+                    if self._outcomes
+                    else 0.0
+                ),
+                "requests": len(self._outcomes),
+                "opened": self.opened,
+                "rejected": self.rejected,
+                "retry_in": round(max(0.0, retry_in), 3) if state == OPEN else None,
+            }
@@ -0,0 +1,101 @@
+"""
+Classification of search terms before any lookup.
+
+A term is a 5 digit ZIP code, a `City, ST` query with a known state code, or
+invalid.  `classify_locations` sorts a whole batch in one pass and builds one
+`Query` per distinct valid term, so invalid terms never reach the network.  The
+query carries its cache key (see `cache.normalize_query`), spellings of the same
+query (`Miami, FL`, `MIAMI , FL`) then share one cache entry and one request in
+flight.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Iterable, NamedTuple, Optional
+
+from src.config import COUNTRY_CODE, DIRECT_PATH, ZIP_PATH
+
+CITY_STATE_PATTERN = re.compile(r"^([a-z\s-]+),? ([a-z]{2})$", flags=re.IGNORECASE)
+QUOTED_PATTERN = re.compile(r"[\"\'](.*?)[\"\']")
+_ZIP_KEY = f"{ZIP_PATH}:"
+_DIRECT_KEY = f"{DIRECT_PATH}:"
+_COUNTRY = COUNTRY_CODE.lower()
+
+# USPS codes of the states, DC and the inhabited territories
+STATE_CODES = frozenset("""
+    AL AK AZ AR CA CO CT DE FL GA HI ID IL IN IA KS KY LA ME MD MA MI MN MS MO
+    MT NE NV NH NJ NM NY NC ND OH OK OR PA RI SC SD TN TX UT VT VA WA WV WI WY
+    DC PR GU VI AS MP
+    """.split())
+
+
+class Query(NamedTuple):
+    """
+    A valid search term: the API path, the value of its query parameter and its
+    cache key.  A tuple of strings, which the garbage collector stops tracking,
+    so millions of them don't slow collections down.
+    """
+
+    path: str
+    value: str
+    key: str
+
+    @property
+    def params(self) -> dict:
+        return {"zip" if self.path == ZIP_PATH else "q": self.value}
+
+
+@dataclass
+class Classification:
+    """
+    Result of `classify_locations`.  The buckets hold the distinct terms in input
+    order and `queries` maps every valid one to its Query.
+    """
+
+    zip_codes: list[str] = field(default_factory=list)
+    cities: list[str] = field(default_factory=list)
+    invalid: list[str] = field(default_factory=list)
+    queries: dict[str, Query] = field(default_factory=dict)
+
+
+def parse_locations(location_str: str) -> list[str]:
+    """The quoted locations of a string, or the whole string when nothing is quoted"""
+    locations = QUOTED_PATTERN.findall(location_str)
+    return locations if locations else [location_str]
+
+
+def classify(location: str) -> Optional[Query]:
+    """The query to send for one term, None when it is invalid"""
+    if len(location) == 5 and location.isdigit():
+        # Digits are already normalized
+        key = f"{_ZIP_KEY}{location},{_COUNTRY}"
+        return Query(ZIP_PATH, f"{location},{COUNTRY_CODE}", key)
+    match = CITY_STATE_PATTERN.match(location)
+    if match is None:
+        return None
+    city, state = match.groups()
+    if state.upper() not in STATE_CODES:
+        return None
+    # What `normalize_query` makes of the params, the city can't hold a comma
+    key = f"{_DIRECT_KEY}{' '.join(city.split()).lower()},{state.lower()},{_COUNTRY}"
+    return Query(DIRECT_PATH, f"{city},{state},{COUNTRY_CODE}", key)
+
+
+def classify_locations(locations: Iterable[str]) -> Classification:
+    """Sort a batch of terms into ZIP codes, cities and invalid terms in one pass"""
+    plan = Classification()
+    queries, seen = plan.queries, set()
+    for location in locations:
+        if location in seen:
+            continue
+        seen.add(location)
+        query = classify(location)
+        if query is None:
+            plan.invalid.append(location)
+        elif query.path == ZIP_PATH:
+            plan.zip_codes.append(location)
+            queries[location] = query
+        else:
+            plan.cities.append(location)
+            queries[location] = query
+    return plan
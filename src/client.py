@@ -0,0 +1,186 @@
+"""
+Thin client for the lookup daemon started with `python -m src.server`.
+
+`GeoLocationClient` offers the calls of `GeoLocationData` that the CLI uses, so a
+warm server (pooled connections, filled caches) can answer instead of a fresh
+process.  It only needs the standard library.
+"""
+
+import http.client
+import json
+import socket
+from itertools import islice
+from typing import Iterable, Iterator, Optional, Union
+
+from src.config import SERVER_CLIENT_TIMEOUT, SERVER_MAX_BATCH
+from src.GeoLocationData import (
+    BatchResult,
+    GeoError,
+    GeoLocationData,
+    GeoLocationError,
+    GeoResult,
+)
+
+UNIX_PREFIX = "unix:"
+
+
+def parse_address(address: str) -> Union[str, tuple[str, int]]:
+    """A Unix socket path for `unix:/path`, `(host, port)` for `host:port`"""
+    if address.startswith(UNIX_PREFIX):
+        return address.removeprefix(UNIX_PREFIX)
+    host, separator, port = address.removeprefix("http://").rstrip("/").rpartition(":")
+    if not separator or not port.isdigit():
+        raise ValueError(
+            f"Invalid server address `{address}`, use `host:port` or `unix:/path`"
+        )
+    return host or "127.0.0.1", int(port)
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path: str, timeout: float) -> None:
+        super().__init__("localhost", timeout=timeout)
+        self._path = path
+
+    def connect(self) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self._path)
+
+
+class GeoLocationClient:
+    """
+    Sends lookups to a running server over one keep-alive connection.  Not thread
+    safe, use one client per thread.
+    """
+
+    def __init__(self, address: str, timeout: float = SERVER_CLIENT_TIMEOUT) -> None:
+        self.address = address
+        self._target = parse_address(address)
+        self._timeout = timeout
+        self._connection: Optional[http.client.HTTPConnection] = None
+        self._errors: list[str] = []
+
+    @property
+    def errors(self) -> list[str]:
+        return list(self._errors)
+
+    def drain_errors(self) -> list[str]:
+        """Return the errors collected so far and forget them"""
+        errors, self._errors = self._errors, []
+        return errors
+
+    def __call__(self, locations: Union[list[str], str]) -> list[GeoResult]:
+        return self.get_geoloc_data(locations)
+
+    def __enter__(self) -> "GeoLocationClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def _connect(self, timeout: float) -> http.client.HTTPConnection:
+        if isinstance(self._target, str):
+            return _UnixHTTPConnection(self._target, timeout)
+        host, port = self._target
+        return http.client.HTTPConnection(host, port, timeout=timeout)
+
+    def _request(self, method: str, path: str, body: Optional[dict] = None) -> dict:
+        if self._connection is None:
+            self._connection = self._connect(self._timeout)
+        payload = json.dumps(body).encode("utf-8") if body is not None else None
+        headers = {"Content-Type": "application/json"} if payload is not None else {}
+        try:
+            self._connection.request(method, path, body=payload, headers=headers)
+            response = self._connection.getresponse()
+            data = json.loads(response.read() or b"{}")
+        except (OSError, http.client.HTTPException, ValueError) as e:
+            self.close()
+            raise GeoLocationError(f"[SERVER ERROR] - {self.address} - {e}") from e
+        if response.status != 200:
+            raise GeoLocationError(
+                f"[SERVER ERROR] - {response.status} - {data.get('error', response.reason)}"
+            )
+        return data
+
+    def is_running(self, timeout: float = 0.5) -> bool:
+        """Whether a server answers on the address, checked on a short lived connection"""
+        connection = self._connect(timeout)
+        try:
+            connection.request("GET", "/health")
+            return connection.getresponse().status == 200
+        except (OSError, http.client.HTTPException):
+            return False
+        finally:
+            connection.close()
+
+    def _batch(self, locations: list[str]) -> BatchResult:
+        data = self._request("POST", "/batch", {"locations": locations})
+        batch = BatchResult(
+            [GeoResult(**result) for result in data["results"]],
+            [GeoError(**error) for error in data["errors"]],
+            data["unfinished"],
+            data["failure"],
+        )
+        self._errors.extend(error.message for error in batch.errors)
+        return batch
+
+    def get_geoloc_batch(self, locations: Union[list[str], str]) -> BatchResult:
+        """Same as `GeoLocationData.get_geoloc_batch`, without a journal"""
+        if isinstance(locations, str):
+            locations = GeoLocationData._parse_locations(locations)
+        locations = list(locations)
+        if len(locations) <= SERVER_MAX_BATCH:
+            return self._batch(locations)
+
+        results, errors, unfinished = [], [], []
+        for start in range(0, len(locations), SERVER_MAX_BATCH):
+            batch = self._batch(locations[start : start + SERVER_MAX_BATCH])
+            results += batch.results
+            errors += batch.errors
+            if not batch.complete:
+                unfinished = batch.unfinished + locations[start + SERVER_MAX_BATCH :]
+                return BatchResult(results, errors, unfinished, batch.failure)
+        return BatchResult(results, errors, unfinished)
+
+    def get_geoloc_data(self, locations: Union[list[str], str]) -> list[GeoResult]:
+        """Results in input order, errors are collected in `errors`"""
+        batch = self.get_geoloc_batch(locations)
+        if batch.failure is not None:
+            raise GeoLocationError(batch.failure)
+        return batch.results
+
+    def iter_geoloc_data(
+        self,
+        locations: Iterable[str],
+        prefetch: int = 0,
+        include_errors: bool = False,
+    ) -> Iterator[Union[GeoResult, GeoError]]:
+        """
+        Stream any iterable of locations to the server.
+
+        Args:
+            locations: Iterable of location strings, read `prefetch` at a time
+            prefetch: Locations sent per batch request (1 when 0), capped at
+                SERVER_MAX_BATCH
+            include_errors: Also yield a GeoError for every error of a location
+
+        Yields:
+            The results of each batch in input order, then its errors
+
+        Raises:
+            GeoLocationError: once the records of a batch that failed are yielded
+        """
+        batch_size = min(max(prefetch, 1), SERVER_MAX_BATCH)
+        locations = iter(locations)
+        while chunk := list(islice(locations, batch_size)):
+            batch = self._batch(chunk)
+            yield from batch.results
+            if include_errors:
+                yield from batch.errors
+            if batch.failure is not None:
+                raise GeoLocationError(batch.failure)
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import threading
+from concurrent.futures import Future, wait
+from typing import TYPE_CHECKING, Awaitable, Callable, Optional, TypeVar
+
+if TYPE_CHECKING:
+    import asyncio
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Collapse concurrent calls that share a key into one execution.  The first caller
+    runs the function, callers arriving while it is in flight wait for and share its
+    result (or exception).  A waiting caller gives up with TimeoutError after its
+    `timeout` seconds, the call itself goes on for the others.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: dict[str, Future] = {}
+        self.coalesced = 0
+
+    def do(
+        self, key: str, function: Callable[[], T], timeout: Optional[float] = None
+    ) -> T:
+        with self._lock:
+            joined = self._calls.get(key)
+            if joined is None:
+                future: Future = Future()
+                self._calls[key] = future
+            else:
+                self.coalesced += 1
+
+        if joined is not None:
+            # Future.result raises concurrent.futures.TimeoutError, which is not the
+            # builtin TimeoutError before Python 3.11
+            if not wait([joined], timeout).done:
+                raise TimeoutError(f"Gave up waiting for the running `{key}` request")
+            return joined.result()
+
+        try:
+            result = function()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+class AsyncSingleFlight:
+    """asyncio counterpart of `SingleFlight` for coroutines running on one loop"""
+
+    def __init__(self) -> None:
+        self._calls: dict[str, asyncio.Future] = {}
+        self.coalesced = 0
+
+    async def do(
+        self,
+        key: str,
+        function: Callable[[], Awaitable[T]],
+        timeout: Optional[float] = None,
+    ) -> T:
+        # Only asyncio code gets here, the threaded client never imports it
+        import asyncio
+
+        future = self._calls.get(key)
+        if future is not None:
+            self.coalesced += 1
+            # Same as above for asyncio.TimeoutError, and the call is left running
+            done, _ = await asyncio.wait([future], timeout=timeout)
+            if not done:
+                raise TimeoutError(f"Gave up waiting for the running `{key}` request")
+            return future.result()
+
+        future = self._calls[key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await function()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else was waiting on it
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._calls[key]
@@ -1,10 +1,4 @@
 import os
-from dotenv import load_dotenv
-
-load_dotenv()
-
-# GEOLOC_API_KEY needs to be in the environmental variables.  You can use a .env file with GEOLOC_API_KEY='<myapikey>'
-API_KEY = os.getenv("GEOLOC_API_KEY")
 
 # SET CONNECTION TIMEOUT HERE #
 # Connection timeout = time to attempt to connect before it times out
@@ -12,8 +6,107 @@ API_KEY = os.getenv("GEOLOC_API_KEY")
 CONNECTION_TIMEOUT = 5
 READ_TIMEOUT = 15
 
+# Number of keep-alive connections kept open to the API (raised to the worker count for concurrent batches)
+POOL_SIZE = 10
+
+# In-memory result cache: number of entries and how long (seconds) they stay valid
+CACHE_SIZE = 1024
+CACHE_TTL = 24 * 60 * 60
+NEGATIVE_CACHE_SIZE = 256
+NEGATIVE_CACHE_TTL = 5 * 60
+
+# On-disk cache shared between CLI runs, set GEOLOC_CACHE_PATH to move it (see DISK_CACHE_PATH below)
+DISK_CACHE_TTL = 30 * 24 * 60 * 60
+DISK_CACHE_MAX_ENTRIES = 1_000_000
+
+# How many times a 429 is retried, with exponential backoff between BACKOFF_BASE and BACKOFF_CAP seconds
+RATE_LIMIT_RETRIES = 5
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 60.0
+
+# Reverse lookups are answered from places already resolved when one lies within this distance (km),
+# the index groups places in square cells of REVERSE_INDEX_CELL_DEGREES
+REVERSE_INDEX_MAX_DISTANCE_KM = 2.0
+REVERSE_INDEX_CELL_DEGREES = 0.1
+
+# Most pairwise distances src.proximity computes at once (about 32 MB per temporary array with NumPy)
+PROXIMITY_BLOCK_SIZE = 1 << 22
+
+# Lookup daemon (`python -m src.server`): default listen address (`host:port` or `unix:/path`), most
+# locations per batch request, seconds an idle keep-alive connection is held and seconds the thin client
+# waits for an answer
+SERVER_LISTEN = "127.0.0.1:8765"
+SERVER_MAX_BATCH = 10_000
+SERVER_IDLE_TIMEOUT = 5
+SERVER_CLIENT_TIMEOUT = 5 * 60
+
+# Hedged requests (`GeoLocationData(hedging=HedgePolicy())`): a duplicate request is sent once the first
+# has run longer than HEDGE_PERCENTILE of the latest HEDGE_WINDOW latencies (and at least HEDGE_MIN_DELAY
+# seconds), after HEDGE_MIN_SAMPLES latencies were seen, for at most HEDGE_MAX_RATIO of the requests
+HEDGE_PERCENTILE = 95
+HEDGE_WINDOW = 256
+HEDGE_MIN_SAMPLES = 20
+HEDGE_MIN_DELAY = 0.05
+HEDGE_MAX_RATIO = 0.1
+
+# Circuit breaker (`GeoLocationData(circuit_breaker=CircuitBreaker())`): opens once CIRCUIT_FAILURE_RATIO of
+# the latest CIRCUIT_WINDOW requests (at least CIRCUIT_MIN_REQUESTS) failed, refuses requests for
+# CIRCUIT_RESET_TIMEOUT seconds, then lets CIRCUIT_HALF_OPEN_PROBES requests through to test the API
+CIRCUIT_FAILURE_RATIO = 0.5
+CIRCUIT_WINDOW = 50
+CIRCUIT_MIN_REQUESTS = 10
+CIRCUIT_RESET_TIMEOUT = 30
+CIRCUIT_HALF_OPEN_PROBES = 1
+
+# Most error records a client keeps (the oldest are dropped first), counts per error kind are kept for all
+ERROR_LOG_SIZE = 1000
+
+# Sharded batch jobs (`python -m src.batch`): input bytes per shard, the unit of work and of checkpointing
+BATCH_SHARD_BYTES = 1 << 20
+
 # OTHER GLOBAL SETTINGS DO NOT CHANGE
 BASE_URL = "http://api.openweathermap.org/geo/1.0/"
 ZIP_PATH = "zip"
 DIRECT_PATH = "direct"
+REVERSE_PATH = "reverse"
 COUNTRY_CODE = "US"
+
+
+# SETTINGS READ FROM THE ENVIRONMENT (or a .env file) #
+# They are resolved on first access, so importing this module stays cheap and the .env file is only
+# parsed once something actually needs one of them.  Read them as `config.API_KEY` at call time.
+_ENVIRONMENT_SETTINGS = {
+    # GEOLOC_API_KEY needs to be in the environmental variables.  You can use a .env file with GEOLOC_API_KEY='<myapikey>'
+    "API_KEY": lambda: os.getenv("GEOLOC_API_KEY"),
+    "DISK_CACHE_PATH": lambda: os.getenv(
+        "GEOLOC_CACHE_PATH",
+        os.path.join(
+            os.path.expanduser("~"), ".cache", "geolocutil", "geocode.sqlite3"
+        ),
+    ),
+    # Client side rate limit in calls per minute, set GEOLOC_RATE_LIMIT to your OpenWeatherMap plan (unset = no limit)
+    "RATE_LIMIT_PER_MINUTE": lambda: float(os.getenv("GEOLOC_RATE_LIMIT", 0)) or None,
+    # Optional offline gazetteer index built with `python -m src.gazetteer data.csv data.idx`
+    "GAZETTEER_PATH": lambda: os.getenv("GEOLOC_GAZETTEER_PATH"),
+    # Address of a running `python -m src.server` that geolocutil.py forwards lookups to (unset = never)
+    "SERVER_ADDRESS": lambda: os.getenv("GEOLOC_SERVER"),
+}
+_dotenv_loaded = False
+
+
+def load_environment() -> None:
+    """Load the .env file into os.environ, once"""
+    global _dotenv_loaded
+    if not _dotenv_loaded:
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        _dotenv_loaded = True
+
+
+def __getattr__(name: str):
+    if name not in _ENVIRONMENT_SETTINGS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    load_environment()
+    value = globals()[name] = _ENVIRONMENT_SETTINGS[name]()
+    return value
@@ -0,0 +1,160 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Optional
+
+from src import config
+from src.config import (
+    DISK_CACHE_TTL,
+    DISK_CACHE_MAX_ENTRIES,
+    NEGATIVE_CACHE_TTL,
+)
+
+# How many writes between two automatic trims of the table back to max_entries
+TRIM_EVERY = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS geocode (
+    key TEXT PRIMARY KEY,
+    name TEXT,
+    lat REAL,
+    lon REAL,
+    found INTEGER NOT NULL,
+    updated_at REAL NOT NULL,
+    expires_at REAL NOT NULL
+)
+"""
+
+
+class DiskCache:
+    """
+    SQLite backed geocode cache that survives between runs.  The database is opened
+    in WAL mode with a busy timeout so several CLI processes can read and write it
+    at the same time.
+
+    Values are `(name, lat, lon)` tuples, `None` marks a cached `not found`.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        ttl: float = DISK_CACHE_TTL,
+        max_entries: int = DISK_CACHE_MAX_ENTRIES,
+        negative_ttl: float = NEGATIVE_CACHE_TTL,
+        refresh: bool = False,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        """
+        Args:
+            path: SQLite file, created along with its directory if missing.  Defaults
+                to DISK_CACHE_PATH ($GEOLOC_CACHE_PATH).
+            ttl: Seconds a found result stays valid
+            max_entries: Size cap enforced every TRIM_EVERY writes and on `compact`
+            negative_ttl: Seconds a `not found` answer stays valid
+            refresh: Ignore existing entries and overwrite them with fresh lookups,
+                used to warm the cache
+        """
+        path = path or config.DISK_CACHE_PATH
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.negative_ttl = negative_ttl
+        self.refresh = refresh
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._connection = sqlite3.connect(
+            path, timeout=30, isolation_level=None, check_same_thread=False
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(_SCHEMA)
+
+    def __enter__(self) -> "DiskCache":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._connection.execute(
+                "SELECT COUNT(*) FROM geocode"
+            ).fetchone()
+        return count
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def get(
+        self, key: str, stale: bool = False
+    ) -> tuple[bool, Optional[tuple[str, float, float]]]:
+        """Same contract as `ResultCache.get`: `(found, value)`"""
+        if self.refresh:
+            return False, None
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT name, lat, lon, found FROM geocode"
+                " WHERE key = ? AND (expires_at > ? OR (? AND found))",
+                (key, self._clock(), stale),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return False, None
+            self.hits += 1
+        name, lat, lon, found = row
+        return True, (name, lat, lon) if found else None
+
+    def put(self, key: str, value: tuple[str, float, float]) -> None:
+        self._write(key, value, self.ttl)
+
+    def put_not_found(self, key: str) -> None:
+        self._write(key, None, self.negative_ttl)
+
+    def _write(
+        self, key: str, value: Optional[tuple[str, float, float]], ttl: float
+    ) -> None:
+        name, lat, lon = value if value is not None else (None, None, None)
+        now = self._clock()
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO geocode VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, name, lat, lon, value is not None, now, now + ttl),
+            )
+            self._writes += 1
+            if self._writes % TRIM_EVERY == 0:
+                self._trim()
+
+    def _trim(self) -> int:
+        """Drop expired entries, then the oldest ones above max_entries"""
+        cursor = self._connection.execute(
+            "DELETE FROM geocode WHERE expires_at <= ?", (self._clock(),)
+        )
+        removed = cursor.rowcount
+        cursor = self._connection.execute(
+            "DELETE FROM geocode WHERE key IN ("
+            "SELECT key FROM geocode ORDER BY updated_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+        return removed + cursor.rowcount
+
+    def compact(self) -> int:
+        """Trim the cache to its TTL and size cap and reclaim the freed disk space"""
+        with self._lock:
+            removed = self._trim()
+            self._connection.execute("VACUUM")
+        return removed
+
+    def purge(self) -> int:
+        """Delete every entry, returns the number of entries removed"""
+        with self._lock:
+            cursor = self._connection.execute("DELETE FROM geocode")
+            self._connection.execute("VACUUM")
+        return cursor.rowcount
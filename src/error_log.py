@@ -0,0 +1,92 @@
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import dataclass
+from typing import Callable, Iterable, Optional
+
+from src.config import ERROR_LOG_SIZE
+
+
+@dataclass(slots=True)
+class ErrorRecord:
+    """
+    One logged error.  `kind` names its cause, e.g. `not_found`, `invalid_format`,
+    `rate_limit` or `unauthorized`.
+    """
+
+    kind: str
+    message: str
+    search_term: Optional[str]
+    time: float
+
+
+class ErrorLog:
+    """
+    Thread safe ring buffer of the latest errors with a running count per kind, so
+    a long lived client keeps stable memory however many errors it logs.  Counts
+    cover every error added, including the ones dropped or drained since.
+    """
+
+    def __init__(
+        self, max_size: int = ERROR_LOG_SIZE, clock: Callable[[], float] = time.time
+    ) -> None:
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.max_size = max_size
+        self._clock = clock
+        self._records: deque[ErrorRecord] = deque(maxlen=max_size)
+        self._counts: Counter[str] = Counter()
+        self._dropped = 0
+        self._lock = threading.Lock()
+
+    def add(self, kind: str, message: str, search_term: Optional[str] = None) -> None:
+        record = ErrorRecord(kind, message, search_term, self._clock())
+        with self._lock:
+            if len(self._records) == self.max_size:
+                self._dropped += 1
+            self._records.append(record)
+            self._counts[kind] += 1
+
+    def extend(
+        self, kind: str, messages: list[str], search_terms: Iterable[Optional[str]]
+    ) -> None:
+        """Add one record per message under a single lock"""
+        now = self._clock()
+        records = [
+            ErrorRecord(kind, message, search_term, now)
+            for message, search_term in zip(messages, search_terms)
+        ]
+        with self._lock:
+            self._dropped += max(0, len(self._records) + len(records) - self.max_size)
+            self._records.extend(records)
+            self._counts[kind] += len(records)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def records(self) -> list[ErrorRecord]:
+        with self._lock:
+            return list(self._records)
+
+    def messages(self) -> list[str]:
+        with self._lock:
+            return [record.message for record in self._records]
+
+    def drain(self) -> list[str]:
+        """Return the messages kept so far and forget them, counts are not reset"""
+        with self._lock:
+            messages = [record.message for record in self._records]
+            self._records.clear()
+        return messages
+
+    @property
+    def counts(self) -> dict[str, int]:
+        """Errors added per kind"""
+        with self._lock:
+            return dict(self._counts)
+
+    @property
+    def dropped(self) -> int:
+        """Errors pushed out of the buffer by newer ones"""
+        with self._lock:
+            return self._dropped
@@ -0,0 +1,224 @@
+"""
+Offline ZIP / city gazetteer.
+
+A CSV with `zip,city,state,lat,lon` columns is converted once into a compact binary
+index with `build_index` (or `python -m src.gazetteer data.csv data.idx`).  The index
+is a handful of sorted, fixed width arrays plus two string blobs, so `Gazetteer`
+memory maps it and answers lookups by binary search without parsing anything.
+"""
+
+import argparse
+import csv
+import mmap
+import struct
+import threading
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Optional, Union
+
+MAGIC = b"GZT1"
+# magic, zip count, city count, name count, names blob size, city keys blob size
+_HEADER = struct.Struct("<4sIIIII")
+_ALIGNMENT = 8
+
+
+def _city_key(city: str, state: str) -> bytes:
+    """Same normalization as `src.cache.normalize_query` so both agree on a city"""
+    return f"{' '.join(city.split()).lower()},{state.strip().lower()}".encode("utf-8")
+
+
+def _padding(size: int) -> bytes:
+    return b"\0" * (-size % _ALIGNMENT)
+
+
+def build_index(csv_path: str, index_path: str) -> tuple[int, int]:
+    """
+    Convert a gazetteer CSV into the binary index.  Each row becomes a ZIP entry; each
+    distinct (city, state) gets one entry placed at the centroid of its rows.
+
+    Returns:
+        The number of ZIP and city entries written
+    """
+    names: dict[str, int] = {}
+    zips: dict[int, tuple[int, float, float]] = {}
+    cities: dict[bytes, list] = defaultdict(lambda: [None, 0.0, 0.0, 0])
+
+    with open(csv_path, newline="", encoding="utf-8") as csv_file:
+        for row in csv.DictReader(csv_file):
+            name = row["city"].strip()
+            name_index = names.setdefault(name, len(names))
+            lat, lon = float(row["lat"]), float(row["lon"])
+            if row.get("zip", "").strip():
+                zips[int(row["zip"])] = (name_index, lat, lon)
+            city = cities[_city_key(name, row["state"])]
+            city[0] = name_index
+            city[1] += lat
+            city[2] += lon
+            city[3] += 1
+
+    zip_codes = sorted(zips)
+    city_keys = sorted(cities)
+    name_list = sorted(names, key=names.__getitem__)
+
+    names_blob = b"".join(name.encode("utf-8") for name in name_list)
+    name_offsets = array("I", [0])
+    for name in name_list:
+        name_offsets.append(name_offsets[-1] + len(name.encode("utf-8")))
+
+    city_keys_blob = b"".join(city_keys)
+    city_key_offsets = array("I", [0])
+    for key in city_keys:
+        city_key_offsets.append(city_key_offsets[-1] + len(key))
+
+    sections: list[Union[array, bytes]] = [
+        array("I", zip_codes),
+        array("I", (zips[z][0] for z in zip_codes)),
+        array("d", (zips[z][1] for z in zip_codes)),
+        array("d", (zips[z][2] for z in zip_codes)),
+        city_key_offsets,
+        array("I", (cities[k][0] for k in city_keys)),
+        array("d", (cities[k][1] / cities[k][3] for k in city_keys)),
+        array("d", (cities[k][2] / cities[k][3] for k in city_keys)),
+        name_offsets,
+        names_blob,
+        city_keys_blob,
+    ]
+
+    with open(index_path, "wb") as index_file:
+        header = _HEADER.pack(
+            MAGIC,
+            len(zip_codes),
+            len(city_keys),
+            len(name_list),
+            len(names_blob),
+            len(city_keys_blob),
+        )
+        index_file.write(header + _padding(len(header)))
+        for section in sections:
+            data = section.tobytes() if isinstance(section, array) else section
+            index_file.write(data + _padding(len(data)))
+
+    return len(zip_codes), len(city_keys)
+
+
+class Gazetteer:
+    """
+    Read only view over an index built by `build_index`.  Implements the
+    `LocalResolver` protocol used by `GeoLocationData`.
+    """
+
+    def __init__(self, index_path: str) -> None:
+        with open(index_path, "rb") as index_file:
+            self._mmap = mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+        magic, zip_count, city_count, name_count, names_size, keys_size = (
+            _HEADER.unpack_from(view)
+        )
+        if magic != MAGIC:
+            raise ValueError(f"{index_path} is not a gazetteer index")
+
+        position = _HEADER.size + len(_padding(_HEADER.size))
+
+        def take(size: int) -> memoryview:
+            nonlocal position
+            section = view[position : position + size]
+            position += size + len(_padding(size))
+            return section
+
+        self._zip_codes = take(4 * zip_count).cast("I")
+        self._zip_names = take(4 * zip_count).cast("I")
+        self._zip_lats = take(8 * zip_count).cast("d")
+        self._zip_lons = take(8 * zip_count).cast("d")
+        self._city_key_offsets = take(4 * (city_count + 1)).cast("I")
+        self._city_names = take(4 * city_count).cast("I")
+        self._city_lats = take(8 * city_count).cast("d")
+        self._city_lons = take(8 * city_count).cast("d")
+        self._name_offsets = take(4 * (name_count + 1)).cast("I")
+        self._names_blob = take(names_size)
+        self._city_keys_blob = take(keys_size)
+        # Guards the counters, one Gazetteer serves all the client's workers
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._zip_codes) + len(self._city_names)
+
+    def _name(self, index: int) -> str:
+        start, end = self._name_offsets[index], self._name_offsets[index + 1]
+        return bytes(self._names_blob[start:end]).decode("utf-8")
+
+    def _city_key_at(self, index: int) -> bytes:
+        start, end = self._city_key_offsets[index], self._city_key_offsets[index + 1]
+        return bytes(self._city_keys_blob[start:end])
+
+    def _count(self, result: Optional[tuple]) -> Optional[tuple[str, float, float]]:
+        with self._lock:
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return result
+
+    def lookup_zip(self, zip_code: str) -> Optional[tuple[str, float, float]]:
+        code = int(zip_code)
+        index = bisect_left(self._zip_codes, code)
+        if index < len(self._zip_codes) and self._zip_codes[index] == code:
+            return self._count(
+                (
+                    self._name(self._zip_names[index]),
+                    self._zip_lats[index],
+                    self._zip_lons[index],
+                )
+            )
+        return self._count(None)
+
+    def lookup_city_state(
+        self, city: str, state: str
+    ) -> Optional[tuple[str, float, float]]:
+        key = _city_key(city, state)
+        low, high = 0, len(self._city_names)
+        while low < high:
+            middle = (low + high) // 2
+            if self._city_key_at(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(self._city_names) and self._city_key_at(low) == key:
+            return self._count(
+                (
+                    self._name(self._city_names[low]),
+                    self._city_lats[low],
+                    self._city_lons[low],
+                )
+            )
+        return self._count(None)
+
+    def resolve(self, path: str, params: dict) -> Optional[tuple[str, float, float]]:
+        """Answer the API query described by `path` and `params`, None on a miss"""
+        if "zip" in params:
+            return self.lookup_zip(params["zip"].split(",")[0])
+        city, state, *_ = params["q"].split(",")
+        return self.lookup_city_state(city, state)
+
+    def close(self) -> None:
+        for section in vars(self).values():
+            if isinstance(section, memoryview):
+                section.release()
+        self._mmap.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Builds a binary gazetteer index from a zip,city,state,lat,lon CSV"
+    )
+    parser.add_argument("csv_path", help="Gazetteer CSV with a header row")
+    parser.add_argument("index_path", help="Where to write the binary index")
+    args = parser.parse_args()
+    zip_count, city_count = build_index(args.csv_path, args.index_path)
+    print(f"Wrote {zip_count} zip codes and {city_count} cities to {args.index_path}")
+
+
+if __name__ == "__main__":
+    main()
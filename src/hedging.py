@@ -0,0 +1,86 @@
+import math
+import threading
+from collections import deque
+from typing import Optional
+
+from src.config import (
+    HEDGE_MAX_RATIO,
+    HEDGE_MIN_DELAY,
+    HEDGE_MIN_SAMPLES,
+    HEDGE_PERCENTILE,
+    HEDGE_WINDOW,
+)
+
+
+class HedgePolicy:
+    """
+    Decides when a request has run long enough to send a duplicate of it, the
+    first response of the two is used.  The delay is the `percentile` of the
+    latest `window` request latencies, so only the slow tail is hedged, and at
+    most `max_ratio` of the requests are, so a degraded API does not get twice
+    the load.  Nothing is hedged before `min_samples` latencies were seen.
+
+    Thread safe, share one policy between instances to pool their latencies.
+    """
+
+    def __init__(
+        self,
+        percentile: float = HEDGE_PERCENTILE,
+        window: int = HEDGE_WINDOW,
+        min_samples: int = HEDGE_MIN_SAMPLES,
+        min_delay: float = HEDGE_MIN_DELAY,
+        max_ratio: float = HEDGE_MAX_RATIO,
+    ) -> None:
+        if not 0 < percentile <= 100:
+            raise ValueError("percentile must be within (0, 100]")
+        if window < 1 or min_samples < 1:
+            raise ValueError("window and min_samples must be at least 1")
+        self.percentile = percentile
+        self.min_samples = min(min_samples, window)
+        self.min_delay = min_delay
+        self.max_ratio = max_ratio
+        self._latencies: deque[float] = deque(maxlen=window)
+        self._delay: Optional[float] = None
+        # Latencies recorded since the delay was last computed
+        self._stale = 0
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.hedged = 0
+        self.hedges_won = 0
+
+    def record(self, seconds: float) -> None:
+        """Latency of a request that got a response"""
+        with self._lock:
+            self._latencies.append(seconds)
+            self.requests += 1
+            self._stale += 1
+
+    def delay(self) -> Optional[float]:
+        """Seconds after which a request is hedged, None while there are too few samples"""
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return None
+            # Sorting the window costs a few microseconds, don't do it on every request
+            if self._delay is None or self._stale >= max(1, len(self._latencies) // 16):
+                ordered = sorted(self._latencies)
+                index = math.ceil(self.percentile / 100 * len(ordered)) - 1
+                self._delay = max(self.min_delay, ordered[max(0, index)])
+                self._stale = 0
+            return self._delay
+
+    def try_hedge(self) -> bool:
+        """Whether a late request may be hedged now, counts it when it may"""
+        with self._lock:
+            if self.hedged >= self.max_ratio * max(self.requests, self.min_samples):
+                return False
+            self.hedged += 1
+            return True
+
+    def release(self) -> None:
+        """A hedge allowed by `try_hedge` was not sent, gives its budget back"""
+        with self._lock:
+            self.hedged -= 1
+
+    def on_hedge_won(self) -> None:
+        with self._lock:
+            self.hedges_won += 1
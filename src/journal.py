@@ -0,0 +1,87 @@
+import json
+import os
+import threading
+from typing import Optional
+
+# `(place or None, error messages)` of one finished lookup
+Outcome = tuple[Optional[tuple[str, float, float]], list[str]]
+
+
+class Journal:
+    """
+    Append-only NDJSON checkpoint of finished lookups.  Every answer is written (and
+    flushed) as soon as its lookup completes, so a batch that is interrupted or
+    fails can be resumed without repeating any of them.
+
+    Only answers are recorded: a place, or the errors that make up an answer (not
+    found).  Lookups that failed (rate limit, connection, API key) are left out and
+    looked up again on resume, so are invalid terms, which never reach the API.
+    """
+
+    def __init__(self, path: str, resume: bool = False) -> None:
+        """
+        Args:
+            path: Journal file, created if missing
+            resume: Load the answers already in the file and append to it, instead
+                of starting a new journal
+        """
+        self.path = path
+        self._entries: dict[str, Outcome] = {}
+        self._lock = threading.Lock()
+        if resume and os.path.exists(path):
+            self._load()
+        self._file = open(path, "a" if resume else "w", encoding="utf-8")
+
+    def _load(self) -> None:
+        with open(self.path, "rb") as fp:
+            data = fp.read()
+        # A line cut short by a crash is dropped, the lookup is simply done again
+        complete = data[: data.rfind(b"\n") + 1]
+        if len(complete) != len(data):
+            with open(self.path, "r+b") as fp:
+                fp.truncate(len(complete))
+        for line in complete.decode("utf-8").splitlines():
+            entry = json.loads(line)
+            place = entry.get("place")
+            self._entries[entry["search_term"]] = (
+                tuple(place) if place is not None else None,
+                entry.get("errors", []),
+            )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, location: str) -> bool:
+        return location in self._entries
+
+    def get(self, location: str) -> Optional[Outcome]:
+        return self._entries.get(location)
+
+    def record(
+        self,
+        location: str,
+        place: Optional[tuple[str, float, float]],
+        errors: list[str],
+    ) -> None:
+        entry: dict[str, object] = {
+            "search_term": location,
+            "place": list(place) if place is not None else None,
+        }
+        if errors:
+            entry["errors"] = errors
+        line = json.dumps(entry) + "\n"
+        with self._lock:
+            self._entries[location] = (place, errors)
+            self._file.write(line)
+            self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+    def __enter__(self) -> "Journal":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,314 @@
+import json
+import math
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (
+    0.001,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    math.inf,
+)
+
+
+@dataclass(slots=True)
+class LookupEvent:
+    """One search term resolved (or not) by `GeoLocationData`"""
+
+    location: str
+    seconds: float
+    found: bool
+
+
+@dataclass(slots=True)
+class RequestEvent:
+    """
+    One HTTP attempt.  `status_code` is None when the request itself failed, in
+    which case `error` names the exception.  `server_seconds` is the time until the
+    response headers arrived (connect included) when the transport reports it.
+    `hedge` is set on the duplicate of a slow request, see `HedgePolicy`.
+    """
+
+    path: str
+    location: str
+    status_code: Optional[int]
+    seconds: float
+    retry: bool
+    error: Optional[str] = None
+    server_seconds: Optional[float] = None
+    hedge: bool = False
+
+
+class Observer:
+    """
+    Receives instrumentation events from `GeoLocationData(observer=...)`.  Override
+    only the hooks you need.  Hooks run on the thread doing the lookup, so they
+    must be quick and thread safe.
+    """
+
+    def on_lookup(self, event: LookupEvent) -> None:
+        pass
+
+    def on_request_start(self, path: str) -> None:
+        pass
+
+    def on_request(self, event: RequestEvent) -> None:
+        pass
+
+    def on_parse(self, seconds: float) -> None:
+        pass
+
+    def on_cache(self, tier: str, hit: bool) -> None:
+        pass
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "count", "sum")
+
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th quantile"""
+        if not self.count:
+            return 0.0
+        rank, seen = q * self.count, 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return self.buckets[-1]
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "buckets": {
+                _label(bound): count for bound, count in zip(self.buckets, self.counts)
+            },
+        }
+
+
+def _label(bound: float) -> str:
+    return "+Inf" if bound == math.inf else repr(bound)
+
+
+def _finite(value: float) -> Optional[float]:
+    """JSON has no infinity, None stands for `beyond the last bucket`"""
+    return None if value == math.inf else value
+
+
+def _p95_text(p95: Optional[float]) -> str:
+    return f"> {LATENCY_BUCKETS[-2]:g} s" if p95 is None else f"<= {p95 * 1000:g} ms"
+
+
+class Metrics(Observer):
+    """
+    Observer that aggregates the events into counters, gauges and histograms and
+    exports them as a JSON-able `snapshot()`, Prometheus text or a short summary.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.lookups = Histogram()
+        self.lookups_found = 0
+        self.requests = Histogram()
+        self.server = Histogram()
+        self.parse = Histogram()
+        self.statuses: dict[str, int] = {}
+        self.retries = 0
+        self.hedges = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.cache: dict[str, dict[str, int]] = {}
+
+    def on_lookup(self, event: LookupEvent) -> None:
+        with self._lock:
+            self.lookups.observe(event.seconds)
+            self.lookups_found += event.found
+
+    def on_request_start(self, path: str) -> None:
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def on_request(self, event: RequestEvent) -> None:
+        if event.status_code is not None:
+            status = str(event.status_code)
+        else:
+            status = event.error or "error"
+        with self._lock:
+            self.in_flight -= 1
+            self.requests.observe(event.seconds)
+            if event.server_seconds is not None:
+                self.server.observe(event.server_seconds)
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+            self.retries += event.retry
+            self.hedges += event.hedge
+
+    def on_parse(self, seconds: float) -> None:
+        with self._lock:
+            self.parse.observe(seconds)
+
+    def on_cache(self, tier: str, hit: bool) -> None:
+        with self._lock:
+            counts = self.cache.setdefault(tier, {"hit": 0, "miss": 0})
+            counts["hit" if hit else "miss"] += 1
+
+    def cache_hit_rate(self) -> float:
+        """Share of lookups answered by any cache tier"""
+        with self._lock:
+            hits = sum(counts["hit"] for counts in self.cache.values())
+            # Every cached lookup goes through the first tier, the busiest one
+            lookups = max(
+                (sum(counts.values()) for counts in self.cache.values()), default=0
+            )
+        return hits / lookups if lookups else 0.0
+
+    def snapshot(self) -> dict:
+        hit_rate = self.cache_hit_rate()
+        with self._lock:
+            return {
+                "lookups": {
+                    **self.lookups.to_dict(),
+                    "found": self.lookups_found,
+                    "p50": _finite(self.lookups.quantile(0.5)),
+                    "p95": _finite(self.lookups.quantile(0.95)),
+                },
+                "requests": {
+                    **self.requests.to_dict(),
+                    "statuses": dict(self.statuses),
+                    "retries": self.retries,
+                    "hedges": self.hedges,
+                    "in_flight": self.in_flight,
+                    "max_in_flight": self.max_in_flight,
+                },
+                "server_seconds": self.server.to_dict(),
+                "parse_seconds": self.parse.to_dict(),
+                "cache": {
+                    "hit_rate": round(hit_rate, 4),
+                    **{tier: dict(counts) for tier, counts in self.cache.items()},
+                },
+            }
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=4)
+
+    def to_prometheus(self, prefix: str = "geolocutil") -> str:
+        """Prometheus text exposition format"""
+        lines: list[str] = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            for suffix, labels, value in samples:
+                label_text = ",".join(f'{k}="{v}"' for k, v in labels.items())
+                label_text = f"{{{label_text}}}" if label_text else ""
+                lines.append(f"{prefix}_{name}{suffix}{label_text} {value}")
+
+        def histogram(name, help_text, data: Histogram):
+            samples: list[tuple[str, dict[str, str], float]] = []
+            cumulative = 0
+            for bound, count in zip(data.buckets, data.counts):
+                cumulative += count
+                samples.append(("_bucket", {"le": _label(bound)}, cumulative))
+            samples += [("_sum", {}, data.sum), ("_count", {}, data.count)]
+            metric(name, "histogram", help_text, samples)
+
+        with self._lock:
+            histogram("lookup_seconds", "Time to resolve a search term", self.lookups)
+            metric(
+                "lookups_found_total",
+                "counter",
+                "Search terms that resolved to a place",
+                [("", {}, self.lookups_found)],
+            )
+            histogram("request_seconds", "Duration of an HTTP attempt", self.requests)
+            histogram(
+                "server_seconds", "Time until the response headers arrived", self.server
+            )
+            histogram(
+                "parse_seconds", "Time spent decoding response bodies", self.parse
+            )
+            metric(
+                "requests_total",
+                "counter",
+                "HTTP attempts by status code or error",
+                [
+                    ("", {"status": status}, count)
+                    for status, count in self.statuses.items()
+                ],
+            )
+            metric(
+                "request_retries_total",
+                "counter",
+                "HTTP attempts that were retries",
+                [("", {}, self.retries)],
+            )
+            metric(
+                "request_hedges_total",
+                "counter",
+                "HTTP attempts that duplicated a slow request",
+                [("", {}, self.hedges)],
+            )
+            metric(
+                "requests_in_flight",
+                "gauge",
+                "HTTP requests currently running",
+                [("", {}, self.in_flight)],
+            )
+            metric(
+                "cache_requests_total",
+                "counter",
+                "Cache lookups by tier and result",
+                [
+                    ("", {"tier": tier, "result": result}, count)
+                    for tier, counts in self.cache.items()
+                    for result, count in counts.items()
+                ],
+            )
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> str:
+        """A few human readable lines, as printed by `geolocutil.py --stats`"""
+        snapshot = self.snapshot()
+        lookups, requests = snapshot["lookups"], snapshot["requests"]
+        mean = lookups["sum"] / lookups["count"] * 1000 if lookups["count"] else 0.0
+        request_mean = (
+            requests["sum"] / requests["count"] * 1000 if requests["count"] else 0.0
+        )
+        statuses = ", ".join(
+            f"{status}: {count}" for status, count in requests["statuses"].items()
+        )
+        return "\n".join(
+            (
+                f"lookups: {lookups['count']} ({lookups['found']} found), "
+                f"mean {mean:.1f} ms, p95 {_p95_text(lookups['p95'])}",
+                f"api requests: {requests['count']} ({statuses or 'none'}), "
+                f"{requests['retries']} retries, {requests['hedges']} hedges, mean {request_mean:.1f} ms, "
+                f"max in flight {requests['max_in_flight']}",
+                f"cache hit rate: {snapshot['cache']['hit_rate']:.1%}",
+            )
+        )
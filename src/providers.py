@@ -0,0 +1,98 @@
+"""
+Geocoding API backends.
+
+A `Provider` says where a query goes (`request`) and how to read the answer
+(`parse`).  `GeoLocationData(providers=[...])` asks them in order after its
+local index and caches missed, and moves on to the next provider when one does
+not know a place or fails (connection error, timeout, open circuit, rate limit
+after its retries).  Every provider has its own rate limit, concurrency limit,
+circuit breaker and transport, e.g. a free API first and the paid one for what
+it misses:
+
+    GeoLocationData(providers=[OtherGeocoder(rate_limit=600), OpenWeatherMap(rate_limit=60)])
+
+Retries, timeouts, hedging and deadlines are the client's and apply to each of
+them.
+"""
+
+import threading
+from abc import ABC, abstractmethod
+from typing import Optional, Union
+
+from src import config
+from src.circuit_breaker import CircuitBreaker
+from src.config import BASE_URL, DIRECT_PATH, REVERSE_PATH, ZIP_PATH
+from src.rate_limiter import TokenBucket
+
+
+class Provider(ABC):
+    """
+    Base class of the API backends.  Subclasses set `name` and `paths` (the query
+    kinds they answer: ZIP_PATH, DIRECT_PATH, REVERSE_PATH) and implement
+    `request` and `parse`.
+    """
+
+    name = "provider"
+    paths = frozenset((ZIP_PATH, DIRECT_PATH, REVERSE_PATH))
+
+    def __init__(
+        self,
+        rate_limit: Union[float, TokenBucket, None] = None,
+        max_concurrency: Optional[int] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        transport=None,
+    ) -> None:
+        """
+        Args:
+            rate_limit: Calls per minute allowed by this API (or a shared
+                TokenBucket), None for no limit
+            max_concurrency: Most requests to this API in flight at once, over
+                all the client's workers.  None leaves it to max_workers.
+            circuit_breaker: Skips this API while it keeps failing, see
+                CircuitBreaker
+            transport: `requests.Session` compatible object for this API (an
+                async one for `AsyncGeoLocationData`), None uses the client's
+        """
+        if max_concurrency is not None and max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        if isinstance(rate_limit, TokenBucket):
+            self.rate_limiter: Optional[TokenBucket] = rate_limit
+        else:
+            self.rate_limiter = TokenBucket(rate_limit) if rate_limit else None
+        self.max_concurrency = max_concurrency
+        self.slots = (
+            threading.BoundedSemaphore(max_concurrency) if max_concurrency else None
+        )
+        self.circuit_breaker = circuit_breaker
+        self.transport = transport
+
+    @abstractmethod
+    def request(self, path: str, params: dict) -> tuple[str, dict]:
+        """The URL and query parameters to GET for a query of `classify`"""
+
+    @abstractmethod
+    def parse(self, data) -> Optional[tuple[str, float, float]]:
+        """`(name, lat, lon)` from the decoded JSON of a 200, None when nothing was found"""
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.name!r})"
+
+
+class OpenWeatherMap(Provider):
+    """The OpenWeatherMap geocoding API, keyed by `config.API_KEY`"""
+
+    name = "openweathermap"
+
+    def __init__(self, base_url: str = BASE_URL, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.base_url = base_url
+
+    def request(self, path: str, params: dict) -> tuple[str, dict]:
+        return self.base_url + path, {**params, "appid": config.API_KEY, "limit": 1}
+
+    def parse(self, data) -> Optional[tuple[str, float, float]]:
+        if not data:
+            return None
+        if isinstance(data, list):
+            data = data[0]
+        return data["name"], data["lat"], data["lon"]
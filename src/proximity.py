@@ -0,0 +1,266 @@
+"""
+Batch distance computations over geocoded results.
+
+`Points` holds the coordinates of a batch in contiguous float64 arrays and every
+operation works through them block by block, so memory use is bounded by
+PROXIMITY_BLOCK_SIZE rather than by the size of the input.  NumPy is used when it
+is installed (`pip install numpy`); without it the same functions fall back to
+plain Python loops over `array.array` buffers.
+"""
+
+import array
+import math
+from itertools import islice
+from typing import TYPE_CHECKING, Iterable, Iterator, Optional, Sequence, Union
+
+from src.config import PROXIMITY_BLOCK_SIZE
+from src.spatial import EARTH_RADIUS_KM, haversine_km
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised when NumPy is missing
+    np = None  # type: ignore[assignment]
+
+if TYPE_CHECKING:
+    from numpy.typing import NDArray
+
+# Coordinates and indices come back as NumPy arrays with NumPy, array.array without
+Floats = Union[Sequence[float], "NDArray[np.float64]"]
+Indices = Union[Sequence[int], "NDArray[np.intp]"]
+
+
+class Points:
+    """
+    Latitudes and longitudes (degrees) of a batch in two contiguous float64 arrays:
+    NumPy arrays when NumPy is available, `array.array("d")` otherwise.  Any
+    buffer of float64 works as input, including `numpy.memmap` for batches larger
+    than memory.
+    """
+
+    __slots__ = ("lats", "lons", "names")
+
+    def __init__(
+        self,
+        lats: Floats,
+        lons: Floats,
+        names: Optional[list[str]] = None,
+    ) -> None:
+        if np is not None:
+            self.lats = np.ascontiguousarray(lats, dtype=np.float64)
+            self.lons = np.ascontiguousarray(lons, dtype=np.float64)
+        else:
+            self.lats = array.array("d", lats)
+            self.lons = array.array("d", lons)
+        if len(self.lats) != len(self.lons):
+            raise ValueError("lats and lons must have the same length")
+        self.names = names
+
+    def __len__(self) -> int:
+        return len(self.lats)
+
+    def __getitem__(self, item: slice) -> "Points":
+        if not isinstance(item, slice):
+            raise TypeError("Points only support slicing")
+        return Points(
+            self.lats[item],
+            self.lons[item],
+            self.names[item] if self.names is not None else None,
+        )
+
+    @classmethod
+    def from_results(cls, results: Iterable) -> "Points":
+        """Anything with `name`, `lat` and `lon` attributes, e.g. GeoResults"""
+        names: list[str] = []
+        lats, lons = array.array("d"), array.array("d")
+        for result in results:
+            names.append(result.name)
+            lats.append(result.lat)
+            lons.append(result.lon)
+        return cls(lats, lons, names)
+
+    @classmethod
+    def iter_chunks(cls, results: Iterable, chunk_size: int) -> Iterator["Points"]:
+        """Split a stream of results, e.g. `iter_geoloc_data`, into Points batches"""
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        results = iter(results)
+        while chunk := list(islice(results, chunk_size)):
+            yield cls.from_results(chunk)
+
+
+def _haversine(lat1, lon1, lat2, lon2):
+    """Vectorized haversine in km over NumPy arrays that broadcast together"""
+    lat1, lon1, lat2, lon2 = (np.radians(value) for value in (lat1, lon1, lat2, lon2))
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def _blocks(length: int, size: int) -> Iterator[tuple[int, int]]:
+    for start in range(0, length, size):
+        yield start, min(start + size, length)
+
+
+def distance_matrix(
+    points: Points,
+    others: Optional[Points] = None,
+    out=None,
+    block_size: int = PROXIMITY_BLOCK_SIZE,
+):
+    """
+    Distances in km between every point and every other point (`points` itself by
+    default).  With NumPy this is a `len(points) x len(others)` array filled a few
+    rows at a time; pass `out` (e.g. a `numpy.memmap`) when it does not fit in
+    memory.  Without NumPy it is a list of `array.array("d")` rows.
+    """
+    others = points if others is None else others
+    if np is None:
+        return [
+            array.array(
+                "d",
+                (
+                    haversine_km(lat, lon, other_lat, other_lon)
+                    for other_lat, other_lon in zip(others.lats, others.lons)
+                ),
+            )
+            for lat, lon in zip(points.lats, points.lons)
+        ]
+
+    if out is None:
+        out = np.empty((len(points), len(others)), dtype=np.float64)
+    rows = max(1, block_size // max(1, len(others)))
+    for start, stop in _blocks(len(points), rows):
+        out[start:stop] = _haversine(
+            points.lats[start:stop, None],
+            points.lons[start:stop, None],
+            others.lats[None, :],
+            others.lons[None, :],
+        )
+    return out
+
+
+def nearest(
+    points: Points, targets: Points, block_size: int = PROXIMITY_BLOCK_SIZE
+) -> tuple[Indices, Floats]:
+    """
+    Index of the closest target for every point and its distance in km, as two
+    arrays aligned with `points`.  Both sides are processed in blocks so the
+    temporaries never exceed block_size distances.
+    """
+    if len(targets) == 0:
+        raise ValueError("targets must not be empty")
+
+    if np is None:
+        indices, distances = array.array("q"), array.array("d")
+        for lat, lon in zip(points.lats, points.lons):
+            best_index, best_distance = 0, math.inf
+            for index, (target_lat, target_lon) in enumerate(
+                zip(targets.lats, targets.lons)
+            ):
+                distance = haversine_km(lat, lon, target_lat, target_lon)
+                if distance < best_distance:
+                    best_index, best_distance = index, distance
+            indices.append(best_index)
+            distances.append(best_distance)
+        return indices, distances
+
+    columns = min(len(targets), block_size)
+    rows = max(1, block_size // columns)
+    indices = np.empty(len(points), dtype=np.intp)
+    distances = np.empty(len(points), dtype=np.float64)
+    for start, stop in _blocks(len(points), rows):
+        best_index = np.zeros(stop - start, dtype=np.intp)
+        best_distance = np.full(stop - start, np.inf)
+        for column_start, column_stop in _blocks(len(targets), columns):
+            block = _haversine(
+                points.lats[start:stop, None],
+                points.lons[start:stop, None],
+                targets.lats[None, column_start:column_stop],
+                targets.lons[None, column_start:column_stop],
+            )
+            block_index = block.argmin(axis=1)
+            block_distance = block[np.arange(stop - start), block_index]
+            closer = block_distance < best_distance
+            best_index[closer] = block_index[closer] + column_start
+            best_distance[closer] = block_distance[closer]
+        indices[start:stop] = best_index
+        distances[start:stop] = best_distance
+    return indices, distances
+
+
+def within_radius(
+    points: Points,
+    lat: float,
+    lon: float,
+    radius_km: float,
+    block_size: int = PROXIMITY_BLOCK_SIZE,
+) -> Indices:
+    """Indices of the points at most radius_km away from `(lat, lon)`"""
+    if np is None:
+        return array.array(
+            "q",
+            (
+                index
+                for index, (point_lat, point_lon) in enumerate(
+                    zip(points.lats, points.lons)
+                )
+                if haversine_km(lat, lon, point_lat, point_lon) <= radius_km
+            ),
+        )
+
+    matches = [
+        np.flatnonzero(
+            _haversine(lat, lon, points.lats[start:stop], points.lons[start:stop])
+            <= radius_km
+        )
+        + start
+        for start, stop in _blocks(len(points), block_size)
+    ]
+    return np.concatenate(matches) if matches else np.empty(0, dtype=np.intp)
+
+
+def within_bbox(
+    points: Points,
+    south: float,
+    west: float,
+    north: float,
+    east: float,
+    block_size: int = PROXIMITY_BLOCK_SIZE,
+) -> Indices:
+    """
+    Indices of the points inside a bounding box.  A box whose west edge is greater
+    than its east edge crosses the antimeridian.
+    """
+    crosses_antimeridian = west > east
+
+    def in_box(point_lat: float, point_lon: float) -> bool:
+        if not south <= point_lat <= north:
+            return False
+        if crosses_antimeridian:
+            return point_lon >= west or point_lon <= east
+        return west <= point_lon <= east
+
+    if np is None:
+        return array.array(
+            "q",
+            (
+                index
+                for index, (point_lat, point_lon) in enumerate(
+                    zip(points.lats, points.lons)
+                )
+                if in_box(point_lat, point_lon)
+            ),
+        )
+
+    matches = []
+    for start, stop in _blocks(len(points), block_size):
+        lats, lons = points.lats[start:stop], points.lons[start:stop]
+        mask = (lats >= south) & (lats <= north)
+        if crosses_antimeridian:
+            mask &= (lons >= west) | (lons <= east)
+        else:
+            mask &= (lons >= west) & (lons <= east)
+        matches.append(np.flatnonzero(mask) + start)
+    return np.concatenate(matches) if matches else np.empty(0, dtype=np.intp)
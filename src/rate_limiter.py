@@ -0,0 +1,183 @@
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+from src.config import BACKOFF_BASE, BACKOFF_CAP
+
+
+class TokenBucket:
+    """
+    Thread safe token bucket sized in calls per minute, matching how the API plans
+    are sold.  It adapts to the server: every 429 halves the rate, every successful
+    call adds back a twentieth of the configured rate (AIMD), so a batch settles
+    on the highest rate the API actually accepts.
+    """
+
+    def __init__(
+        self,
+        rate_per_minute: float,
+        capacity: Optional[float] = None,
+        min_rate_per_minute: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        """
+        Args:
+            rate_per_minute: Calls per minute allowed by the plan
+            capacity: Largest burst allowed, defaults to one minute worth of calls
+            min_rate_per_minute: Floor the rate never drops below when throttled
+        """
+        if rate_per_minute <= 0:
+            raise ValueError("rate_per_minute must be positive")
+        self.max_rate_per_minute = rate_per_minute
+        self.min_rate_per_minute = min(min_rate_per_minute, rate_per_minute)
+        self.capacity = capacity or rate_per_minute
+        self._rate_per_minute = rate_per_minute
+        self._tokens = self.capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._updated_at = clock()
+        self._lock = threading.Lock()
+        self.throttled = 0
+
+    @property
+    def rate_per_minute(self) -> float:
+        return self._rate_per_minute
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated_at
+        self._updated_at = now
+        self._tokens = min(
+            self.capacity, self._tokens + elapsed * self._rate_per_minute / 60
+        )
+
+    def reserve(self) -> float:
+        """Take a token and return how many seconds to wait before using it"""
+        with self._lock:
+            self._refill(self._clock())
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens * 60 / self._rate_per_minute
+
+    def try_reserve(self, max_wait: float) -> Optional[float]:
+        """
+        Like `reserve`, but only takes the token when the wait is at most max_wait.
+        Returns the wait, or None when the token was left in the bucket.
+        """
+        with self._lock:
+            self._refill(self._clock())
+            wait = max(0.0, (1 - self._tokens) * 60 / self._rate_per_minute)
+            if wait > max_wait:
+                return None
+            self._tokens -= 1
+            return wait
+
+    def acquire(self) -> float:
+        """Block until a call is allowed, returns the time spent waiting"""
+        wait = self.reserve()
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+    def on_success(self) -> None:
+        with self._lock:
+            self._rate_per_minute = min(
+                self.max_rate_per_minute,
+                self._rate_per_minute + self.max_rate_per_minute / 20,
+            )
+
+    def on_throttled(self) -> None:
+        with self._lock:
+            self._refill(self._clock())
+            self._rate_per_minute = max(
+                self.min_rate_per_minute, self._rate_per_minute / 2
+            )
+            self._tokens = min(self._tokens, 0.0)
+            self.throttled += 1
+
+
+def _shared(index: int, cast: Callable = float) -> property:
+    def get(self):
+        return cast(self._state[index])
+
+    def set(self, value) -> None:
+        self._state[index] = value
+
+    return property(get, set)
+
+
+class SharedTokenBucket(TokenBucket):
+    """
+    TokenBucket whose budget is shared by several processes, e.g. the workers of
+    `src.batch`.  The tokens, the adapted rate and the throttle count live in
+    shared memory behind a process lock, so a 429 seen by one worker slows all of
+    them down.  Create it in the parent and pass it to the workers when they start
+    (`ProcessPoolExecutor(initargs=...)`), it can't be sent to a running process.
+    """
+
+    _tokens = _shared(0)
+    _updated_at = _shared(1)
+    _rate_per_minute = _shared(2)
+    throttled = _shared(3, int)
+
+    def __init__(
+        self,
+        rate_per_minute: float,
+        capacity: Optional[float] = None,
+        min_rate_per_minute: float = 1.0,
+        context=None,
+    ) -> None:
+        """
+        Args:
+            rate_per_minute: Calls per minute allowed by the plan, for all processes
+            capacity: Largest burst allowed, defaults to one minute worth of calls
+            min_rate_per_minute: Floor the rate never drops below when throttled
+            context: multiprocessing context the workers are started with
+        """
+        import multiprocessing
+
+        context = context or multiprocessing.get_context()
+        # time.monotonic is system wide, so every process refills from the same clock
+        self._state = context.RawArray("d", 4)
+        super().__init__(rate_per_minute, capacity, min_rate_per_minute)
+        self._lock = context.Lock()
+
+
+def parse_retry_after(value) -> Optional[float]:
+    """Seconds to wait from a Retry-After header, given in seconds or as an HTTP date"""
+    if not isinstance(value, str):
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    # HTTP dates are rare, don't load the email package for every run
+    from email.utils import parsedate_to_datetime
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def backoff_delay(
+    attempt: int,
+    retry_after: Optional[float] = None,
+    base: float = BACKOFF_BASE,
+    cap: float = BACKOFF_CAP,
+) -> float:
+    """
+    Exponential backoff with jitter for the given (0 based) retry attempt.  A server
+    supplied Retry-After is treated as the minimum wait.
+    """
+    ceiling = min(cap, base * 2**attempt)
+    delay = ceiling / 2 + random.uniform(0, ceiling / 2)
+    if retry_after is not None:
+        delay = max(delay, retry_after + random.uniform(0, base))
+    return delay
@@ -0,0 +1,97 @@
+import array
+import io
+from typing import IO, Iterable, Iterator, Optional, Union, overload
+
+from src.GeoLocationData import GeoResult
+from src.serializers import write_json
+
+
+class GeoResultSet:
+    """
+    Column oriented store for large batches of GeoResults.  Coordinates live in two
+    float64 arrays, place names are stored once and referenced by index (a batch
+    of zip codes maps to far fewer places), and search terms are packed in one
+    UTF-8 buffer addressed by offsets.  A row costs a few dozen bytes instead of a
+    full object; GeoResults are only built when a row is read.
+    """
+
+    __slots__ = (
+        "lats",
+        "lons",
+        "_names",
+        "_name_ids",
+        "_name_index",
+        "_terms",
+        "_term_offsets",
+    )
+
+    def __init__(self, results: Iterable[GeoResult] = ()) -> None:
+        self.lats = array.array("d")
+        self.lons = array.array("d")
+        self._names: list[str] = []
+        self._name_ids: dict[str, int] = {}
+        self._name_index = array.array("I")
+        self._terms = bytearray()
+        self._term_offsets = array.array("Q", [0])
+        self.extend(results)
+
+    def __len__(self) -> int:
+        return len(self.lats)
+
+    def append(self, result: GeoResult) -> None:
+        name_id = self._name_ids.get(result.name)
+        if name_id is None:
+            name_id = self._name_ids[result.name] = len(self._names)
+            self._names.append(result.name)
+        self._name_index.append(name_id)
+        self._terms += result.search_term.encode("utf-8")
+        self._term_offsets.append(len(self._terms))
+        self.lats.append(result.lat)
+        self.lons.append(result.lon)
+
+    def extend(self, results: Iterable[GeoResult]) -> None:
+        """Add results one at a time, so a generator is never held in memory"""
+        for result in results:
+            self.append(result)
+
+    def name(self, index: int) -> str:
+        return self._names[self._name_index[index]]
+
+    def search_term(self, index: int) -> str:
+        index = range(len(self))[index]
+        start, stop = self._term_offsets[index], self._term_offsets[index + 1]
+        return self._terms[start:stop].decode("utf-8")
+
+    @overload
+    def __getitem__(self, index: int) -> GeoResult: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[GeoResult]: ...
+
+    def __getitem__(
+        self, index: Union[int, slice]
+    ) -> Union[GeoResult, list[GeoResult]]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(len(self))[index]]
+        index = range(len(self))[index]
+        return GeoResult(
+            name=self.name(index),
+            lat=self.lats[index],
+            lon=self.lons[index],
+            search_term=self.search_term(index),
+        )
+
+    def __iter__(self) -> Iterator[GeoResult]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def write_json(
+        self, fp: IO[str], indent: Optional[int] = None, ensure_ascii: bool = True
+    ) -> None:
+        """Same output as `json.dumps` of the equivalent list of objects, streamed"""
+        write_json(self, fp, indent, ensure_ascii)
+
+    def to_json(self, indent: Optional[int] = None, ensure_ascii: bool = True) -> str:
+        buffer = io.StringIO()
+        self.write_json(buffer, indent, ensure_ascii)
+        return buffer.getvalue()
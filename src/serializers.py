@@ -0,0 +1,223 @@
+"""
+Streaming writers for geolocation results.
+
+Every writer takes any iterable of GeoResults (a list, a GeoResultSet or the
+`iter_geoloc_data` generator) and writes each row as soon as it gets it, so the
+whole document is never built in memory.  Rows are formatted with precomputed
+templates and the C string escapers of the json module rather than through a
+dict per row.
+"""
+
+from __future__ import annotations
+
+import array
+import csv
+import struct
+import sys
+from itertools import accumulate, islice
+from json.encoder import encode_basestring, encode_basestring_ascii
+from typing import IO, TYPE_CHECKING, Callable, Iterable, Iterator, Optional
+
+if TYPE_CHECKING:
+    from src.GeoLocationData import GeoResult
+
+FORMATS = ("json", "compact", "ndjson", "csv", "binary")
+CSV_HEADER = ("search_term", "name", "lat", "lon")
+
+# Binary layout: BINARY_MAGIC, then row groups of up to ROW_GROUP_SIZE rows, each
+# a `<III` header (rows, distinct names, search term bytes) followed by the
+# columns: lats f64, lons f64, name ids u32, search term offsets u64 (rows + 1),
+# name lengths u32, name bytes, search term bytes.  A group of 0 rows ends the file.
+BINARY_MAGIC = b"GEOC\x01\x00"
+ROW_GROUP_SIZE = 65536
+_ROW_GROUP = struct.Struct("<III")
+
+
+def _row_formatter(
+    indent: Optional[int], ensure_ascii: bool, compact: bool
+) -> Callable[[GeoResult], str]:
+    """One JSON object per result, byte for byte what `json.dumps` would write"""
+    encode = encode_basestring_ascii if ensure_ascii else encode_basestring
+    if indent is not None:
+        outer, inner = " " * indent, " " * indent * 2
+        return lambda r: (
+            f'{outer}{{\n{inner}"search_term": {encode(r.search_term)},\n'
+            f'{inner}"name": {encode(r.name)},\n'
+            f'{inner}"lat": {r.lat!r},\n{inner}"lon": {r.lon!r}\n{outer}}}'
+        )
+    if compact:
+        return lambda r: (
+            f'{{"search_term":{encode(r.search_term)},"name":{encode(r.name)},'
+            f'"lat":{r.lat!r},"lon":{r.lon!r}}}'
+        )
+    return lambda r: (
+        f'{{"search_term": {encode(r.search_term)}, "name": {encode(r.name)}, '
+        f'"lat": {r.lat!r}, "lon": {r.lon!r}}}'
+    )
+
+
+def write_json(
+    results: Iterable[GeoResult],
+    fp: IO[str],
+    indent: Optional[int] = None,
+    ensure_ascii: bool = True,
+    compact: bool = False,
+) -> int:
+    """Write a JSON array, `compact` drops the optional whitespace.  Returns the row count."""
+    format_row = _row_formatter(indent, ensure_ascii, compact and indent is None)
+    if indent is not None:
+        opening, separator, closing = "[\n", ",\n", "\n]"
+    else:
+        opening, separator, closing = "[", "," if compact else ", ", "]"
+
+    count = 0
+    for result in results:
+        fp.write((separator if count else opening) + format_row(result))
+        count += 1
+    fp.write(closing if count else "[]")
+    return count
+
+
+def write_ndjson(
+    results: Iterable[GeoResult],
+    fp: IO[str],
+    ensure_ascii: bool = True,
+    flush: bool = False,
+) -> int:
+    """One JSON object per line, `flush` pushes every line out for live pipelines"""
+    format_row = _row_formatter(None, ensure_ascii, False)
+    count = 0
+    for result in results:
+        fp.write(format_row(result) + "\n")
+        if flush:
+            fp.flush()
+        count += 1
+    return count
+
+
+def write_csv(results: Iterable[GeoResult], fp: IO[str]) -> int:
+    writer = csv.writer(fp, lineterminator="\n")
+    writer.writerow(CSV_HEADER)
+    count = 0
+    for result in results:
+        writer.writerow((result.search_term, result.name, result.lat, result.lon))
+        count += 1
+    return count
+
+
+def _encode_row_group(group: list[GeoResult]) -> bytes:
+    names: dict[str, int] = {}
+    name_ids = array.array("I", (names.setdefault(r.name, len(names)) for r in group))
+    lats = array.array("d", (r.lat for r in group))
+    lons = array.array("d", (r.lon for r in group))
+    terms = [r.search_term.encode("utf-8") for r in group]
+    term_offsets = array.array("Q", accumulate(map(len, terms), initial=0))
+    encoded_names = [name.encode("utf-8") for name in names]
+    name_lengths = array.array("I", map(len, encoded_names))
+
+    columns = (lats, lons, name_ids, term_offsets, name_lengths)
+    if sys.byteorder == "big":
+        for column in columns:
+            column.byteswap()
+    return b"".join(
+        (
+            _ROW_GROUP.pack(len(group), len(names), term_offsets[-1]),
+            *(column.tobytes() for column in columns),
+            *encoded_names,
+            *terms,
+        )
+    )
+
+
+def write_binary(
+    results: Iterable[GeoResult],
+    fp: IO[bytes],
+    row_group_size: int = ROW_GROUP_SIZE,
+) -> int:
+    """Columnar binary, see BINARY_MAGIC for the layout and `iter_binary` to read it back"""
+    fp.write(BINARY_MAGIC)
+    results = iter(results)
+    count = 0
+    while group := list(islice(results, row_group_size)):
+        fp.write(_encode_row_group(group))
+        count += len(group)
+    fp.write(_ROW_GROUP.pack(0, 0, 0))
+    return count
+
+
+def _read_exactly(fp: IO[bytes], size: int) -> bytes:
+    data = fp.read(size)
+    if len(data) != size:
+        raise ValueError("Truncated geolocation binary file")
+    return data
+
+
+def _read_column(fp: IO[bytes], typecode: str, length: int) -> array.array:
+    column = array.array(typecode)
+    column.frombytes(_read_exactly(fp, length * column.itemsize))
+    if sys.byteorder == "big":
+        column.byteswap()
+    return column
+
+
+def _split(blob: bytes, lengths: Iterable[int]) -> list[str]:
+    offsets = list(accumulate(lengths, initial=0))
+    return [
+        blob[start:stop].decode("utf-8") for start, stop in zip(offsets, offsets[1:])
+    ]
+
+
+def iter_binary(fp: IO[bytes]) -> Iterator[GeoResult]:
+    """Read back a file written by `write_binary`, one row group in memory at a time"""
+    # Imported here so that writing (e.g. the CLI) doesn't load the client for `--help`
+    from src.GeoLocationData import GeoResult
+
+    if fp.read(len(BINARY_MAGIC)) != BINARY_MAGIC:
+        raise ValueError("Not a geolocation binary file")
+    while True:
+        rows, name_count, terms_size = _ROW_GROUP.unpack(
+            _read_exactly(fp, _ROW_GROUP.size)
+        )
+        if rows == 0:
+            return
+        lats = _read_column(fp, "d", rows)
+        lons = _read_column(fp, "d", rows)
+        name_ids = _read_column(fp, "I", rows)
+        term_offsets = _read_column(fp, "Q", rows + 1)
+        name_lengths = _read_column(fp, "I", name_count)
+        names = _split(_read_exactly(fp, sum(name_lengths)), name_lengths)
+        terms = _read_exactly(fp, terms_size)
+        for index in range(rows):
+            yield GeoResult(
+                name=names[name_ids[index]],
+                lat=lats[index],
+                lon=lons[index],
+                search_term=terms[term_offsets[index] : term_offsets[index + 1]].decode(
+                    "utf-8"
+                ),
+            )
+
+
+def write_results(
+    output_format: str,
+    results: Iterable[GeoResult],
+    fp: IO,
+    ensure_ascii: bool = True,
+    flush: bool = False,
+) -> int:
+    """
+    Write results in one of FORMATS.  `json` is indented like the CLI always
+    printed it, `binary` needs a file opened in binary mode.
+    """
+    match output_format:
+        case "json":
+            return write_json(results, fp, indent=4, ensure_ascii=ensure_ascii)
+        case "compact":
+            return write_json(results, fp, ensure_ascii=ensure_ascii, compact=True)
+        case "ndjson":
+            return write_ndjson(results, fp, ensure_ascii, flush)
+        case "csv":
+            return write_csv(results, fp)
+        case "binary":
+            return write_binary(results, fp)
+    raise ValueError(f"Unknown output format `{output_format}`, use one of {FORMATS}")
@@ -0,0 +1,344 @@
+"""
+Long running lookup daemon.
+
+Keeps one warm `GeoLocationData` (pooled connections, memory, disk and
+gazetteer lookups) and serves it over HTTP on a TCP port or a Unix socket, one
+thread per connection:
+
+    GET  /lookup?q=90210&q=Miami,+FL   -> {"results": [...], "errors": [...], ...}
+    POST /batch {"locations": [...]}   -> {"results": [...], "errors": [...], ...}
+    GET  /health                       -> {"status": "ok", "errors": {kind: count}, "circuits": {...}}
+    GET  /metrics                      -> Prometheus text
+
+Results are `{search_term, name, lat, lon}` objects in input order, errors
+`{search_term, message}`.  When a lookup fails (rate limit, connection, API
+key) the answers so far are still returned, with the locations left in
+`unfinished` and the error in `failure`, see `get_geoloc_batch`.  Start it with
+
+    python -m src.server --listen 127.0.0.1:8765 --workers 8
+    python -m src.server --listen unix:/tmp/geolocutil.sock
+
+and point `geolocutil.py --server` (or $GEOLOC_SERVER) at the same address.
+SIGTERM or Ctrl-C stop accepting connections, let running requests finish and
+close the caches.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn, UnixStreamServer
+from typing import Optional, Union
+from urllib.parse import parse_qs, urlsplit
+
+from src import config
+from src.client import UNIX_PREFIX, parse_address
+from src.config import SERVER_IDLE_TIMEOUT, SERVER_LISTEN, SERVER_MAX_BATCH
+from src.GeoLocationData import GeoLocationData, GeoLocationError
+from src.metrics import Metrics
+
+
+class BadRequest(ValueError):
+    """Raised for a malformed request, answered with a 400"""
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: Union["_TCPServer", "_UnixServer"]
+    protocol_version = "HTTP/1.1"
+    # One write per response, a separate write for the body would wait on delayed ACKs
+    wbufsize = -1
+    # Idle keep-alive connections are dropped after this long, which also bounds shutdown
+    timeout = SERVER_IDLE_TIMEOUT
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+    def _send(self, status: int, body: Union[dict, str]) -> None:
+        if isinstance(body, str):
+            payload, content_type = body.encode("utf-8"), "text/plain; version=0.0.4"
+        else:
+            payload, content_type = json.dumps(body).encode("utf-8"), "application/json"
+        if self.server.service.stopping:
+            self.close_connection = True
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError as e:
+            raise BadRequest(f"Invalid JSON body: {e}") from e
+        if not isinstance(body, dict):
+            raise BadRequest("The body must be a JSON object")
+        return body
+
+    def _answer(self, route) -> None:
+        try:
+            status, body = route()
+        except BadRequest as e:
+            status, body = 400, {"error": str(e)}
+        except (GeoLocationError, TimeoutError) as e:
+            status, body = 502, {"error": str(e)}
+        self._send(status, body)
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        service = self.server.service
+        match url.path:
+            case "/lookup":
+                locations = parse_qs(url.query).get("q", [])
+                self._answer(lambda: (200, service.lookup(locations)))
+            case "/health":
+                self._answer(lambda: (200, service.health()))
+            case "/metrics" if service.metrics is not None:
+                self._answer(lambda: (200, service.metrics.to_prometheus()))
+            case _:
+                self._send(404, {"error": f"Unknown path `{url.path}`"})
+
+    def do_POST(self) -> None:
+        url = urlsplit(self.path)
+        if url.path != "/batch":
+            # The body is left unread, don't try to parse another request after it
+            self.close_connection = True
+            return self._send(404, {"error": f"Unknown path `{url.path}`"})
+        service = self.server.service
+        self._answer(lambda: (200, service.lookup(self._read_json().get("locations"))))
+
+
+class _TCPHandler(_Handler):
+    # Unix sockets have no Nagle algorithm to disable
+    disable_nagle_algorithm = True
+
+
+class _TCPServer(ThreadingMixIn, HTTPServer):
+    # Non daemon threads: server_close() waits for the requests still running
+    daemon_threads = False
+    request_queue_size = 128
+
+    def __init__(self, address: tuple[str, int], service: "LookupService") -> None:
+        super().__init__(address, _TCPHandler)
+        self.service = service
+
+
+class _UnixServer(ThreadingMixIn, UnixStreamServer):
+    daemon_threads = False
+    request_queue_size = 128
+
+    def __init__(self, path: str, service: "LookupService") -> None:
+        if os.path.exists(path):
+            # Left behind by a server that did not shut down cleanly
+            os.unlink(path)
+        super().__init__(path, _Handler)
+        self.path = path
+        self.service = service
+
+    def server_close(self) -> None:
+        super().server_close()
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self.path)
+
+
+class LookupService:
+    """What the request handlers share: the client, its metrics and the server state"""
+
+    def __init__(
+        self, geolocation: GeoLocationData, metrics: Optional[Metrics]
+    ) -> None:
+        self.geolocation = geolocation
+        self.metrics = metrics
+        self.started = time.time()
+        self.stopping = False
+
+    def lookup(self, locations) -> dict:
+        if not isinstance(locations, list) or not all(
+            isinstance(l, str) for l in locations
+        ):
+            raise BadRequest("`locations` must be a list of strings")
+        if len(locations) > SERVER_MAX_BATCH:
+            raise BadRequest(f"At most {SERVER_MAX_BATCH} locations per request")
+
+        # The errors come from the batch, which collects those of its own lookups.
+        # The shared error log is bounded and feeds the counts of /health.
+        batch = self.geolocation.get_geoloc_batch(locations)
+        return {
+            "results": [
+                {
+                    "search_term": r.search_term,
+                    "name": r.name,
+                    "lat": r.lat,
+                    "lon": r.lon,
+                }
+                for r in batch.results
+            ],
+            "errors": [
+                {"search_term": e.search_term, "message": e.message}
+                for e in batch.errors
+            ],
+            "unfinished": batch.unfinished,
+            "failure": batch.failure,
+        }
+
+    def health(self) -> dict:
+        health: dict[str, object] = {
+            "status": "stopping" if self.stopping else "ok",
+            "uptime": round(time.time() - self.started, 3),
+        }
+        if self.metrics is not None:
+            health["cache_hit_rate"] = round(self.metrics.cache_hit_rate(), 4)
+        health["errors"] = self.geolocation.error_log.counts
+        circuits = {
+            provider.name: provider.circuit_breaker.snapshot()
+            for provider in self.geolocation.providers
+            if provider.circuit_breaker is not None
+        }
+        if circuits:
+            health["circuits"] = circuits
+            if not self.stopping and any(
+                c["state"] != "closed" for c in circuits.values()
+            ):
+                health["status"] = "degraded"
+        return health
+
+
+class GeoLocationServer:
+    """
+    Serves `geolocation` on `address` (`host:port`, port 0 picks a free one, or
+    `unix:/path`).  `serve_forever` blocks, `start` serves from a background
+    thread, and `shutdown` finishes the running requests before it returns.
+    `/metrics` reports `metrics`, by default the client's observer when it is
+    a `Metrics`.
+    """
+
+    def __init__(
+        self,
+        geolocation: GeoLocationData,
+        address: str = SERVER_LISTEN,
+        metrics: Optional[Metrics] = None,
+    ) -> None:
+        if metrics is None and isinstance(geolocation.observer, Metrics):
+            metrics = geolocation.observer
+        self.service = LookupService(geolocation, metrics)
+        target = parse_address(address)
+        self._server: Union[_TCPServer, _UnixServer]
+        if isinstance(target, str):
+            self._server = _UnixServer(target, self.service)
+        else:
+            self._server = _TCPServer(target, self.service)
+        self._thread: Optional[threading.Thread] = None
+        self._shutdown_lock = threading.Lock()
+        self._stopped = False
+
+    @property
+    def address(self) -> str:
+        if isinstance(self._server, _UnixServer):
+            return UNIX_PREFIX + self._server.path
+        host, port = self._server.server_address[:2]
+        return f"{host!s}:{port}"
+
+    def serve_forever(self) -> None:
+        self._server.serve_forever()
+
+    def start(self) -> "GeoLocationServer":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def shutdown(self) -> None:
+        """
+        Stop accepting connections and wait for the running requests.  Must not be
+        called from the thread running `serve_forever`.  Calling it again, also from
+        another thread, returns once the first call has finished.
+        """
+        with self._shutdown_lock:
+            if self._stopped:
+                return
+            self.service.stopping = True
+            self._server.shutdown()
+            self._server.server_close()
+            if self._thread is not None:
+                self._thread.join()
+                self._thread = None
+            self._stopped = True
+
+    def __enter__(self) -> "GeoLocationServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.shutdown()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Serves geolocation lookups from one warm process"
+    )
+    parser.add_argument(
+        "--listen",
+        default=SERVER_LISTEN,
+        help=f"`host:port` or `unix:/path` (default: {SERVER_LISTEN})",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=8,
+        help="Lookups run at once per batch request (default: 8)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Bypasses the on-disk cache of previous lookups",
+    )
+    parser.add_argument(
+        "--cache-path",
+        help="Location of the on-disk cache (default: $GEOLOC_CACHE_PATH or ~/.cache/geolocutil)",
+    )
+    args = parser.parse_args()
+
+    from src.circuit_breaker import CircuitBreaker
+    from src.disk_cache import DiskCache
+    from src.gazetteer import Gazetteer
+
+    disk_cache = None if args.no_cache else DiskCache(args.cache_path)
+    resolver = Gazetteer(config.GAZETTEER_PATH) if config.GAZETTEER_PATH else None
+    metrics = Metrics()
+    geolocation = GeoLocationData(
+        max_workers=args.workers,
+        disk_cache=disk_cache,
+        resolver=resolver,
+        observer=metrics,
+        # A daemon outlives API outages, answer from expired entries meanwhile
+        circuit_breaker=CircuitBreaker(serve_stale=True),
+    )
+    server = GeoLocationServer(geolocation, args.listen, metrics)
+
+    def stop(signum, frame) -> None:
+        # shutdown() waits for serve_forever to return, so it can't run on this thread
+        threading.Thread(target=server.shutdown).start()
+
+    signal.signal(signal.SIGTERM, stop)
+    print(f"Serving geolocation lookups on {server.address}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # Wait for the requests still running before their client goes away
+        server.shutdown()
+        geolocation.close()
+        if disk_cache is not None:
+            disk_cache.close()
+    print(metrics.summary(), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import math
+import threading
+from collections import defaultdict
+from typing import Iterable, Optional
+
+from src.config import REVERSE_INDEX_CELL_DEGREES, REVERSE_INDEX_MAX_DISTANCE_KM
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great circle distance between two points in kilometers"""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def as_float_list(values: Iterable) -> list[float]:
+    """Plain floats from any sequence of numbers, NumPy arrays included"""
+    if hasattr(values, "tolist"):
+        values = values.tolist()
+    return [float(value) for value in values]
+
+
+class SpatialIndex:
+    """
+    Grid index over known places for nearest place queries.  The globe is split into
+    square cells of `cell_degrees`; a query only scans the cells that can hold a
+    place within `max_distance_km`, so lookups stay cheap however many places are
+    indexed.  Cell columns wrap around at the antimeridian, a query near 180°
+    longitude also finds places on the other side of it.  Places can be added at
+    any time and duplicates are ignored.
+    """
+
+    def __init__(
+        self,
+        cell_degrees: float = REVERSE_INDEX_CELL_DEGREES,
+        max_distance_km: float = REVERSE_INDEX_MAX_DISTANCE_KM,
+    ) -> None:
+        if cell_degrees <= 0:
+            raise ValueError("cell_degrees must be positive")
+        self.cell_degrees = cell_degrees
+        self.max_distance_km = max_distance_km
+        # Columns of cells around the globe, the last one is narrower when
+        # cell_degrees does not divide 360
+        self._columns = math.ceil(360 / cell_degrees)
+        self._cells: defaultdict[tuple[int, int], set[tuple[str, float, float]]] = (
+            defaultdict(set)
+        )
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _cell(self, lat: float, lon: float) -> tuple[int, int]:
+        return (
+            math.floor(lat / self.cell_degrees),
+            math.floor((lon + 180) / self.cell_degrees) % self._columns,
+        )
+
+    def add(self, name: str, lat: float, lon: float) -> None:
+        place = (name, lat, lon)
+        with self._lock:
+            cell = self._cells[self._cell(lat, lon)]
+            if place not in cell:
+                cell.add(place)
+                self._size += 1
+
+    def extend(self, places: Iterable) -> None:
+        """Add anything with `name`, `lat` and `lon` attributes, e.g. GeoResults"""
+        for place in places:
+            self.add(place.name, place.lat, place.lon)
+
+    def nearest(
+        self, lat: float, lon: float, max_distance_km: Optional[float] = None
+    ) -> Optional[tuple[str, float, float]]:
+        """Closest indexed place within max_distance_km, None if there is none"""
+        max_distance_km = (
+            self.max_distance_km if max_distance_km is None else max_distance_km
+        )
+        lat_cells = math.ceil(max_distance_km / KM_PER_DEGREE / self.cell_degrees)
+        lat_cell, lon_cell = self._cell(lat, lon)
+        far_lat = abs(lat) + max_distance_km / KM_PER_DEGREE
+        if far_lat >= 90:
+            # The window reaches a pole, where every column meets
+            columns = set(range(self._columns))
+        else:
+            # Longitude degrees shrink towards the poles, size the window for the
+            # widest latitude it reaches
+            cos_lat = math.cos(math.radians(far_lat))
+            lon_cells = math.ceil(
+                max_distance_km / (KM_PER_DEGREE * cos_lat) / self.cell_degrees
+            )
+            if self._columns * self.cell_degrees != 360:
+                # The narrower last column may sit between the query and the place
+                lon_cells += 1
+            # Scanned once each, however wide the window
+            columns = {
+                (lon_cell + d_lon) % self._columns
+                for d_lon in range(-lon_cells, lon_cells + 1)
+            }
+
+        best, best_distance = None, max_distance_km
+        with self._lock:
+            for d_lat in range(-lat_cells, lat_cells + 1):
+                for column in columns:
+                    cell = self._cells.get((lat_cell + d_lat, column))
+                    if not cell:
+                        continue
+                    for place in cell:
+                        distance = haversine_km(lat, lon, place[1], place[2])
+                        if distance <= best_distance:
+                            best, best_distance = place, distance
+            if best is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return best
@@ -2,6 +2,7 @@ import unittest
 import subprocess
 import json
 import os
+import tempfile
 from tests.values import geoloc_util_location, SKIPPED_MESSAGE
 
 
@@ -12,10 +13,18 @@ class BaseTestClass(unittest.TestCase):
 
     @staticmethod
     def get_stdout_output(*query):
-        process = subprocess.Popen(
-            ["python", geoloc_util_location, *query], stdout=subprocess.PIPE
-        )
-        stdout, stderr = process.communicate()
+        # Every run gets an empty on-disk cache, never the user's
+        with tempfile.TemporaryDirectory() as cache_dir:
+            env = {
+                **os.environ,
+                "GEOLOC_CACHE_PATH": os.path.join(cache_dir, "geocode.sqlite3"),
+            }
+            process = subprocess.Popen(
+                ["python", geoloc_util_location, *query],
+                stdout=subprocess.PIPE,
+                env=env,
+            )
+            stdout, stderr = process.communicate()
         return_code = process.returncode
         stdout = stdout.decode("utf-8")
         return stdout, stderr, return_code
@@ -0,0 +1,186 @@
+import asyncio
+import os
+import tempfile
+import threading
+import unittest
+import requests
+from src.AsyncGeoLocationData import AsyncGeoLocationData, BufferedResponse
+from src.disk_cache import DiskCache
+from src.GeoLocationData import ConnectionError, RateLimitError, UnauthorizedError
+
+
+class FakeAsyncTransport:
+    """Answers every zip lookup with the zip code as the place name"""
+
+    def __init__(self, status_code=200, delays=None, side_effect=None):
+        self.status_code = status_code
+        self.delays = delays or {}
+        self.side_effect = side_effect
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.calls = 0
+        self.closed = False
+
+    async def get(self, url, params, timeout):
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            key = params.get("zip", params.get("q", "")).split(",")[0]
+            await asyncio.sleep(self.delays.get(key, 0.001))
+            if self.side_effect is not None:
+                effect = self.side_effect.pop(0)
+                if isinstance(effect, Exception):
+                    raise effect
+            body = f'{{"name": "{key}", "lat": 1.5, "lon": -2.5}}'
+            if self.status_code != 200:
+                body = '{"message": "nope"}'
+            return BufferedResponse(self.status_code, body, url)
+        finally:
+            self.in_flight -= 1
+
+    async def close(self):
+        self.closed = True
+
+
+class TestAsyncGeoLocationData(unittest.IsolatedAsyncioTestCase):
+
+    async def test_results_keep_input_order(self):
+        locations = [f"{n:05d}" for n in range(10000, 10050)]
+        transport = FakeAsyncTransport()
+        geo = AsyncGeoLocationData(transport=transport)
+
+        results = await geo(locations)
+
+        self.assertEqual([r.search_term for r in results], locations)
+        self.assertEqual(results[0].lat, 1.5)
+
+    async def test_concurrency_limit_is_respected(self):
+        locations = [f"{n:05d}" for n in range(10000, 10200)]
+        transport = FakeAsyncTransport()
+        geo = AsyncGeoLocationData(max_concurrency=7, transport=transport)
+
+        await geo.get_geoloc_data(locations)
+
+        self.assertEqual(transport.calls, 200)
+        self.assertEqual(transport.max_in_flight, 7)
+
+    async def test_iter_yields_in_completion_order(self):
+        transport = FakeAsyncTransport(delays={"10001": 0.05, "10002": 0.001})
+        geo = AsyncGeoLocationData(transport=transport)
+
+        terms = [r.search_term async for r in geo.iter_geoloc_data(["10001", "10002"])]
+
+        self.assertEqual(terms, ["10002", "10001"])
+
+    async def test_invalid_format_and_not_found(self):
+        geo = AsyncGeoLocationData(transport=FakeAsyncTransport(status_code=404))
+
+        results = await geo(["InvalidLocation", "10001"])
+
+        self.assertEqual(results, [])
+        self.assertEqual(len(geo.errors), 2)
+        self.assertIn("INVALID FORMAT", geo.errors[0])
+        self.assertIn("NOTFOUND", geo.errors[1])
+
+    async def test_error_taxonomy_matches_sync_client(self):
+        for status_code, error in ((429, RateLimitError), (401, UnauthorizedError)):
+            geo = AsyncGeoLocationData(
+                transport=FakeAsyncTransport(status_code=status_code),
+                rate_limit_retries=0,
+            )
+            with self.assertRaises(error):
+                await geo("10001")
+
+        transport = FakeAsyncTransport(
+            side_effect=[requests.ConnectionError("Connection failed")]
+        )
+        with self.assertRaises(ConnectionError):
+            await AsyncGeoLocationData(transport=transport)("10001")
+
+    async def test_read_timeout_with_retry(self):
+        transport = FakeAsyncTransport(
+            side_effect=[requests.ReadTimeout("Read timed out"), None]
+        )
+        results = await AsyncGeoLocationData(transport=transport)("10001")
+
+        self.assertEqual(len(results), 1)
+        self.assertEqual(transport.calls, 2)
+
+    async def test_context_manager_closes_transport(self):
+        transport = FakeAsyncTransport()
+        async with AsyncGeoLocationData(transport=transport) as geo:
+            await geo("10001")
+        self.assertTrue(transport.closed)
+        self.assertFalse(hasattr(geo, "__exit__"))
+
+    async def test_batch_keeps_what_was_answered_before_a_failure(self):
+        transport = FakeAsyncTransport(
+            delays={"10001": 0.001, "10002": 0.02, "10003": 1},
+            side_effect=[None, requests.ConnectionError("Connection failed")],
+        )
+        geo = AsyncGeoLocationData(transport=transport)
+
+        batch = await geo.get_geoloc_batch(["10001", "bad", "10002", "10003"])
+
+        self.assertEqual([r.search_term for r in batch.results], ["10001"])
+        self.assertEqual(batch.unfinished, ["10002", "10003"])
+        self.assertIn("CONNECTION ERROR", batch.failure)
+        self.assertIn("INVALID FORMAT", batch.errors[0].message)
+        self.assertIn("NOT ATTEMPTED", batch.errors[-1].message)
+
+    async def test_reverse_geocode_many(self):
+        transport = FakeAsyncTransport()
+        geo = AsyncGeoLocationData(transport=transport)
+
+        results = await geo.reverse_geocode_many([1.0, 1.0, 95.0], [2.0, 2.0, 0.0])
+
+        self.assertEqual(
+            [r.search_term if r else None for r in results],
+            ["1.0,2.0", "1.0,2.0", None],
+        )
+        self.assertEqual(transport.calls, 1)
+        self.assertIsNone(await geo.reverse_geocode(95.0, 0.0))
+
+    async def test_gazetteer_is_read_off_the_event_loop(self):
+        threads = []
+
+        class Resolver:
+            def resolve(self, path, params):
+                threads.append(threading.get_ident())
+                return ("Beverly Hills", 34.09, -118.41)
+
+        transport = FakeAsyncTransport()
+        geo = AsyncGeoLocationData(transport=transport, resolver=Resolver())
+
+        results = await geo("90210")
+
+        self.assertEqual(results[0].name, "Beverly Hills")
+        self.assertNotIn(threading.get_ident(), threads)
+        self.assertEqual(transport.calls, 0)
+
+    async def test_disk_cache_is_used_off_the_event_loop(self):
+        threads = []
+
+        class RecordingDiskCache(DiskCache):
+            def get(self, key, stale=False):
+                threads.append(threading.get_ident())
+                return super().get(key, stale)
+
+            def _write(self, key, value, ttl):
+                threads.append(threading.get_ident())
+                super()._write(key, value, ttl)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "geocode.sqlite3")
+            with RecordingDiskCache(path) as disk_cache:
+                transport = FakeAsyncTransport()
+                geo = AsyncGeoLocationData(transport=transport, disk_cache=disk_cache)
+                await geo("90210")
+                fresh = AsyncGeoLocationData(transport=transport, disk_cache=disk_cache)
+                results = await fresh("90210")
+
+        self.assertEqual(results[0].name, "90210")
+        self.assertEqual(transport.calls, 1)
+        self.assertEqual(len(threads), 3)
+        self.assertNotIn(threading.get_ident(), threads)
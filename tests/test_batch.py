@@ -0,0 +1,94 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from benchmarks.mock_server import MockGeocodingServer
+from src.batch import (
+    WorkerOptions,
+    _prepare_job_dir,
+    part_path,
+    plan_shards,
+    read_shard,
+    run_batch,
+)
+from src.serializers import iter_binary
+
+LOCATIONS = [
+    f"{10000 + n}" if n % 2 else f"City {chr(97 + n % 26)}, NY" for n in range(120)
+]
+
+
+class TestBatch(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = MockGeocodingServer().start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.input = os.path.join(self.directory, "locations.txt")
+        with open(self.input, "w") as fp:
+            fp.write("\n".join(LOCATIONS[:60] + ["", "bad"] + LOCATIONS[60:]) + "\n")
+        self.output = os.path.join(self.directory, "results.ndjson")
+        self.options = WorkerOptions(threads=4, base_url=self.server.base_url)
+
+    def test_shards_cover_every_line_once(self):
+        shards = plan_shards(self.input, shard_bytes=100)
+        self.assertGreater(len(shards), 5)
+        lines = [line for shard in shards for line in read_shard(self.input, shard)]
+        self.assertEqual(lines, LOCATIONS[:60] + ["bad"] + LOCATIONS[60:])
+
+    def test_results_are_merged_in_input_order(self):
+        report = run_batch(
+            self.input, self.output, processes=2, options=self.options, shard_bytes=100
+        )
+        with open(self.output) as fp:
+            terms = [json.loads(line)["search_term"] for line in fp]
+        with open(self.output + ".errors.ndjson") as fp:
+            errors = [json.loads(line) for line in fp]
+
+        self.assertEqual(terms, LOCATIONS)
+        self.assertEqual([e["search_term"] for e in errors], ["bad"])
+        self.assertEqual((report.rows, report.errors, report.resumed), (120, 1, 0))
+        self.assertFalse(os.path.exists(self.output + ".parts"))
+
+    def test_finished_shards_are_not_looked_up_again(self):
+        shards = plan_shards(self.input, shard_bytes=100)
+        # Checkpoints as left behind by an interrupted run that finished shard 0
+        job_dir = self.output + ".parts"
+        _prepare_job_dir(job_dir, self.input, 100)
+        with open(part_path(job_dir, 0), "w") as fp:
+            fp.write(
+                '{"search_term": "cached", "name": "Checkpoint", "lat": 1.0, "lon": 2.0}\n'
+            )
+        open(part_path(job_dir, 0, errors=True), "w").close()
+
+        report = run_batch(
+            self.input,
+            self.output,
+            options=self.options,
+            output_format="binary",
+            shard_bytes=100,
+        )
+        with open(self.output, "rb") as fp:
+            rows = list(iter_binary(fp))
+
+        self.assertEqual(report.resumed, 1)
+        self.assertEqual(rows[0].name, "Checkpoint")
+        self.assertEqual(
+            len(rows), len(LOCATIONS) - len(list(read_shard(self.input, shards[0]))) + 1
+        )
+
+    def test_checkpoints_of_another_input_are_refused(self):
+        job_dir = self.output + ".parts"
+        os.makedirs(job_dir)
+        with open(os.path.join(job_dir, "manifest.json"), "w") as fp:
+            json.dump({"input": "other.txt"}, fp)
+        with self.assertRaises(ValueError):
+            run_batch(self.input, self.output, options=self.options)
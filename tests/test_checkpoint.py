@@ -0,0 +1,152 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import Mock
+from src.GeoLocationData import GeoLocationData
+from src.journal import Journal
+
+PLACE = {"name": "Beverly Hills", "lat": 34.0901, "lon": -118.4065}
+
+
+def _response(status_code, data=None):
+    return Mock(
+        status_code=status_code,
+        headers={},
+        json=lambda: data or {"message": "Invalid API key"},
+    )
+
+
+class TestJournal(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, "run.journal")
+
+    def test_answers_are_kept_across_runs(self):
+        with Journal(self.path) as journal:
+            journal.record("90210", ("Beverly Hills", 34.0901, -118.4065), [])
+            journal.record("00033", None, ["[NOTFOUND] - `00033`"])
+
+        with Journal(self.path, resume=True) as journal:
+            self.assertEqual(len(journal), 2)
+            self.assertEqual(
+                journal.get("90210"), (("Beverly Hills", 34.0901, -118.4065), [])
+            )
+            self.assertEqual(journal.get("00033"), (None, ["[NOTFOUND] - `00033`"]))
+
+        # Without resume the journal starts over
+        with Journal(self.path) as journal:
+            self.assertNotIn("90210", journal)
+
+    def test_a_line_cut_short_is_dropped(self):
+        with open(self.path, "w") as fp:
+            fp.write(
+                '{"search_term": "90210", "place": ["Beverly Hills", 34.0, -118.0]}\n{"search_te'
+            )
+
+        with Journal(self.path, resume=True) as journal:
+            journal.record("10001", ("New York", 40.7, -74.0), [])
+
+        with Journal(self.path, resume=True) as journal:
+            self.assertEqual(sorted(journal._entries), ["10001", "90210"])
+
+
+class TestGetGeolocBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, "run.journal")
+        self.transport = Mock()
+
+    def test_failure_keeps_partial_results_and_resume_finishes(self):
+        self.transport.get.side_effect = [
+            _response(200, PLACE),
+            _response(404),
+            _response(401),
+        ]
+        locations = ["90210", "00033", "10001", "90210", "60601", "bad"]
+        with Journal(self.path) as journal:
+            batch = GeoLocationData(transport=self.transport).get_geoloc_batch(
+                locations, journal
+            )
+
+        self.assertFalse(batch.complete)
+        self.assertEqual([r.search_term for r in batch.results], ["90210", "90210"])
+        # Invalid terms never reach the API, so they are answered despite the failure
+        self.assertEqual(batch.unfinished, ["10001", "60601"])
+        self.assertIn("UNAUTHORIZED", batch.failure)
+        self.assertEqual(
+            [(e.search_term, e.message[:12]) for e in batch.errors],
+            [
+                ("00033", "[NOTFOUND] -"),
+                ("10001", "[UNAUTHORIZE"),
+                ("60601", "[NOT ATTEMPT"),
+                ("bad", "[SKIPPED] - "),
+            ],
+        )
+
+        self.transport.get.reset_mock(side_effect=True)
+        self.transport.get.return_value = _response(200, PLACE)
+        with Journal(self.path, resume=True) as journal:
+            batch = GeoLocationData(transport=self.transport).get_geoloc_batch(
+                locations, journal
+            )
+
+        self.assertTrue(batch.complete)
+        self.assertEqual(
+            [r.search_term for r in batch.results], ["90210", "10001", "90210", "60601"]
+        )
+        self.assertEqual([e.search_term for e in batch.errors], ["00033", "bad"])
+        # Only the unfinished lookups that reach the API were made again
+        self.assertEqual(self.transport.get.call_count, 2)
+
+    def test_concurrent_batch_keeps_finished_lookups(self):
+        def get(url, params, timeout):
+            if params["zip"].startswith("10001"):
+                raise RuntimeError("boom")
+            return _response(200, PLACE)
+
+        self.transport.get.side_effect = get
+        geo = GeoLocationData(max_workers=4, transport=self.transport)
+
+        batch = geo.get_geoloc_batch(["90210", "10001", "60601"])
+
+        self.assertIn("[UNHANDLED EXCEPTION] - (RuntimeError) - boom", batch.failure)
+        self.assertIn("10001", batch.unfinished)
+        self.assertIn("90210", [r.search_term for r in batch.results])
+        self.assertEqual(geo.errors, [batch.failure])
+
+    def test_concurrent_batch_starts_no_lookup_after_a_failure(self):
+        running = threading.Event()
+
+        def get(url, params, timeout):
+            if params["zip"].startswith("10001"):
+                running.wait(5)
+                raise RuntimeError("boom")
+            running.set()
+            time.sleep(0.05)
+            return _response(200, PLACE)
+
+        self.transport.get.side_effect = get
+        geo = GeoLocationData(max_workers=2, transport=self.transport)
+
+        batch = geo.get_geoloc_batch(["10001", "90210", "60601", "94105", "73301"])
+
+        self.assertEqual([r.search_term for r in batch.results], ["90210"])
+        self.assertEqual(batch.unfinished, ["10001", "60601", "94105", "73301"])
+        self.assertEqual(self.transport.get.call_count, 2)
+
+    def test_complete_batch(self):
+        self.transport.get.return_value = _response(200, PLACE)
+        batch = GeoLocationData(transport=self.transport).get_geoloc_batch(
+            "'90210' '10001'"
+        )
+
+        self.assertTrue(batch.complete)
+        self.assertIsNone(batch.failure)
+        self.assertEqual(len(batch.results), 2)
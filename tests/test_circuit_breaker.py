@@ -0,0 +1,138 @@
+import unittest
+from unittest.mock import Mock
+import requests
+from src.circuit_breaker import CircuitBreaker
+from src.GeoLocationData import CircuitOpenError, GeoLocationData, GeoLocationError
+from tests.values import FOUND, FakeClock
+
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker(
+            failure_ratio=0.5,
+            window=4,
+            min_requests=4,
+            reset_timeout=10,
+            clock=self.clock,
+        )
+
+    def test_opens_at_the_failure_ratio(self):
+        self.breaker.on_success()
+        self.breaker.on_failure()
+        self.breaker.on_success()
+
+        self.assertEqual(self.breaker.state, "closed")
+        self.assertTrue(self.breaker.on_failure())
+        self.assertEqual(self.breaker.state, "open")
+        self.assertFalse(self.breaker.allow())
+        self.assertEqual(self.breaker.snapshot()["rejected"], 1)
+        self.assertEqual(self.breaker.snapshot()["retry_in"], 10)
+
+    def test_old_failures_leave_the_window(self):
+        for _ in range(2):
+            self.breaker.on_failure()
+            for _ in range(3):
+                self.breaker.on_success()
+
+        self.assertEqual(self.breaker.state, "closed")
+        self.assertEqual(self.breaker.snapshot()["failure_ratio"], 0.25)
+
+    def test_half_open_probe_closes_or_reopens(self):
+        for _ in range(4):
+            self.breaker.on_failure()
+        self.clock.now = 10
+
+        self.assertEqual(self.breaker.state, "half_open")
+        self.assertTrue(self.breaker.allow())
+        self.assertFalse(self.breaker.allow())
+        self.assertTrue(self.breaker.on_failure())
+        self.assertEqual(self.breaker.state, "open")
+
+        self.clock.now = 20
+        self.assertTrue(self.breaker.allow())
+        self.assertTrue(self.breaker.on_success())
+        self.assertEqual(self.breaker.state, "closed")
+        self.assertEqual(self.breaker.opened, 2)
+
+    def test_release_frees_the_probe(self):
+        for _ in range(4):
+            self.breaker.on_failure()
+        self.clock.now = 10
+
+        self.assertTrue(self.breaker.allow())
+        self.breaker.release()
+        self.assertTrue(self.breaker.allow())
+
+
+class TestCircuitBreakerInRequests(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker(
+            failure_ratio=1.0,
+            window=2,
+            min_requests=2,
+            reset_timeout=30,
+            clock=self.clock,
+        )
+        self.transport = Mock()
+
+    def test_batch_fails_fast_once_open(self):
+        self.transport.get.side_effect = requests.ConnectionError()
+        geo_locator = GeoLocationData(
+            transport=self.transport, circuit_breaker=self.breaker, rate_limit=None
+        )
+
+        for location in ("90210", "10001"):
+            with self.assertRaises(GeoLocationError):
+                geo_locator([location])
+        batch = geo_locator.get_geoloc_batch(["60601", "94105"])
+
+        self.assertEqual(self.transport.get.call_count, 2)
+        self.assertEqual(batch.unfinished, ["60601", "94105"])
+        self.assertIn("CIRCUIT OPEN", batch.failure)
+        self.assertEqual(geo_locator.error_log.counts, {"circuit_open": 1})
+
+    def test_server_errors_count_and_a_probe_recovers(self):
+        self.transport.get.return_value = Mock(
+            status_code=503, json=lambda: {}, url="u"
+        )
+        geo_locator = GeoLocationData(
+            transport=self.transport, circuit_breaker=self.breaker, cache_size=0
+        )
+        geo_locator(["90210", "10001"])
+        self.assertEqual(self.breaker.state, "open")
+        with self.assertRaises(CircuitOpenError):
+            geo_locator(["60601"])
+
+        self.clock.now = 30
+        self.transport.get.return_value = Mock(status_code=200, json=lambda: FOUND)
+        results = geo_locator(["60601"])
+
+        self.assertEqual(results[0].name, "Beverly Hills")
+        self.assertEqual(self.breaker.state, "closed")
+        self.assertEqual(self.transport.get.call_count, 3)
+
+    def test_open_circuit_serves_expired_results(self):
+        self.breaker.serve_stale, self.breaker.failure_ratio = True, 0.5
+        self.transport.get.return_value = Mock(status_code=200, json=lambda: FOUND)
+        geo_locator = GeoLocationData(
+            transport=self.transport, circuit_breaker=self.breaker, cache_ttl=0
+        )
+        geo_locator(["90210"])
+        self.transport.get.return_value = Mock(
+            status_code=500, json=lambda: {}, url="u"
+        )
+        geo_locator(["10001"])
+        self.assertEqual(self.breaker.state, "open")
+
+        results = geo_locator(["90210"])
+
+        self.assertEqual(results[0].name, "Beverly Hills")
+        self.assertEqual(self.transport.get.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+from unittest.mock import Mock
+from src.classify import classify, classify_locations, parse_locations
+from src.GeoLocationData import GeoLocationData
+
+
+class TestClassify(unittest.TestCase):
+
+    def test_one_pass_buckets_distinct_terms(self):
+        plan = classify_locations(
+            [
+                "90210",
+                "Miami, FL",
+                "bad",
+                "90210",
+                "Hagatna GU",
+                "Madison, ZZ",
+                "bad",
+                "9021",
+            ]
+        )
+
+        self.assertEqual(plan.zip_codes, ["90210"])
+        self.assertEqual(plan.cities, ["Miami, FL", "Hagatna GU"])
+        self.assertEqual(plan.invalid, ["bad", "Madison, ZZ", "9021"])
+        self.assertEqual(list(plan.queries), ["90210", "Miami, FL", "Hagatna GU"])
+
+    def test_state_codes_include_dc_and_territories(self):
+        for term in ("Washington, DC", "San Juan, PR", "Pago Pago, AS", "Saipan, mp"):
+            self.assertIsNotNone(classify(term), term)
+        for term in ("Toronto, ON", "Springfield, XX", "Miami, FLA"):
+            self.assertIsNone(classify(term), term)
+
+    def test_query_params_and_key(self):
+        query = classify("MIAMI , FL")
+
+        self.assertEqual(query.params, {"q": "MIAMI ,FL,US"})
+        self.assertEqual(query.key, "direct:miami,fl,us")
+
+    def test_parse_locations(self):
+        self.assertEqual(
+            parse_locations("'90210' \"Miami, FL\""), ["90210", "Miami, FL"]
+        )
+        self.assertEqual(parse_locations("Miami, FL"), ["Miami, FL"])
+
+
+class TestInvalidTermsSkipTheNetwork(unittest.TestCase):
+
+    def setUp(self):
+        self.transport = Mock()
+        self.transport.get.return_value = Mock(
+            status_code=200,
+            json=lambda: {"name": "Beverly Hills", "lat": 34.09, "lon": -118.41},
+        )
+
+    def test_get_geoloc_data(self):
+        geo_locator = GeoLocationData(max_workers=4, transport=self.transport)
+        terms = ["Madison, ZZ", "90210", "bad", "90210", "bad"]
+
+        results = geo_locator(terms)
+
+        self.assertEqual([r.search_term for r in results], ["90210", "90210"])
+        self.assertEqual(self.transport.get.call_count, 1)
+        self.assertEqual(len(geo_locator.errors), 2)
+        self.assertTrue(all("INVALID FORMAT" in e for e in geo_locator.errors))
+
+    def test_get_geoloc_batch(self):
+        batch = GeoLocationData(transport=self.transport).get_geoloc_batch(
+            ["bad", "90210"]
+        )
+
+        self.assertTrue(batch.complete)
+        self.assertEqual([e.search_term for e in batch.errors], ["bad"])
+        self.assertEqual(self.transport.get.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
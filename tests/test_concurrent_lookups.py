@@ -0,0 +1,60 @@
+import threading
+import unittest
+from unittest.mock import Mock
+from src.GeoLocationData import GeoLocationData, RateLimitError
+from tests.values import fake_get, fake_transport
+
+
+class TestConcurrentLookups(unittest.TestCase):
+    """Tests for the opt-in thread pool mode of GeoLocationData"""
+
+    def setUp(self):
+        self.transport = fake_transport(delay=0.01)
+        self.zip_codes = [f"{n:05d}" for n in range(10000, 10040)]
+
+    def test_invalid_max_workers(self):
+        with self.assertRaises(ValueError):
+            GeoLocationData(max_workers=0)
+
+    def test_results_keep_input_order(self):
+        geo_locator = GeoLocationData(max_workers=8, transport=self.transport)
+        results = geo_locator.get_geoloc_data(self.zip_codes)
+
+        self.assertEqual([r.search_term for r in results], self.zip_codes)
+        self.assertEqual([r.name for r in results], self.zip_codes)
+
+    def test_lookups_run_on_several_threads(self):
+        thread_ids = set()
+
+        def recording_get(*args, **kwargs):
+            thread_ids.add(threading.get_ident())
+            return fake_get(*args, delay=0.01, **kwargs)
+
+        self.transport.get.side_effect = recording_get
+        GeoLocationData(max_workers=4, transport=self.transport)(self.zip_codes)
+
+        self.assertGreater(len(thread_ids), 1)
+        self.assertLessEqual(len(thread_ids), 4)
+
+    def test_errors_are_attributed_to_their_own_location(self):
+        locations = ["00001", "10001", "00002", "bad input", "10002"]
+        geo_locator = GeoLocationData(max_workers=5, transport=self.transport)
+        results = geo_locator.get_geoloc_data(locations)
+
+        self.assertEqual([r.search_term for r in results], ["10001", "10002"])
+        errors = geo_locator.errors
+        self.assertEqual(len(errors), 3)
+        self.assertEqual(sum("00001" in e for e in errors), 1)
+        self.assertEqual(sum("00002" in e for e in errors), 1)
+        self.assertEqual(sum("INVALID FORMAT" in e for e in errors), 1)
+
+    def test_rate_limit_error_propagates(self):
+        self.transport.get.side_effect = None
+        self.transport.get.return_value = Mock(
+            status_code=429, json=lambda: {"message": "Rate limit exceeded"}
+        )
+        geo_locator = GeoLocationData(
+            max_workers=4, transport=self.transport, rate_limit_retries=0
+        )
+        with self.assertRaises(RateLimitError):
+            geo_locator(self.zip_codes)
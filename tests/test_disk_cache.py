@@ -0,0 +1,106 @@
+import multiprocessing
+import os
+import tempfile
+import unittest
+from unittest.mock import Mock
+from src.disk_cache import DiskCache
+from src.GeoLocationData import GeoLocationData
+from tests.values import FakeClock
+
+
+def _write_entries(path, worker):
+    with DiskCache(path) as disk_cache:
+        for n in range(200):
+            disk_cache.put(f"zip:{worker}-{n}", ("Somewhere", float(n), float(worker)))
+
+
+class TestDiskCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "nested", "geocode.sqlite3")
+        self.clock = FakeClock(1_000_000.0)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_values_survive_reopening(self):
+        with DiskCache(self.path) as disk_cache:
+            disk_cache.put("zip:10001,us", ("New York", 40.7484, -73.9967))
+            disk_cache.put_not_found("zip:00033,us")
+
+        with DiskCache(self.path) as disk_cache:
+            self.assertEqual(
+                disk_cache.get("zip:10001,us"), (True, ("New York", 40.7484, -73.9967))
+            )
+            self.assertEqual(disk_cache.get("zip:00033,us"), (True, None))
+            self.assertEqual(disk_cache.get("zip:99999,us"), (False, None))
+            self.assertEqual((disk_cache.hits, disk_cache.misses), (2, 1))
+
+    def test_ttl_and_negative_ttl(self):
+        with DiskCache(
+            self.path, ttl=100, negative_ttl=10, clock=self.clock
+        ) as disk_cache:
+            disk_cache.put("found", ("A", 1.0, 2.0))
+            disk_cache.put_not_found("missing")
+            self.clock.now += 10
+            self.assertEqual(disk_cache.get("missing"), (False, None))
+            self.assertEqual(disk_cache.get("found"), (True, ("A", 1.0, 2.0)))
+            self.clock.now += 90
+            self.assertEqual(disk_cache.get("found"), (False, None))
+
+    def test_compact_enforces_size_cap(self):
+        with DiskCache(self.path, max_entries=3, clock=self.clock) as disk_cache:
+            for n in range(5):
+                self.clock.now += 1
+                disk_cache.put(f"key{n}", ("A", 1.0, 2.0))
+
+            self.assertEqual(disk_cache.compact(), 2)
+            self.assertEqual(len(disk_cache), 3)
+            self.assertEqual(disk_cache.get("key0"), (False, None))
+            self.assertEqual(disk_cache.get("key4")[0], True)
+
+    def test_refresh_ignores_existing_entries(self):
+        with DiskCache(self.path) as disk_cache:
+            disk_cache.put("key", ("A", 1.0, 2.0))
+        with DiskCache(self.path, refresh=True) as disk_cache:
+            self.assertEqual(disk_cache.get("key"), (False, None))
+
+    def test_purge(self):
+        with DiskCache(self.path) as disk_cache:
+            disk_cache.put("key", ("A", 1.0, 2.0))
+            self.assertEqual(disk_cache.purge(), 1)
+            self.assertEqual(len(disk_cache), 0)
+
+    def test_several_processes_write_at_once(self):
+        DiskCache(self.path).close()
+        processes = [
+            multiprocessing.Process(target=_write_entries, args=(self.path, worker))
+            for worker in range(4)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+
+        self.assertTrue(all(process.exitcode == 0 for process in processes))
+        with DiskCache(self.path) as disk_cache:
+            self.assertEqual(len(disk_cache), 800)
+
+    def test_geo_location_data_reads_through_disk_cache(self):
+        transport = Mock()
+        transport.get.return_value = Mock(
+            status_code=200,
+            json=lambda: {"name": "New York", "lat": 40.7, "lon": -74.0},
+        )
+        with DiskCache(self.path) as disk_cache:
+            GeoLocationData(transport=transport, disk_cache=disk_cache)("10001")
+
+        with DiskCache(self.path) as disk_cache:
+            results = GeoLocationData(transport=transport, disk_cache=disk_cache)(
+                ["10001", "10001"]
+            )
+
+        self.assertEqual(transport.get.call_count, 1)
+        self.assertEqual([r.name for r in results], ["New York", "New York"])
+        self.assertEqual(results[0].lat, 40.7)
@@ -0,0 +1,84 @@
+import logging
+import unittest
+from unittest.mock import Mock
+from src.error_log import ErrorLog
+from src.GeoLocationData import GeoLocationData
+
+
+class CountingStr:
+    """Counts how often it is formatted"""
+
+    def __init__(self):
+        self.formatted = 0
+
+    def __str__(self):
+        self.formatted += 1
+        return "counted"
+
+
+class TestErrorLog(unittest.TestCase):
+
+    def test_oldest_records_are_dropped_counts_are_kept(self):
+        error_log = ErrorLog(max_size=3, clock=lambda: 42.0)
+        for n in range(4):
+            error_log.add("not_found", f"missing {n}", f"{n}")
+        error_log.extend("invalid_format", ["bad a", "bad b"], ["a", "b"])
+
+        self.assertEqual(error_log.messages(), ["missing 3", "bad a", "bad b"])
+        self.assertEqual(error_log.counts, {"not_found": 4, "invalid_format": 2})
+        self.assertEqual(error_log.dropped, 3)
+        self.assertEqual(error_log.records()[1].search_term, "a")
+        self.assertEqual(error_log.records()[1].time, 42.0)
+
+    def test_drain_forgets_the_messages_only(self):
+        error_log = ErrorLog()
+        error_log.add("rate_limit", "slow down")
+
+        self.assertEqual(error_log.drain(), ["slow down"])
+        self.assertEqual(len(error_log), 0)
+        self.assertEqual(error_log.counts, {"rate_limit": 1})
+
+
+class TestGeoLocationDataLogging(unittest.TestCase):
+
+    def setUp(self):
+        self.transport = Mock()
+        self.transport.get.return_value = Mock(status_code=404)
+
+    def test_errors_are_bounded_and_counted_per_kind(self):
+        geo_locator = GeoLocationData(transport=self.transport, max_errors=2)
+        geo_locator(["bad", "00033", "00034", "also bad"])
+
+        self.assertEqual(len(geo_locator.errors), 2)
+        self.assertEqual(
+            geo_locator.error_log.counts, {"invalid_format": 2, "not_found": 2}
+        )
+        self.assertEqual(
+            [r.search_term for r in geo_locator.error_log.records()], ["00033", "00034"]
+        )
+
+    def test_the_logger_gets_one_handler(self):
+        logger = logging.getLogger("src.GeoLocationData")
+        GeoLocationData()
+        handlers = list(logger.handlers)
+        GeoLocationData()
+        GeoLocationData()
+
+        self.assertEqual(len(handlers), 1)
+        self.assertEqual(logger.handlers, handlers)
+
+    def test_disabled_levels_are_not_formatted(self):
+        location = CountingStr()
+        geo_locator = GeoLocationData(transport=self.transport)
+        geo_locator._log(logging.DEBUG, "Processing locations: %s", location)
+        self.assertEqual(location.formatted, 0)
+
+        geo_locator._logger.setLevel(logging.DEBUG)
+        self.addCleanup(geo_locator._logger.setLevel, logging.CRITICAL)
+        with self.assertLogs(geo_locator._logger, logging.DEBUG):
+            geo_locator._log(logging.DEBUG, "Processing locations: %s", location)
+        self.assertEqual(location.formatted, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
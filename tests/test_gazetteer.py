@@ -0,0 +1,85 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import Mock
+from src.gazetteer import Gazetteer, build_index
+from src.GeoLocationData import GeoLocationData
+
+CSV_ROWS = """zip,city,state,lat,lon
+10001,New York,NY,40.7484,-73.9967
+10002,New York,NY,40.7152,-73.9877
+00501,Holtsville,NY,40.8154,-73.0451
+00901,Río Piedras,PR,18.4663,-66.1057
+53703,Madison,WI,43.0747,-89.3838
+,Los Angeles,CA,34.0536909,-118.242766
+"""
+
+
+class TestGazetteer(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        csv_path = os.path.join(self.tmp_dir.name, "gazetteer.csv")
+        self.index_path = os.path.join(self.tmp_dir.name, "gazetteer.idx")
+        with open(csv_path, "w", encoding="utf-8") as csv_file:
+            csv_file.write(CSV_ROWS)
+        self.counts = build_index(csv_path, self.index_path)
+        self.gazetteer = Gazetteer(self.index_path)
+
+    def tearDown(self):
+        self.gazetteer.close()
+        self.tmp_dir.cleanup()
+
+    def test_build_counts(self):
+        self.assertEqual(self.counts, (5, 5))
+        self.assertEqual(len(self.gazetteer), 10)
+
+    def test_lookup_zip(self):
+        self.assertEqual(
+            self.gazetteer.lookup_zip("00901"), ("Río Piedras", 18.4663, -66.1057)
+        )
+        self.assertEqual(
+            self.gazetteer.lookup_zip("10001"), ("New York", 40.7484, -73.9967)
+        )
+        self.assertIsNone(self.gazetteer.lookup_zip("99999"))
+        self.assertIsNone(self.gazetteer.lookup_zip("00000"))
+
+    def test_lookup_city_state_is_normalized(self):
+        name, lat, lon = self.gazetteer.lookup_city_state("NEW  york ", "ny")
+        self.assertEqual(name, "New York")
+        self.assertAlmostEqual(lat, (40.7484 + 40.7152) / 2)
+        self.assertAlmostEqual(lon, (-73.9967 + -73.9877) / 2)
+        self.assertEqual(
+            self.gazetteer.lookup_city_state("Los Angeles", "CA"),
+            ("Los Angeles", 34.0536909, -118.242766),
+        )
+        self.assertIsNone(self.gazetteer.lookup_city_state("Madison", "AL"))
+        self.assertEqual((self.gazetteer.hits, self.gazetteer.misses), (2, 1))
+
+    def test_rejects_other_files(self):
+        bad_path = os.path.join(self.tmp_dir.name, "bad.idx")
+        with open(bad_path, "wb") as bad_file:
+            bad_file.write(b"\0" * 64)
+        with self.assertRaises(ValueError):
+            Gazetteer(bad_path)
+
+    def test_geo_location_data_only_calls_api_on_miss(self):
+        transport = Mock()
+        transport.get.return_value = Mock(
+            status_code=200,
+            json=lambda: [{"name": "Chicago", "lat": 41.8, "lon": -87.6}],
+        )
+        geo_locator = GeoLocationData(transport=transport, resolver=self.gazetteer)
+
+        results = geo_locator(["10001", "Madison, WI", "Chicago, IL"])
+
+        self.assertEqual(
+            [(r.search_term, r.name) for r in results],
+            [
+                ("10001", "New York"),
+                ("Madison, WI", "Madison"),
+                ("Chicago, IL", "Chicago"),
+            ],
+        )
+        transport.get.assert_called_once()
+        self.assertEqual(transport.get.call_args.kwargs["params"]["q"], "Chicago,IL,US")
@@ -0,0 +1,129 @@
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from unittest.mock import Mock
+from geolocutil import read_locations, stream_print
+from src.GeoLocationData import GeoLocationData
+from src.journal import Journal
+from tests.values import fake_transport, geoloc_util_location
+
+
+class TestGeolocationUtilWithInputFlag(unittest.TestCase):
+
+    def setUp(self):
+        self.geolocation = GeoLocationData(transport=fake_transport())
+
+    def test_read_locations_skips_blank_lines(self):
+        source = io.StringIO("10001\n\n  Madison, WI  \n\t\n00501")
+        self.assertEqual(
+            list(read_locations(source)), ["10001", "Madison, WI", "00501"]
+        )
+
+    def test_results_are_written_as_ndjson(self):
+        source = io.StringIO("00901\n00033\n00901\n")
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            stream_print(self.geolocation, source, "ndjson", sys.stdout, True, True)
+
+        lines = stdout.getvalue().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertIn("\\u00edo", lines[0])
+        self.assertEqual(
+            json.loads(lines[0]),
+            {"search_term": "00901", "name": "Río Piedras", "lat": 1, "lon": 2},
+        )
+        self.assertIn("NOTFOUND", stderr.getvalue())
+        self.assertEqual(self.geolocation.errors, [])
+
+    def test_errors_are_dropped_without_e_flag(self):
+        stderr = io.StringIO()
+        with redirect_stdout(io.StringIO()), redirect_stderr(stderr):
+            stream_print(
+                self.geolocation,
+                io.StringIO("00033\n"),
+                "ndjson",
+                sys.stdout,
+                False,
+                False,
+            )
+
+        self.assertEqual(stderr.getvalue(), "")
+        self.assertEqual(self.geolocation.errors, [])
+
+    def test_checkpointed_run_stops_at_a_failure_and_resumes(self):
+        path = os.path.join(tempfile.mkdtemp(), "run.journal")
+        self.addCleanup(os.remove, path)
+        transport = Mock()
+        transport.get.side_effect = [
+            Mock(
+                status_code=200, json=lambda: {"name": "Holtsville", "lat": 1, "lon": 2}
+            ),
+            Mock(status_code=401, json=lambda: {"message": "Invalid API key"}),
+        ]
+        source = "00501\n00601\n"
+
+        stdout = io.StringIO()
+        with Journal(path) as journal, redirect_stderr(io.StringIO()):
+            failure = stream_print(
+                GeoLocationData(transport=transport),
+                io.StringIO(source),
+                "ndjson",
+                stdout,
+                True,
+                True,
+                journal,
+            )
+        self.assertIn("UNAUTHORIZED", failure)
+        self.assertEqual(len(stdout.getvalue().splitlines()), 1)
+
+        transport.get.side_effect = [
+            Mock(status_code=200, json=lambda: {"name": "Adjuntas", "lat": 3, "lon": 4})
+        ]
+        stdout = io.StringIO()
+        with Journal(path, resume=True) as journal:
+            failure = stream_print(
+                GeoLocationData(transport=transport),
+                io.StringIO(source),
+                "ndjson",
+                stdout,
+                True,
+                True,
+                journal,
+            )
+        self.assertIsNone(failure)
+        self.assertEqual(
+            [json.loads(line)["name"] for line in stdout.getvalue().splitlines()],
+            ["Holtsville", "Adjuntas"],
+        )
+        self.assertEqual(transport.get.call_count, 3)
+
+    def test_results_are_written_as_csv(self):
+        stdout = io.StringIO()
+        with redirect_stdout(stdout), redirect_stderr(io.StringIO()):
+            stream_print(
+                self.geolocation,
+                io.StringIO("00901\n00033\n"),
+                "csv",
+                sys.stdout,
+                False,
+                False,
+            )
+
+        self.assertEqual(
+            stdout.getvalue(), "search_term,name,lat,lon\n00901,Río Piedras,1,2\n"
+        )
+
+    def test_input_cannot_be_combined_with_locations(self):
+        process = subprocess.run(
+            ["python", geoloc_util_location, "--input", "-", "10001"],
+            input="",
+            capture_output=True,
+            text=True,
+        )
+        self.assertEqual(process.returncode, 2)
+        self.assertIn("locations cannot be combined with --input", process.stderr)
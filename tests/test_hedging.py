@@ -0,0 +1,210 @@
+import asyncio
+import json
+import threading
+import time
+import unittest
+from unittest.mock import Mock, patch
+import requests
+from src.AsyncGeoLocationData import AsyncGeoLocationData, BufferedResponse
+from src.GeoLocationData import DeadlineExceededError, GeoLocationData
+from src.hedging import HedgePolicy
+from src.metrics import Metrics
+from src.rate_limiter import TokenBucket
+from tests.values import FOUND
+
+
+def warm_policy(seconds=0.01, **kwargs):
+    policy = HedgePolicy(min_samples=5, min_delay=0.0, max_ratio=1.0, **kwargs)
+    for _ in range(5):
+        policy.record(seconds)
+    return policy
+
+
+class SlowFirstTransport:
+    """The first request hangs until released, later ones answer at once"""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def get(self, url, params=None, timeout=None):
+        with self.lock:
+            self.calls += 1
+            first = self.calls == 1
+        if first:
+            self.release.wait(5)
+        return Mock(status_code=200, json=lambda: FOUND)
+
+    def close(self):
+        self.release.set()
+
+
+class TestHedgePolicy(unittest.TestCase):
+
+    def test_no_delay_before_min_samples(self):
+        policy = HedgePolicy(min_samples=3, min_delay=0.0)
+        policy.record(0.1)
+        policy.record(0.2)
+
+        self.assertIsNone(policy.delay())
+        policy.record(0.3)
+        self.assertIsNotNone(policy.delay())
+
+    def test_delay_is_the_percentile_with_a_floor(self):
+        policy = HedgePolicy(percentile=90, min_samples=1, min_delay=0.0)
+        for n in range(1, 11):
+            policy.record(n / 100)
+
+        self.assertAlmostEqual(policy.delay(), 0.09)
+        floored = HedgePolicy(min_samples=1, min_delay=0.5)
+        floored.record(0.01)
+        self.assertEqual(floored.delay(), 0.5)
+
+    def test_budget_limits_the_share_of_hedged_requests(self):
+        policy = HedgePolicy(min_samples=10, max_ratio=0.2)
+
+        self.assertEqual([policy.try_hedge() for _ in range(3)], [True, True, False])
+        for _ in range(20):
+            policy.record(0.01)
+        self.assertTrue(policy.try_hedge())
+        self.assertEqual(policy.hedged, 3)
+
+
+class TestHedgedRequests(unittest.TestCase):
+
+    def test_hedge_answers_when_the_first_request_is_slow(self):
+        transport = SlowFirstTransport()
+        policy = warm_policy()
+        metrics = Metrics()
+        geo_locator = GeoLocationData(
+            transport=transport, hedging=policy, observer=metrics
+        )
+
+        started = time.monotonic()
+        results = geo_locator(["90210"])
+        elapsed = time.monotonic() - started
+        geo_locator.close()
+
+        self.assertEqual(results[0].name, "Beverly Hills")
+        self.assertLess(elapsed, 1)
+        self.assertEqual((policy.hedged, policy.hedges_won), (1, 1))
+        self.assertEqual(metrics.snapshot()["requests"]["hedges"], 1)
+
+    def test_fast_requests_are_not_hedged(self):
+        transport = Mock()
+        transport.get.return_value = Mock(status_code=200, json=lambda: FOUND)
+        policy = warm_policy(seconds=1.0)
+        geo_locator = GeoLocationData(
+            transport=transport, hedging=policy, max_workers=1
+        )
+
+        geo_locator(["90210", "10001", "60601"])
+        geo_locator.close()
+
+        self.assertEqual(transport.get.call_count, 3)
+        self.assertEqual(policy.hedged, 0)
+        self.assertEqual(policy.requests, 8)
+
+    def test_hedge_refused_by_the_rate_limiter_keeps_the_budget(self):
+        transport = Mock()
+
+        def slow_get(url, params, timeout):
+            time.sleep(0.1)
+            return Mock(status_code=200, json=lambda: FOUND)
+
+        transport.get.side_effect = slow_get
+        policy = warm_policy()
+        bucket = TokenBucket(60, capacity=1)
+        geo_locator = GeoLocationData(
+            transport=transport, hedging=policy, rate_limit=bucket
+        )
+
+        geo_locator(["90210"])
+        geo_locator.close()
+
+        self.assertEqual(transport.get.call_count, 1)
+        self.assertEqual(policy.hedged, 0)
+
+    def test_async_hedge_cancels_the_slow_request(self):
+        policy = warm_policy()
+        calls = []
+
+        class Transport:
+            async def get(self, url, params, timeout):
+                calls.append(url)
+                if len(calls) == 1:
+                    await asyncio.sleep(5)
+                return BufferedResponse(200, json.dumps(FOUND), url)
+
+            async def close(self):
+                pass
+
+        async def run():
+            async with AsyncGeoLocationData(
+                transport=Transport(), hedging=policy
+            ) as geo:
+                return await asyncio.wait_for(geo(["90210"]), 2)
+
+        results = asyncio.run(run())
+
+        self.assertEqual(results[0].name, "Beverly Hills")
+        self.assertEqual((len(calls), policy.hedges_won), (2, 1))
+
+
+class TestDeadlines(unittest.TestCase):
+
+    def test_lookup_deadline_covers_the_retries(self):
+        def time_out(url, params, timeout):
+            time.sleep(0.05)
+            raise requests.ReadTimeout()
+
+        transport = Mock()
+        transport.get.side_effect = time_out
+        geo_locator = GeoLocationData(transport=transport, lookup_deadline=0.12)
+
+        with self.assertRaises(DeadlineExceededError):
+            geo_locator(["90210"])
+        self.assertLess(transport.get.call_count, 4)
+        self.assertEqual(geo_locator.error_log.counts, {})
+        self.assertLessEqual(transport.get.call_args.kwargs["timeout"][1], 0.12)
+
+    def test_rate_limit_backoff_past_the_deadline_fails_at_once(self):
+        transport = Mock()
+        transport.get.return_value = Mock(
+            status_code=429, headers={"Retry-After": "30"}
+        )
+        geo_locator = GeoLocationData(transport=transport, lookup_deadline=1)
+
+        with patch("src.GeoLocationData.time.sleep") as sleep:
+            with self.assertRaises(DeadlineExceededError):
+                geo_locator(["90210"])
+        sleep.assert_not_called()
+
+    def test_batch_deadline_leaves_the_rest_unfinished(self):
+        transport = Mock()
+        transport.get.side_effect = lambda url, params, timeout: time.sleep(
+            0.06
+        ) or Mock(status_code=200, json=lambda: FOUND)
+        geo_locator = GeoLocationData(transport=transport, max_workers=1, cache_size=0)
+
+        batch = geo_locator.get_geoloc_batch(
+            ["90210", "10001", "60601", "94105"], deadline=0.1
+        )
+
+        self.assertFalse(batch.complete)
+        self.assertEqual(batch.results[0].search_term, "90210")
+        self.assertIn("DEADLINE EXCEEDED", batch.failure)
+        self.assertEqual(geo_locator.error_log.counts, {"deadline": 1})
+
+    def test_rate_limiter_wait_past_the_deadline_keeps_the_token(self):
+        bucket = TokenBucket(60, capacity=1, clock=lambda: 0.0)
+        bucket.reserve()
+
+        self.assertIsNone(bucket.try_reserve(0.5))
+        self.assertEqual(bucket.try_reserve(1.0), 1.0)
+        self.assertIsNone(bucket.try_reserve(1.5))
+
+
+if __name__ == "__main__":
+    unittest.main()
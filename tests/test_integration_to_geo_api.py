@@ -6,7 +6,9 @@ from src.GeoLocationData import (
     ConnectionError,
     RateLimitError,
     UnauthorizedError,
+    UnhandledError,
 )
+from src.config import RATE_LIMIT_RETRIES
 
 
 class TestGeoLocationDataErrors(unittest.TestCase):
@@ -14,14 +16,16 @@ class TestGeoLocationDataErrors(unittest.TestCase):
 
     def setUp(self):
         """Set up test fixtures before each test method."""
-        self.geo_locator = GeoLocationData()
+        self.transport = Mock()
+        self.geo_locator = GeoLocationData(transport=self.transport)
         self.test_zip = "90210"
         self.test_city_state = "Los Angeles, CA"
         self.invalid_format = "InvalidLocation"
 
-    @patch("src.GeoLocationData.requests.get")
-    def test_connection_error(self, mock_get):
+    def test_connection_error(self):
         """Test that ConnectionError is raised when connection fails."""
+        mock_get = self.transport.get
+
         # Configure the mock to raise a ConnectionError
         mock_get.side_effect = requests.ConnectionError("Connection failed")
 
@@ -32,9 +36,11 @@ class TestGeoLocationDataErrors(unittest.TestCase):
         # Verify the error message
         self.assertIn("CONNECTION ERROR", str(context.exception))
 
-    @patch("src.GeoLocationData.requests.get")
-    def test_rate_limit_error(self, mock_get):
-        """Test that RateLimitError is raised when rate limit is exceeded."""
+    @patch("src.GeoLocationData.time.sleep")
+    def test_rate_limit_error(self, mock_sleep):
+        """Test that RateLimitError is raised once the 429 retries are exhausted."""
+        mock_get = self.transport.get
+
         # Create a mock response with 429 status code
         mock_response = Mock()
         mock_response.status_code = 429
@@ -48,10 +54,13 @@ class TestGeoLocationDataErrors(unittest.TestCase):
         # Verify the error message
         self.assertIn("RATE LIMIT ERROR", str(context.exception))
         self.assertIn(self.test_zip, str(context.exception))
+        self.assertEqual(mock_get.call_count, RATE_LIMIT_RETRIES + 1)
+        self.assertEqual(mock_sleep.call_count, RATE_LIMIT_RETRIES)
 
-    @patch("src.GeoLocationData.requests.get")
-    def test_unauthorized_error(self, mock_get):
+    def test_unauthorized_error(self):
         """Test that UnauthorizedError is raised when API key is invalid."""
+        mock_get = self.transport.get
+
         # Create a mock response with 401 status code
         mock_response = Mock()
         mock_response.status_code = 401
@@ -65,9 +74,10 @@ class TestGeoLocationDataErrors(unittest.TestCase):
         # Verify the error message
         self.assertIn("UNAUTHORIZED ERROR", str(context.exception))
 
-    @patch("src.GeoLocationData.requests.get")
-    def test_not_found_error(self, mock_get):
+    def test_not_found_error(self):
         """Test error handling for location not found."""
+        mock_get = self.transport.get
+
         # Create a mock response with 404 status code
         mock_response = Mock()
         mock_response.status_code = 404
@@ -82,9 +92,10 @@ class TestGeoLocationDataErrors(unittest.TestCase):
         self.assertIn("NOTFOUND", self.geo_locator.errors[0])
         self.assertIn(self.test_zip, self.geo_locator.errors[0])
 
-    @patch("src.GeoLocationData.requests.get")
-    def test_read_timeout_with_retry(self, mock_get):
+    def test_read_timeout_with_retry(self):
         """Test read timeout with retry mechanism."""
+        mock_get = self.transport.get
+
         # First call raises ReadTimeout, second call succeeds
         mock_get.side_effect = [
             requests.ReadTimeout("Read timed out"),
@@ -103,9 +114,10 @@ class TestGeoLocationDataErrors(unittest.TestCase):
         self.assertEqual(len(results), 1)
         self.assertEqual(results[0].name, "Beverly Hills")
 
-    @patch("src.GeoLocationData.requests.get")
-    def test_read_timeout_max_retries_exceeded(self, mock_get):
+    def test_read_timeout_max_retries_exceeded(self):
         """Test read timeout when max retries are exceeded."""
+        mock_get = self.transport.get
+
         # Configure mock to always raise ReadTimeout
         mock_get.side_effect = requests.ReadTimeout("Read timed out")
 
@@ -127,9 +139,10 @@ class TestGeoLocationDataErrors(unittest.TestCase):
         self.assertIn("INVALID FORMAT", self.geo_locator.errors[0])
         self.assertIn(self.invalid_format, self.geo_locator.errors[0])
 
-    @patch("src.GeoLocationData.requests.get")
-    def test_general_http_error(self, mock_get):
+    def test_general_http_error(self):
         """Test error handling for general HTTP errors."""
+        mock_get = self.transport.get
+
         # Create a mock response with 500 status code
         mock_response = Mock()
         mock_response.status_code = 500
@@ -146,9 +159,10 @@ class TestGeoLocationDataErrors(unittest.TestCase):
         self.assertIn("ERROR", self.geo_locator.errors[0])
         self.assertIn("500", self.geo_locator.errors[0])
 
-    @patch("src.GeoLocationData.requests.get")
-    def test_json_decode_error(self, mock_get):
+    def test_json_decode_error(self):
         """Test error handling when response is not valid JSON."""
+        mock_get = self.transport.get
+
         # Create a mock response that raises JSONDecodeError
         mock_response = Mock()
         mock_response.status_code = 500
@@ -166,12 +180,13 @@ class TestGeoLocationDataErrors(unittest.TestCase):
         # The error handler should use response.text when json() fails
         self.assertIn("Not JSON", self.geo_locator.errors[0])
 
-    @patch("src.GeoLocationData.requests.get")
-    def test_unhandled_exception(self, mock_get):
+    def test_unhandled_exception(self):
         """Test error handling for unhandled exceptions."""
+        mock_get = self.transport.get
+
         # Configure mock to raise an unexpected exception
         mock_get.side_effect = Exception("Unexpected error")
 
-        # Testing system exit is a bit tricky with unittest
-        with self.assertRaises(SystemExit):
+        # The lookup fails with an error the caller can handle instead of exiting
+        with self.assertRaises(UnhandledError):
             self.geo_locator.get_geoloc_data(self.test_zip)
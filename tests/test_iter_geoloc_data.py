@@ -0,0 +1,69 @@
+import unittest
+from src.GeoLocationData import GeoLocationData, GeoResult, GeoError
+from tests.values import fake_transport
+
+
+class TestIterGeolocData(unittest.TestCase):
+
+    def setUp(self):
+        self.transport = fake_transport(delay=0.001, delays={"10001": 0.05})
+        self.consumed = []
+
+    def _terms(self, count):
+        for n in range(count):
+            term = f"{20000 + n:05d}"
+            self.consumed.append(term)
+            yield term
+
+    def test_generator_input_is_consumed_lazily(self):
+        geo_locator = GeoLocationData(transport=self.transport)
+        results = geo_locator.iter_geoloc_data(self._terms(1_000_000))
+
+        first = next(results)
+
+        self.assertEqual(
+            first, GeoResult(name="20000", lat=1, lon=2, search_term="20000")
+        )
+        self.assertEqual(self.consumed, ["20000"])
+        results.close()
+
+    def test_prefetch_is_bounded(self):
+        geo_locator = GeoLocationData(max_workers=4, transport=self.transport)
+        results = geo_locator.iter_geoloc_data(self._terms(1_000), prefetch=8)
+
+        terms = [next(results).search_term for _ in range(3)]
+        results.close()
+
+        self.assertEqual(terms, ["20000", "20001", "20002"])
+        self.assertLessEqual(len(self.consumed), 3 + 8)
+
+    def test_error_records(self):
+        geo_locator = GeoLocationData(transport=self.transport)
+        records = list(
+            geo_locator.iter_geoloc_data(
+                ["20000", "00033", "bad term"], prefetch=2, include_errors=True
+            )
+        )
+
+        self.assertIsInstance(records[0], GeoResult)
+        self.assertEqual(
+            [(r.search_term, type(r)) for r in records[1:]],
+            [("00033", GeoError), ("bad term", GeoError)],
+        )
+        self.assertIn("NOTFOUND", records[1].message)
+        self.assertIn("INVALID FORMAT", records[2].message)
+
+    def test_errors_are_skipped_by_default(self):
+        geo_locator = GeoLocationData(transport=self.transport)
+        records = list(geo_locator.iter_geoloc_data(["00033", "20000"]))
+
+        self.assertEqual([r.search_term for r in records], ["20000"])
+        self.assertEqual(len(geo_locator.errors), 1)
+
+    def test_unordered_yields_in_completion_order(self):
+        geo_locator = GeoLocationData(max_workers=2, transport=self.transport)
+        records = geo_locator.iter_geoloc_data(
+            ["10001", "20000"], prefetch=2, ordered=False
+        )
+
+        self.assertEqual([r.search_term for r in records], ["20000", "10001"])
@@ -0,0 +1,100 @@
+import json
+import unittest
+from datetime import timedelta
+from unittest.mock import Mock, patch
+import requests
+from src.GeoLocationData import GeoLocationData
+from src.metrics import Histogram, Metrics, Observer
+
+
+def _response(status_code, elapsed=0.02):
+    return Mock(
+        status_code=status_code,
+        elapsed=timedelta(seconds=elapsed),
+        headers={},
+        json=lambda: {"name": "Beverly Hills", "lat": 34.0901, "lon": -118.4065},
+    )
+
+
+class RecordingObserver(Observer):
+
+    def __init__(self):
+        self.lookups, self.requests = [], []
+
+    def on_lookup(self, event):
+        self.lookups.append(event)
+
+    def on_request(self, event):
+        self.requests.append(event)
+
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.transport = Mock()
+        self.metrics = Metrics()
+
+    @patch("src.GeoLocationData.time.sleep")
+    def test_statuses_retries_and_cache(self, mock_sleep):
+        self.transport.get.side_effect = [
+            _response(200),
+            requests.ReadTimeout("slow"),
+            _response(429),
+            _response(200),
+            _response(404),
+        ]
+        geo = GeoLocationData(transport=self.transport, observer=self.metrics)
+
+        geo(["90210", "10001", "90210", "00033"])
+        snapshot = self.metrics.snapshot()
+
+        self.assertEqual(snapshot["lookups"]["count"], 3)
+        self.assertEqual(snapshot["lookups"]["found"], 2)
+        self.assertEqual(
+            snapshot["requests"]["statuses"],
+            {"200": 2, "ReadTimeout": 1, "429": 1, "404": 1},
+        )
+        self.assertEqual(snapshot["requests"]["retries"], 2)
+        self.assertEqual(snapshot["requests"]["in_flight"], 0)
+        self.assertEqual(snapshot["server_seconds"]["count"], 4)
+        self.assertEqual(snapshot["parse_seconds"]["count"], 2)
+        self.assertEqual(snapshot["cache"]["memory"], {"hit": 0, "miss": 3})
+
+        geo("90210")
+        self.assertEqual(self.metrics.snapshot()["cache"]["hit_rate"], 0.25)
+        json.loads(self.metrics.to_json())
+
+    def test_observer_hooks_are_optional(self):
+        self.transport.get.return_value = _response(200)
+        observer = RecordingObserver()
+
+        GeoLocationData(transport=self.transport, observer=observer)(["90210", "bad"])
+
+        self.assertEqual(
+            {e.location: e.found for e in observer.lookups},
+            {"90210": True, "bad": False},
+        )
+        self.assertEqual(len(observer.requests), 1)
+        self.assertEqual(observer.requests[0].path, "zip")
+        self.assertFalse(observer.requests[0].retry)
+
+    def test_prometheus_text(self):
+        self.transport.get.return_value = _response(200)
+        GeoLocationData(transport=self.transport, observer=self.metrics)("90210")
+
+        text = self.metrics.to_prometheus()
+
+        self.assertIn("# TYPE geolocutil_lookup_seconds histogram", text)
+        self.assertIn('geolocutil_lookup_seconds_bucket{le="+Inf"} 1', text)
+        self.assertIn('geolocutil_requests_total{status="200"} 1', text)
+        self.assertIn(
+            'geolocutil_cache_requests_total{tier="memory",result="miss"} 1', text
+        )
+
+    def test_histogram_quantiles(self):
+        histogram = Histogram((0.1, 1.0, float("inf")))
+        for value in (0.05, 0.05, 0.5, 20):
+            histogram.observe(value)
+        self.assertEqual(histogram.quantile(0.5), 0.1)
+        self.assertEqual(histogram.quantile(0.75), 1.0)
+        self.assertEqual(histogram.quantile(1.0), float("inf"))
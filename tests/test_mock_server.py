@@ -0,0 +1,44 @@
+import unittest
+from benchmarks.mock_server import Faults, MockGeocodingServer
+from src.GeoLocationData import GeoLocationData, RateLimitError
+
+
+class TestMockGeocodingServer(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = MockGeocodingServer().start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def test_zip_and_direct_lookups_over_http(self):
+        with GeoLocationData(max_workers=4, base_url=self.server.base_url) as geo:
+            results = geo(["10001", "Miami, FL", "10001"])
+            again = geo("Miami, FL")
+
+        self.assertEqual(
+            [r.search_term for r in results], ["10001", "Miami, FL", "10001"]
+        )
+        self.assertEqual(results[0], results[2])
+        self.assertEqual(again[0].name, results[1].name)
+        self.assertTrue(results[0].name.startswith("Place "))
+        self.assertEqual(geo.errors, [])
+
+    def test_injected_failures(self):
+        faults = Faults(not_found_rate=0.5, rate_limit_rate=0.5)
+        with MockGeocodingServer(faults) as server:
+            geo = GeoLocationData(
+                base_url=server.base_url, cache_size=0, rate_limit_retries=0
+            )
+            outcomes = set()
+            for term in ("10001", "10002", "10003", "10004", "10005", "10006"):
+                try:
+                    geo(term)
+                    outcomes.add("not found")
+                except RateLimitError:
+                    outcomes.add("rate limited")
+
+        self.assertEqual(outcomes, {"not found", "rate limited"})
+        self.assertTrue(all("NOTFOUND" in error for error in geo.errors))
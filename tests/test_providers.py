@@ -0,0 +1,117 @@
+import unittest
+from unittest.mock import Mock
+import requests
+from src.GeoLocationData import GeoLocationData
+from src.providers import OpenWeatherMap, Provider
+from src.rate_limiter import TokenBucket
+from tests.values import FakeProvider
+
+BEVERLY_HILLS = ("Beverly Hills", 34.09, -118.41)
+MIAMI = ("Miami", 25.77, -80.19)
+
+
+class TestProviderChain(unittest.TestCase):
+
+    def test_next_provider_answers_what_the_first_misses(self):
+        free = FakeProvider({"90210": BEVERLY_HILLS}, name="free")
+        paid = FakeProvider({"Miami, FL": MIAMI}, name="paid")
+        geo_locator = GeoLocationData(providers=[free, paid])
+
+        results = geo_locator(["90210", "MIAMI , FL"])
+
+        self.assertEqual([r.name for r in results], ["Beverly Hills", "Miami"])
+        self.assertEqual(free.calls, ["zip:90210,us", "direct:miami,fl,us"])
+        self.assertEqual(paid.calls, ["direct:miami,fl,us"])
+        self.assertEqual(geo_locator.errors, [])
+
+    def test_failing_provider_falls_back(self):
+        for error in (requests.ConnectionError(), 503):
+            down = FakeProvider({"90210": BEVERLY_HILLS}, name="down", error=error)
+            backup = FakeProvider({"90210": BEVERLY_HILLS}, name="backup")
+            geo_locator = GeoLocationData(providers=[down, backup])
+
+            self.assertEqual(geo_locator(["90210"])[0].name, "Beverly Hills")
+            self.assertEqual(len(backup.calls), 1)
+
+    def test_error_of_a_failed_provider_wins_over_not_found(self):
+        geo_locator = GeoLocationData(
+            providers=[
+                FakeProvider(error=requests.ConnectionError()),
+                FakeProvider(name="empty"),
+            ]
+        )
+
+        batch = geo_locator.get_geoloc_batch(["90210"])
+
+        self.assertEqual(batch.unfinished, ["90210"])
+        self.assertIn("CONNECTION ERROR", batch.failure)
+
+    def test_not_found_everywhere_is_cached(self):
+        first, second = FakeProvider(), FakeProvider(name="second")
+        geo_locator = GeoLocationData(providers=[first, second])
+
+        geo_locator(["90210"])
+        geo_locator(["90210"])
+
+        self.assertEqual((len(first.calls), len(second.calls)), (1, 1))
+        self.assertEqual(geo_locator.error_log.counts, {"not_found": 2})
+
+    def test_providers_skip_queries_they_do_not_answer(self):
+        fake = FakeProvider()
+        geo_locator = GeoLocationData(providers=[fake])
+
+        self.assertIsNone(geo_locator.reverse_geocode(25.77, -80.19))
+        self.assertEqual(fake.calls, [])
+        self.assertEqual(geo_locator.error_log.counts, {"not_found": 1})
+
+
+class TestProviderLimits(unittest.TestCase):
+
+    def test_each_provider_uses_its_own_rate_limiter(self):
+        free_bucket = Mock(spec=TokenBucket, wraps=TokenBucket(600))
+        paid_bucket = Mock(spec=TokenBucket, wraps=TokenBucket(60))
+        free = FakeProvider({"90210": BEVERLY_HILLS}, rate_limit=free_bucket)
+        paid = FakeProvider({"Miami, FL": MIAMI}, name="paid", rate_limit=paid_bucket)
+        geo_locator = GeoLocationData(providers=[free, paid])
+
+        geo_locator(["90210", "10001", "Miami, FL"])
+
+        self.assertEqual(free_bucket.acquire.call_count, 3)
+        self.assertEqual(paid_bucket.acquire.call_count, 2)
+
+    def test_max_concurrency_per_provider(self):
+        places = {f"{zip_code:05d}": BEVERLY_HILLS for zip_code in range(10001, 10009)}
+        slow = FakeProvider(places, latency=0.02, max_concurrency=2)
+        geo_locator = GeoLocationData(max_workers=8, providers=[slow])
+
+        results = geo_locator(list(places))
+
+        self.assertEqual(len(results), 8)
+        self.assertEqual(slow.max_in_flight, 2)
+
+    def test_default_provider_is_openweathermap(self):
+        transport = Mock()
+        transport.get.return_value = Mock(
+            status_code=200,
+            json=lambda: [{"name": "Beverly Hills", "lat": 34.09, "lon": -118.41}],
+        )
+        geo_locator = GeoLocationData(transport=transport, rate_limit=30)
+
+        geo_locator(["90210"])
+
+        (provider,) = geo_locator.providers
+        self.assertIsInstance(provider, OpenWeatherMap)
+        self.assertIs(geo_locator.rate_limiter, provider.rate_limiter)
+        self.assertEqual(transport.get.call_args.kwargs["params"]["limit"], 1)
+
+    def test_incomplete_provider_fails_when_created(self):
+        class NoParse(Provider):
+            def request(self, path, params):
+                return "https://example.com/", params
+
+        with self.assertRaises(TypeError):
+            NoParse()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+from unittest.mock import patch
+from src import proximity
+from src.GeoLocationData import GeoResult
+from src.proximity import Points, distance_matrix, nearest, within_bbox, within_radius
+
+RESULTS = [
+    GeoResult(name="Miami", lat=25.7617, lon=-80.1918, search_term="Miami, FL"),
+    GeoResult(name="Seattle", lat=47.6062, lon=-122.3321, search_term="98101"),
+    GeoResult(name="Honolulu", lat=21.3069, lon=-157.8583, search_term="96813"),
+    GeoResult(name="Adak", lat=51.8800, lon=-176.6581, search_term="99546"),
+]
+
+
+class ProximityTests:
+    """Run against whichever backend the subclass selects"""
+
+    def setUp(self):
+        self.points = Points.from_results(RESULTS)
+
+    def test_from_results(self):
+        self.assertEqual(len(self.points), 4)
+        self.assertEqual(self.points.names[1], "Seattle")
+        self.assertEqual(self.points.lats[0], 25.7617)
+
+    def test_distance_matrix(self):
+        matrix = distance_matrix(self.points, block_size=3)
+        self.assertEqual(matrix[0][0], 0)
+        self.assertAlmostEqual(matrix[0][1], 4396, delta=1)
+        self.assertAlmostEqual(matrix[1][0], matrix[0][1])
+        self.assertEqual(len(matrix[3]), 4)
+
+    def test_nearest_in_blocks(self):
+        queries = Points([47.0, 25.0], [-122.0, -80.0])
+        indices, distances = nearest(queries, self.points, block_size=2)
+        self.assertEqual(list(indices), [1, 0])
+        self.assertAlmostEqual(distances[0], 72, delta=1)
+
+    def test_within_radius(self):
+        self.assertEqual(
+            list(within_radius(self.points, 25.0, -80.0, 100, block_size=3)), [0]
+        )
+        self.assertEqual(
+            list(within_radius(self.points, 40, -100, 2500, block_size=3)), [0, 1]
+        )
+
+    def test_within_bbox(self):
+        self.assertEqual(list(within_bbox(self.points, 20, -130, 50, -70)), [0, 1])
+        # Crossing the antimeridian: from 170 east to 160 west
+        self.assertEqual(list(within_bbox(self.points, 20, 170, 60, -160)), [3])
+
+    def test_iter_chunks(self):
+        chunks = list(Points.iter_chunks(iter(RESULTS), 3))
+        self.assertEqual([len(chunk) for chunk in chunks], [3, 1])
+        self.assertEqual(chunks[1].names, ["Adak"])
+
+
+class TestProximityPurePython(ProximityTests, unittest.TestCase):
+
+    def setUp(self):
+        patcher = patch.object(proximity, "np", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        super().setUp()
+
+
+@unittest.skipIf(proximity.np is None, "NumPy is not installed")
+class TestProximityNumpy(ProximityTests, unittest.TestCase):
+    pass
@@ -0,0 +1,146 @@
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from unittest.mock import patch, Mock
+from src.GeoLocationData import GeoLocationData
+from src.rate_limiter import (
+    SharedTokenBucket,
+    TokenBucket,
+    backoff_delay,
+    parse_retry_after,
+)
+from tests.values import FakeClock
+
+
+def _response(status_code, headers=None):
+    return Mock(
+        status_code=status_code,
+        headers=headers or {},
+        json=lambda: {"name": "Beverly Hills", "lat": 34.0901, "lon": -118.4065},
+    )
+
+
+class TestTokenBucket(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.bucket = TokenBucket(
+            60, capacity=2, clock=self.clock, sleep=self.clock.sleep
+        )
+
+    def test_burst_then_configured_rate(self):
+        waits = [self.bucket.acquire() for _ in range(5)]
+        self.assertEqual(waits, [0.0, 0.0, 1.0, 1.0, 1.0])
+        self.assertEqual(self.clock.now, 3.0)
+
+    def test_throttling_halves_rate_and_success_restores_it(self):
+        self.bucket.on_throttled()
+        self.bucket.on_throttled()
+        self.assertEqual(self.bucket.rate_per_minute, 15)
+        self.assertEqual(self.bucket.throttled, 2)
+        self.assertEqual(self.bucket.acquire(), 4.0)
+
+        for _ in range(100):
+            self.bucket.on_success()
+        self.assertEqual(self.bucket.rate_per_minute, 60)
+
+    def test_rate_never_drops_below_floor(self):
+        for _ in range(20):
+            self.bucket.on_throttled()
+        self.assertEqual(self.bucket.rate_per_minute, 1.0)
+
+
+class TestBackoff(unittest.TestCase):
+
+    def test_delay_grows_and_is_capped(self):
+        for attempt, ceiling in ((0, 1), (1, 2), (3, 8), (10, 60)):
+            delay = backoff_delay(attempt)
+            self.assertGreaterEqual(delay, ceiling / 2)
+            self.assertLessEqual(delay, ceiling)
+
+    def test_retry_after_is_a_minimum(self):
+        self.assertGreaterEqual(backoff_delay(0, retry_after=30), 30)
+
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after("12"), 12.0)
+        self.assertIsNone(parse_retry_after(None))
+        self.assertIsNone(parse_retry_after("soon"))
+        in_a_minute = datetime.now(timezone.utc) + timedelta(seconds=60)
+        self.assertAlmostEqual(
+            parse_retry_after(format_datetime(in_a_minute, usegmt=True)), 60, delta=2
+        )
+
+
+_bucket = None
+
+
+def _use_bucket(bucket):
+    global _bucket
+    _bucket = bucket
+
+
+def _take_tokens_and_throttle(count):
+    for _ in range(count):
+        _bucket.reserve()
+    _bucket.on_throttled()
+    return _bucket.rate_per_minute
+
+
+class TestSharedTokenBucket(unittest.TestCase):
+
+    def test_budget_is_shared_with_worker_processes(self):
+        bucket = SharedTokenBucket(600, capacity=10)
+        with ProcessPoolExecutor(
+            1, initializer=_use_bucket, initargs=(bucket,)
+        ) as executor:
+            rate_in_worker = executor.submit(_take_tokens_and_throttle, 10).result()
+
+        self.assertEqual(rate_in_worker, 300)
+        self.assertEqual(bucket.rate_per_minute, 300)
+        self.assertEqual(bucket.throttled, 1)
+        # The worker used the whole burst, the next call has to wait
+        self.assertGreater(bucket.reserve(), 0)
+
+    def test_geolocation_data_uses_a_given_bucket(self):
+        bucket = SharedTokenBucket(60)
+        self.assertIs(GeoLocationData(rate_limit=bucket).rate_limiter, bucket)
+
+
+class TestGeoLocationDataRateLimiting(unittest.TestCase):
+
+    @patch("src.GeoLocationData.time.sleep")
+    def test_429_is_retried_and_batch_completes(self, mock_sleep):
+        transport = Mock()
+        transport.get.side_effect = [
+            _response(200),
+            _response(429, {"Retry-After": "7"}),
+            _response(429),
+            _response(200),
+        ]
+        geo_locator = GeoLocationData(transport=transport, rate_limit=6000)
+
+        results = geo_locator(["90210", "10001"])
+
+        self.assertEqual([r.search_term for r in results], ["90210", "10001"])
+        self.assertEqual(mock_sleep.call_count, 2)
+        self.assertGreaterEqual(mock_sleep.call_args_list[0].args[0], 7)
+        self.assertEqual(geo_locator.rate_limiter.throttled, 2)
+        self.assertLess(geo_locator.rate_limiter.rate_per_minute, 6000)
+        self.assertEqual(geo_locator.errors, [])
+
+    def test_only_answers_raise_a_throttled_rate(self):
+        bucket = TokenBucket(6000)
+        bucket.on_throttled()
+        transport = Mock()
+        transport.get.side_effect = [_response(503), _response(500), _response(200)]
+        geo_locator = GeoLocationData(transport=transport, rate_limit=bucket)
+
+        geo_locator.get_geoloc_batch(["90210", "10001"])
+        self.assertEqual(bucket.rate_per_minute, 3000)
+
+        geo_locator(["60601"])
+        self.assertEqual(bucket.rate_per_minute, 3300)
+
+    def test_limiter_is_off_by_default(self):
+        self.assertIsNone(GeoLocationData().rate_limiter)
@@ -0,0 +1,129 @@
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock
+from src.coalesce import SingleFlight
+from src.GeoLocationData import DeadlineExceededError, GeoLocationData, RateLimitError
+from tests.test_async_geo_location_data import FakeAsyncTransport
+from src.AsyncGeoLocationData import AsyncGeoLocationData
+
+
+def _slow_response(*args, **kwargs):
+    time.sleep(0.05)
+    return Mock(
+        status_code=200,
+        json=lambda: [{"name": "Beverly Hills", "lat": 34.0901, "lon": -118.4065}],
+    )
+
+
+class TestSingleFlight(unittest.TestCase):
+
+    def test_concurrent_callers_share_one_call(self):
+        single_flight = SingleFlight()
+        calls = []
+        release = threading.Event()
+
+        def work():
+            calls.append(1)
+            release.wait(1)
+            return "result"
+
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            futures = [executor.submit(single_flight.do, "key", work) for _ in range(5)]
+            time.sleep(0.05)
+            release.set()
+            results = [future.result() for future in futures]
+
+        self.assertEqual(results, ["result"] * 5)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(single_flight.coalesced, 4)
+
+    def test_exception_is_shared_and_key_is_released(self):
+        single_flight = SingleFlight()
+
+        def fail():
+            raise RateLimitError("slow down")
+
+        with self.assertRaises(RateLimitError):
+            single_flight.do("key", fail)
+        self.assertEqual(single_flight.do("key", lambda: 1), 1)
+
+
+class TestGeoLocationDataCoalescing(unittest.TestCase):
+
+    def setUp(self):
+        self.transport = Mock()
+        self.transport.get.side_effect = _slow_response
+
+    def test_repeated_terms_in_a_list_fan_out(self):
+        geo_locator = GeoLocationData(transport=self.transport, cache_size=0)
+        results = geo_locator(["90210"] * 400 + ["Beverly Hills, CA"])
+
+        self.assertEqual(self.transport.get.call_count, 2)
+        self.assertEqual(len(results), 401)
+        self.assertEqual(results[0].search_term, "90210")
+        self.assertIsNot(results[0], results[1])
+        self.assertEqual(results[-1].search_term, "Beverly Hills, CA")
+
+    def test_equivalent_terms_share_an_in_flight_request(self):
+        geo_locator = GeoLocationData(
+            max_workers=8, transport=self.transport, cache_size=0
+        )
+        terms = ["Beverly Hills, CA", "BEVERLY HILLS , CA", "beverly hills ca"]
+        results = geo_locator(terms)
+
+        self.assertEqual(self.transport.get.call_count, 1)
+        self.assertEqual([r.search_term for r in results], terms)
+
+    def test_concurrent_callers_of_one_instance(self):
+        geo_locator = GeoLocationData(transport=self.transport, cache_size=0)
+        with ThreadPoolExecutor(max_workers=6) as executor:
+            batches = list(executor.map(geo_locator, [["90210"]] * 6))
+
+        self.assertEqual(self.transport.get.call_count, 1)
+        self.assertTrue(all(len(batch) == 1 for batch in batches))
+
+    def test_not_found_is_reported_for_every_waiter(self):
+        self.transport.get.side_effect = None
+        self.transport.get.return_value = Mock(status_code=404)
+        geo_locator = GeoLocationData(
+            max_workers=4, transport=self.transport, cache_size=0
+        )
+        geo_locator(["Faketown, CA", "FAKETOWN, CA", "faketown ca"])
+
+        self.assertEqual(len(geo_locator.errors), 3)
+
+    def test_waiter_gives_up_at_its_deadline(self):
+        started, release = threading.Event(), threading.Event()
+
+        def slow_get(*args, **kwargs):
+            started.set()
+            release.wait(5)
+            return _slow_response()
+
+        self.transport.get.side_effect = slow_get
+        geo_locator = GeoLocationData(transport=self.transport, cache_size=0)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            leader = executor.submit(geo_locator, ["90210"])
+            started.wait(5)
+            with self.assertRaises(DeadlineExceededError):
+                geo_locator.get_geoloc_data(["90210"], deadline=0.05)
+            release.set()
+
+            self.assertEqual(leader.result()[0].name, "Beverly Hills")
+        self.assertEqual(self.transport.get.call_count, 1)
+
+
+class TestAsyncCoalescing(unittest.IsolatedAsyncioTestCase):
+
+    async def test_repeated_terms_share_one_request(self):
+        transport = FakeAsyncTransport()
+        geo = AsyncGeoLocationData(transport=transport, cache_size=0)
+
+        results = await geo(["10001"] * 50 + ["10002", "10001"])
+        streamed = [r async for r in geo.iter_geoloc_data(["10003"] * 3)]
+
+        self.assertEqual(transport.calls, 3)
+        self.assertEqual(len(results), 52)
+        self.assertEqual(len(streamed), 3)
@@ -0,0 +1,107 @@
+import unittest
+from unittest.mock import Mock
+from src.cache import LRUCache, ResultCache, normalize_query
+from src.classify import classify
+from src.config import DIRECT_PATH, ZIP_PATH
+from src.GeoLocationData import GeoLocationData
+from tests.values import FakeClock
+
+
+class TestNormalizeQuery(unittest.TestCase):
+
+    def test_city_state_spellings_share_a_key(self):
+        keys = {classify(term).key for term in ("Miami, FL", "MIAMI , FL", "miami  FL")}
+        keys.add(normalize_query(DIRECT_PATH, {"q": "miami,fl,US"}))
+        self.assertEqual(keys, {"direct:miami,fl,us"})
+
+    def test_zip_key(self):
+        self.assertEqual(classify("90210").key, "zip:90210,us")
+        self.assertEqual(normalize_query(ZIP_PATH, {"zip": "90210,US"}), "zip:90210,us")
+
+
+class TestLRUCache(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = LRUCache(max_size=2, ttl=10, clock=self.clock)
+
+    def test_least_recently_used_is_evicted(self):
+        self.cache.put("a", 1)
+        self.cache.put("b", 2)
+        self.cache.get("a")
+        self.cache.put("c", 3)
+
+        self.assertEqual(self.cache.get("a"), (True, 1))
+        self.assertEqual(self.cache.get("b"), (False, None))
+        self.assertEqual(self.cache.evictions, 1)
+        self.assertEqual((self.cache.hits, self.cache.misses), (2, 1))
+
+    def test_entries_expire(self):
+        self.cache.put("a", 1)
+        self.clock.now = 9.9
+        self.assertEqual(self.cache.get("a"), (True, 1))
+        self.clock.now = 10
+        self.assertEqual(self.cache.get("a"), (False, None))
+        self.assertEqual(self.cache.expirations, 1)
+        self.assertEqual(len(self.cache), 0)
+
+    def test_negative_entries_have_their_own_ttl(self):
+        cache = ResultCache(10, ttl=100, negative_ttl=5, clock=self.clock)
+        cache.put("found", "value")
+        cache.put_not_found("missing")
+
+        self.assertEqual(cache.get("missing"), (True, None))
+        self.clock.now = 6
+        self.assertEqual(cache.get("missing"), (False, None))
+        self.assertEqual(cache.get("found"), (True, "value"))
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
+
+
+class TestGeoLocationDataCache(unittest.TestCase):
+
+    def setUp(self):
+        self.transport = Mock()
+        self.transport.get.return_value = Mock(
+            status_code=200,
+            json=lambda: [{"name": "Miami", "lat": 25.77, "lon": -80.19}],
+        )
+
+    def test_repeated_terms_hit_the_api_once(self):
+        geo_locator = GeoLocationData(transport=self.transport)
+        results = geo_locator(["Miami, FL", "MIAMI , FL", "miami FL"])
+
+        self.assertEqual(self.transport.get.call_count, 1)
+        self.assertEqual(
+            [r.search_term for r in results], ["Miami, FL", "MIAMI , FL", "miami FL"]
+        )
+        self.assertEqual((geo_locator.cache_hits, geo_locator.cache_misses), (2, 1))
+        self.assertEqual(geo_locator.cache_evictions, 0)
+
+    def test_not_found_is_cached_and_still_reported(self):
+        self.transport.get.return_value = Mock(status_code=404)
+        geo_locator = GeoLocationData(transport=self.transport)
+        results = geo_locator(["Faketown, CA", "FAKETOWN , CA"])
+
+        self.assertEqual(results, [])
+        self.assertEqual(self.transport.get.call_count, 1)
+        self.assertEqual(len(geo_locator.errors), 2)
+        self.assertTrue(all("NOTFOUND" in e for e in geo_locator.errors))
+
+    def test_server_errors_are_not_cached(self):
+        self.transport.get.return_value = Mock(
+            status_code=500, url="http://test.com", json=lambda: {"message": "boom"}
+        )
+        geo_locator = GeoLocationData(transport=self.transport)
+        geo_locator("10001")
+        geo_locator("10001")
+
+        self.assertEqual(self.transport.get.call_count, 2)
+
+    def test_cache_can_be_disabled(self):
+        geo_locator = GeoLocationData(transport=self.transport, cache_size=0)
+        geo_locator("10001")
+        geo_locator("10001")
+
+        self.assertIsNone(geo_locator.cache)
+        self.assertEqual(self.transport.get.call_count, 2)
+        self.assertEqual(geo_locator.cache_hits, 0)
@@ -0,0 +1,62 @@
+import io
+import json
+import unittest
+from src.GeoLocationData import GeoResult
+from src.result_set import GeoResultSet
+
+RESULTS = [
+    GeoResult(name="Río Piedras", lat=18.4, lon=-66.05, search_term="00901"),
+    GeoResult(name="New York", lat=40.7484, lon=-73.9967, search_term="10001"),
+    GeoResult(name="New York", lat=40.7484, lon=-73.9967, search_term="New York, NY"),
+]
+
+
+class TestSlottedResults(unittest.TestCase):
+
+    def test_results_have_no_instance_dict(self):
+        result = RESULTS[0]
+        self.assertFalse(hasattr(result, "__dict__"))
+        self.assertEqual(result["name"], "Río Piedras")
+        self.assertEqual(result["search_term"], "00901")
+        with self.assertRaises(KeyError):
+            result["zip"]
+
+
+class TestGeoResultSet(unittest.TestCase):
+
+    def setUp(self):
+        self.result_set = GeoResultSet(iter(RESULTS))
+
+    def test_rows_round_trip(self):
+        self.assertEqual(len(self.result_set), 3)
+        self.assertEqual(list(self.result_set), RESULTS)
+        self.assertEqual(self.result_set[-1], RESULTS[-1])
+        self.assertEqual(self.result_set[1:], RESULTS[1:])
+        with self.assertRaises(IndexError):
+            self.result_set[3]
+
+    def test_names_are_stored_once(self):
+        self.assertEqual(self.result_set._names, ["Río Piedras", "New York"])
+        self.assertEqual(list(self.result_set._name_index), [0, 1, 1])
+
+    def test_columns(self):
+        self.assertEqual(list(self.result_set.lats), [18.4, 40.7484, 40.7484])
+        self.assertEqual(self.result_set.search_term(2), "New York, NY")
+
+    def test_json_matches_json_dumps(self):
+        records = [
+            {"search_term": r.search_term, "name": r.name, "lat": r.lat, "lon": r.lon}
+            for r in RESULTS
+        ]
+        for indent in (None, 4):
+            for ensure_ascii in (True, False):
+                self.assertEqual(
+                    self.result_set.to_json(indent, ensure_ascii),
+                    json.dumps(records, indent=indent, ensure_ascii=ensure_ascii),
+                )
+        self.assertEqual(GeoResultSet().to_json(indent=4), "[]")
+
+    def test_write_json(self):
+        buffer = io.StringIO()
+        self.result_set.write_json(buffer)
+        self.assertEqual(json.loads(buffer.getvalue())[0]["name"], "Río Piedras")
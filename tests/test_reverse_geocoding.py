@@ -0,0 +1,116 @@
+import array
+import unittest
+from src.cache import normalize_query
+from src.config import REVERSE_PATH
+from src.GeoLocationData import GeoLocationData, GeoResult
+from src.spatial import SpatialIndex, haversine_km
+from tests.values import fake_transport
+
+
+class TestSpatialIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = SpatialIndex(cell_degrees=0.1, max_distance_km=5)
+        self.index.add("Miami", 25.7617, -80.1918)
+        self.index.add("Miami Beach", 25.7907, -80.1300)
+        self.index.add("Tromsø", 69.6492, 18.9553)
+
+    def test_haversine(self):
+        self.assertAlmostEqual(haversine_km(0, 0, 0, 1), 111.2, delta=0.1)
+        self.assertEqual(haversine_km(10, 10, 10, 10), 0)
+
+    def test_nearest_within_distance(self):
+        self.assertEqual(self.index.nearest(25.77, -80.18)[0], "Miami")
+        self.assertEqual(self.index.nearest(25.79, -80.14)[0], "Miami Beach")
+        self.assertIsNone(self.index.nearest(26.5, -80.18))
+        self.assertEqual(self.index.nearest(26.5, -80.18, 100)[0], "Miami Beach")
+
+    def test_search_window_widens_at_high_latitudes(self):
+        # 0.1 degrees of longitude is only ~3.7 km here, the window spans 2 cells
+        self.assertEqual(self.index.nearest(69.6492, 19.05)[0], "Tromsø")
+
+    def test_nearest_across_the_antimeridian(self):
+        self.index.add("Taveuni", -16.8, 179.99)
+        self.assertEqual(self.index.nearest(-16.8, -179.99)[0], "Taveuni")
+        self.assertEqual(self.index.nearest(-16.8, 180.0)[0], "Taveuni")
+
+        # 0.7 does not divide 360, the last column is narrower
+        index = SpatialIndex(cell_degrees=0.7, max_distance_km=150)
+        index.add("Kioa", -16.2, -179.1)
+        self.assertEqual(index.nearest(-16.2, 179.9)[0], "Kioa")
+
+    def test_nearest_across_a_pole(self):
+        index = SpatialIndex(cell_degrees=0.5, max_distance_km=50)
+        index.add("Camp Borealis", 89.9, 10.0)
+        # ~22 km away over the pole, in the column on the other side of the globe
+        self.assertEqual(index.nearest(89.9, -170.0)[0], "Camp Borealis")
+        self.assertIsNone(index.nearest(-89.9, 0.0))
+
+    def test_duplicates_are_ignored(self):
+        self.index.add("Miami", 25.7617, -80.1918)
+        self.assertEqual(len(self.index), 3)
+
+
+class TestReverseGeocoding(unittest.TestCase):
+
+    def setUp(self):
+        self.transport = fake_transport()
+
+    def test_reverse_geocode_calls_reverse_endpoint(self):
+        geo_locator = GeoLocationData(transport=self.transport)
+
+        result = geo_locator.reverse_geocode(47.6, -122.33)
+
+        self.assertEqual(
+            result,
+            GeoResult(
+                name="Seattle", lat=47.6062, lon=-122.3321, search_term="47.6,-122.33"
+            ),
+        )
+        url, params = (
+            self.transport.get.call_args.args[0],
+            self.transport.get.call_args.kwargs["params"],
+        )
+        self.assertTrue(url.endswith(REVERSE_PATH))
+        self.assertEqual((params["lat"], params["lon"]), (47.6, -122.33))
+
+    def test_nearby_coordinates_share_a_cache_entry(self):
+        self.assertEqual(
+            normalize_query(REVERSE_PATH, {"lat": 47.600001, "lon": -122.33}),
+            normalize_query(REVERSE_PATH, {"lat": 47.6, "lon": -122.329999}),
+        )
+
+    def test_resolved_places_answer_reverse_lookups(self):
+        index = SpatialIndex()
+        geo_locator = GeoLocationData(transport=self.transport, spatial_index=index)
+
+        geo_locator("33101")
+        result = geo_locator.reverse_geocode(25.762, -80.19)
+
+        self.assertEqual(result.name, "Miami")
+        self.assertEqual(self.transport.get.call_count, 1)
+        self.assertEqual(index.hits, 1)
+
+    def test_not_found_and_invalid_coordinates(self):
+        geo_locator = GeoLocationData(transport=self.transport)
+
+        self.assertIsNone(geo_locator.reverse_geocode(0, 0))
+        self.assertIsNone(geo_locator.reverse_geocode(91, 0))
+
+        self.assertIn("NOTFOUND", geo_locator.errors[0])
+        self.assertNotIn("City, ST", geo_locator.errors[0])
+        self.assertIn("INVALID COORDINATES", geo_locator.errors[1])
+
+    def test_batch_keeps_positions_and_accepts_arrays(self):
+        geo_locator = GeoLocationData(max_workers=4, transport=self.transport)
+        lats = array.array("d", [47.6, 0.0, 47.6])
+        lons = array.array("d", [-122.33, 0.0, -122.33])
+
+        results = geo_locator.reverse_geocode_many(lats, lons)
+
+        self.assertEqual([r and r.name for r in results], ["Seattle", None, "Seattle"])
+        self.assertEqual(self.transport.get.call_count, 2)
+
+    def test_batch_lengths_must_match(self):
+        with self.assertRaises(ValueError):
+            GeoLocationData(transport=self.transport).reverse_geocode_many([1, 2], [3])
@@ -0,0 +1,69 @@
+import io
+import json
+import unittest
+from src.GeoLocationData import GeoResult
+from src.serializers import iter_binary, write_binary, write_results
+
+RESULTS = [
+    GeoResult(name="Río Piedras", lat=18.4, lon=-66.05, search_term="00901"),
+    GeoResult(name='New "York"', lat=40.7484, lon=-73.9967, search_term="10001"),
+    GeoResult(name='New "York"', lat=40.7484, lon=-73.9967, search_term="New York, NY"),
+]
+RECORDS = [
+    {"search_term": r.search_term, "name": r.name, "lat": r.lat, "lon": r.lon}
+    for r in RESULTS
+]
+
+
+def _write(output_format, results=RESULTS, ensure_ascii=True):
+    buffer = io.StringIO()
+    write_results(output_format, iter(results), buffer, ensure_ascii)
+    return buffer.getvalue()
+
+
+class TestSerializers(unittest.TestCase):
+
+    def test_json_matches_the_previous_encoder(self):
+        for ensure_ascii in (True, False):
+            self.assertEqual(
+                _write("json", ensure_ascii=ensure_ascii),
+                json.dumps(RECORDS, indent=4, ensure_ascii=ensure_ascii),
+            )
+        self.assertEqual(_write("json", []), "[]")
+
+    def test_compact(self):
+        self.assertEqual(_write("compact"), json.dumps(RECORDS, separators=(",", ":")))
+
+    def test_ndjson(self):
+        lines = _write("ndjson", ensure_ascii=False).splitlines()
+        self.assertEqual(lines, [json.dumps(r, ensure_ascii=False) for r in RECORDS])
+
+    def test_csv(self):
+        self.assertEqual(
+            _write("csv").splitlines(),
+            [
+                "search_term,name,lat,lon",
+                "00901,Río Piedras,18.4,-66.05",
+                '10001,"New ""York""",40.7484,-73.9967',
+                '"New York, NY","New ""York""",40.7484,-73.9967',
+            ],
+        )
+
+    def test_binary_round_trip_across_row_groups(self):
+        buffer = io.BytesIO()
+        self.assertEqual(write_binary(iter(RESULTS * 3), buffer, row_group_size=4), 9)
+
+        buffer.seek(0)
+        self.assertEqual(list(iter_binary(buffer)), RESULTS * 3)
+
+    def test_binary_rejects_other_files(self):
+        with self.assertRaises(ValueError):
+            list(iter_binary(io.BytesIO(b"[]")))
+        buffer = io.BytesIO()
+        write_binary(RESULTS, buffer)
+        with self.assertRaises(ValueError):
+            list(iter_binary(io.BytesIO(buffer.getvalue()[:-20])))
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            _write("xml")
@@ -0,0 +1,212 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from http.client import HTTPConnection
+from unittest.mock import Mock
+from src.client import GeoLocationClient, parse_address
+from src.GeoLocationData import GeoError, GeoLocationData, GeoResult
+from src.metrics import Metrics
+from src.server import GeoLocationServer
+from tests.values import geoloc_util_location
+
+
+def _response(status_code, data=None):
+    return Mock(status_code=status_code, headers={}, json=lambda: data)
+
+
+def _transport():
+    def get(url, params, timeout):
+        if "zip" in params:
+            return _response(
+                200, {"name": "Beverly Hills", "lat": 34.0901, "lon": -118.4065}
+            )
+        if params["q"].startswith("Nowhere"):
+            return _response(404)
+        return _response(
+            200, [{"name": "Miami", "lat": 25.7742658, "lon": -80.1936589}]
+        )
+
+    return Mock(get=Mock(side_effect=get))
+
+
+class TestGeoLocationServer(unittest.TestCase):
+
+    def setUp(self):
+        self.transport = _transport()
+        self.metrics = Metrics()
+        self.geo = GeoLocationData(
+            max_workers=4, transport=self.transport, observer=self.metrics
+        )
+        self.server = GeoLocationServer(self.geo, "127.0.0.1:0").start()
+        self.addCleanup(self.server.shutdown)
+        self.client = GeoLocationClient(self.server.address)
+        self.addCleanup(self.client.close)
+
+    def test_batch_keeps_input_order_and_shares_the_cache(self):
+        results = self.client(["90210", "Miami, FL", "Nowhere, WY", "90210", "bad"])
+        again = self.client(["Miami, FL"])
+
+        self.assertEqual(
+            [r.search_term for r in results], ["90210", "Miami, FL", "90210"]
+        )
+        self.assertIsInstance(results[0], GeoResult)
+        self.assertEqual(again[0].name, "Miami")
+        self.assertEqual(self.transport.get.call_count, 3)
+        self.assertEqual(len(self.client.errors), 2)
+        self.assertEqual(
+            self.server.service.health()["errors"],
+            {"not_found": 1, "invalid_format": 1},
+        )
+
+    def test_concurrent_requests_get_only_their_own_errors(self):
+        locations = [[f"bad {n}", "Nowhere, WY", "90210"] for n in range(8)]
+        clients = [GeoLocationClient(self.server.address) for _ in locations]
+        with ThreadPoolExecutor(max_workers=len(clients)) as executor:
+            list(executor.map(lambda c, l: c.get_geoloc_batch(l), clients, locations))
+
+        for client, (bad, *_) in zip(clients, locations):
+            self.assertIn(f"`{bad}`", client.errors[0])
+            self.assertEqual(len(client.errors), 2)
+            client.close()
+
+    def test_iter_geoloc_data_streams_in_batches(self):
+        records = list(
+            self.client.iter_geoloc_data(
+                iter(["90210", "bad", "Miami, FL"]), prefetch=2, include_errors=True
+            )
+        )
+        self.assertEqual([type(r) for r in records], [GeoResult, GeoError, GeoResult])
+
+    def test_lookup_health_and_metrics_endpoints(self):
+        host, port = parse_address(self.server.address)
+        connection = HTTPConnection(host, port, timeout=5)
+        self.addCleanup(connection.close)
+
+        connection.request("GET", "/lookup?q=90210&q=Miami,+FL")
+        body = json.loads(connection.getresponse().read())
+        self.assertEqual(
+            [r["name"] for r in body["results"]], ["Beverly Hills", "Miami"]
+        )
+
+        connection.request("GET", "/health")
+        self.assertEqual(json.loads(connection.getresponse().read())["status"], "ok")
+
+        connection.request("GET", "/metrics")
+        self.assertIn(
+            b"geolocutil_lookup_seconds_count 2", connection.getresponse().read()
+        )
+
+        connection.request("POST", "/batch", body=b'{"locations": "90210"}')
+        response = connection.getresponse()
+        self.assertEqual(
+            (response.status, json.loads(response.read())["error"]),
+            (400, "`locations` must be a list of strings"),
+        )
+        self.assertTrue(self.client.is_running())
+
+    def test_command_line_forwards_to_the_server(self):
+        env = {
+            **os.environ,
+            "GEOLOC_CACHE_PATH": os.path.join(tempfile.mkdtemp(), "geocode.sqlite3"),
+        }
+        completed = subprocess.run(
+            [
+                sys.executable,
+                geoloc_util_location,
+                "-j",
+                "--server",
+                self.server.address,
+                "90210",
+            ],
+            capture_output=True,
+            text=True,
+            env=env,
+            timeout=30,
+        )
+
+        self.assertEqual(completed.returncode, 0, completed.stderr)
+        self.assertIn('"name": "Beverly Hills"', completed.stdout)
+        self.assertEqual(self.transport.get.call_count, 1)
+
+    def test_shutdown_waits_for_running_requests(self):
+        started, release = threading.Event(), threading.Event()
+        get = self.transport.get.side_effect
+
+        def slow_get(url, params, timeout):
+            started.set()
+            release.wait(5)
+            return get(url, params, timeout)
+
+        self.transport.get.side_effect = slow_get
+        results = []
+        request = threading.Thread(
+            target=lambda: results.extend(self.client(["90210"]))
+        )
+        request.start()
+        started.wait(5)
+        stopping = threading.Thread(target=self.server.shutdown)
+        stopping.start()
+        release.set()
+        request.join(5)
+        stopping.join(5)
+
+        self.assertEqual([r.name for r in results], ["Beverly Hills"])
+        self.assertFalse(GeoLocationClient(self.server.address).is_running())
+
+    def test_second_shutdown_waits_for_the_first(self):
+        started, release = threading.Event(), threading.Event()
+        get = self.transport.get.side_effect
+
+        def slow_get(url, params, timeout):
+            started.set()
+            release.wait(5)
+            return get(url, params, timeout)
+
+        self.transport.get.side_effect = slow_get
+        request = threading.Thread(target=lambda: self.client(["90210"]))
+        request.start()
+        started.wait(5)
+        first = threading.Thread(target=self.server.shutdown)
+        first.start()
+        while GeoLocationClient(self.server.address).is_running():
+            time.sleep(0.01)
+        second = threading.Thread(target=self.server.shutdown)
+        second.start()
+        second.join(0.2)
+
+        self.assertTrue(second.is_alive())
+        release.set()
+        request.join(5)
+        first.join(5)
+        second.join(5)
+        self.assertFalse(second.is_alive())
+
+
+@unittest.skipUnless(hasattr(socket, "AF_UNIX"), "Unix sockets are not available")
+class TestUnixSocketServer(unittest.TestCase):
+
+    def test_lookup_over_a_unix_socket(self):
+        path = os.path.join(tempfile.mkdtemp(), "geolocutil.sock")
+        geo = GeoLocationData(transport=_transport())
+        with GeoLocationServer(geo, f"unix:{path}") as server:
+            with GeoLocationClient(server.address) as client:
+                self.assertEqual(client("90210")[0].name, "Beverly Hills")
+        self.assertFalse(os.path.exists(path))
+
+
+class TestParseAddress(unittest.TestCase):
+
+    def test_addresses(self):
+        self.assertEqual(parse_address("127.0.0.1:8765"), ("127.0.0.1", 8765))
+        self.assertEqual(parse_address("http://localhost:80/"), ("localhost", 80))
+        self.assertEqual(parse_address(":9000"), ("127.0.0.1", 9000))
+        self.assertEqual(parse_address("unix:/tmp/geo.sock"), "/tmp/geo.sock")
+        with self.assertRaises(ValueError):
+            parse_address("localhost")
@@ -0,0 +1,52 @@
+import unittest
+from unittest.mock import patch, Mock
+import requests
+from src.GeoLocationData import GeoLocationData
+from src.config import POOL_SIZE
+
+
+class TestSessionTransport(unittest.TestCase):
+    """Tests for the pooled keep-alive session owned by GeoLocationData"""
+
+    def test_session_is_created_lazily_and_reused(self):
+        geo_locator = GeoLocationData()
+        self.assertIsNone(geo_locator._transport)
+
+        with patch.object(requests.Session, "get") as mock_get:
+            mock_get.return_value = Mock(status_code=404)
+            geo_locator.get_geoloc_data(["10001", "10002", "Miami, FL"])
+            session = geo_locator._transport
+
+        self.assertIsInstance(session, requests.Session)
+        self.assertEqual(mock_get.call_count, 3)
+        self.assertIs(geo_locator._get_transport(), session)
+
+    def test_pool_size(self):
+        self.assertEqual(GeoLocationData()._pool_size, POOL_SIZE)
+        self.assertEqual(GeoLocationData(max_workers=32)._pool_size, 32)
+        geo_locator = GeoLocationData(pool_size=3)
+
+        adapter = geo_locator._get_transport().get_adapter("http://example.com")
+
+        self.assertEqual(adapter._pool_maxsize, 3)
+        geo_locator.close()
+
+    def test_context_manager_closes_owned_session(self):
+        with patch.object(requests.Session, "close") as mock_close:
+            with GeoLocationData() as geo_locator:
+                geo_locator._get_transport()
+        mock_close.assert_called_once()
+        self.assertIsNone(geo_locator._transport)
+
+    def test_injected_transport_is_used_and_closed(self):
+        transport = Mock()
+        transport.get.return_value = Mock(
+            status_code=200, json=lambda: {"name": "New York", "lat": 1, "lon": 2}
+        )
+        with GeoLocationData(transport=transport) as geo_locator:
+            results = geo_locator("10001")
+
+        self.assertEqual(results[0].name, "New York")
+        transport.get.assert_called_once()
+        transport.close.assert_called_once()
+        self.assertIs(geo_locator._transport, transport)
@@ -0,0 +1,34 @@
+import os
+import unittest
+from unittest.mock import patch
+from benchmarks.startup import HEAVY_MODULES, SCRIPT, imported_modules, parse_importtime
+from src import config
+
+
+class TestStartup(unittest.TestCase):
+
+    def test_help_does_not_load_the_client(self):
+        modules = imported_modules([SCRIPT, "-h"])
+        heavy = {name.split(".")[0] for name in modules} & set(HEAVY_MODULES)
+        self.assertEqual(heavy, set())
+        self.assertNotIn("src.GeoLocationData", modules)
+
+    def test_parse_importtime(self):
+        stderr = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |   _locale\n"
+            "import time:      1054 |       1173 | locale\n"
+        )
+        self.assertEqual(
+            parse_importtime(stderr), {"_locale": (120, 120), "locale": (1054, 1173)}
+        )
+
+    def test_environment_settings_are_read_on_first_access(self):
+        config.__dict__.pop("GAZETTEER_PATH", None)
+        self.addCleanup(config.__dict__.pop, "GAZETTEER_PATH", None)
+        with patch.dict(os.environ, {"GEOLOC_GAZETTEER_PATH": "places.idx"}):
+            self.assertEqual(config.GAZETTEER_PATH, "places.idx")
+        # Cached once read, like a plain module constant
+        self.assertEqual(config.GAZETTEER_PATH, "places.idx")
+        with self.assertRaises(AttributeError):
+            config.NOT_A_SETTING
@@ -1,5 +1,16 @@
+import json
 import os
+import threading
+import time
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Optional, Union
+from unittest.mock import Mock
 from dotenv import load_dotenv
+from src.cache import normalize_query
+from src.classify import classify
+from src.config import DIRECT_PATH, ZIP_PATH
+from src.providers import Provider
 
 
 __current_script_path_file = os.path.abspath(__file__)
@@ -9,22 +20,47 @@ path_to_root_of_project = __current_script_path_file[
 geoloc_util_location = path_to_root_of_project + "/geolocutil.py"
 load_dotenv(path_to_root_of_project + "/.env")
 
-HELP_MESSAGE = """usage: geolocutil.py [-h] [-p] [-j] [-e] locations [locations ...]
+HELP_MESSAGE = """usage: geolocutil.py [-h] [-p] [-j] [-e] [--no-cache] [--warm-cache]
+                     [--purge-cache] [--input FILE]
+                     [--format {json,compact,ndjson,csv,binary}]
+                     [--output FILE] [--stats]
+                     [--stats-format {text,json,prometheus}]
+                     [--checkpoint FILE] [--resume] [--server ADDRESS]
+                     [--cache-path CACHE_PATH]
+                     [locations ...]
 
 Retrieves geolocation data utilizing Open Weather Geocoding API
 
 positional arguments:
-  locations     A list of locations ("City, ST" or zip code in 5 digit format "12345") - US Cities and Zip codes only.
-                Examples:
-                	'Madison, WI'
-                	'12345'
-                	'Madison, WI' '12345' 'Chicago, IL' '10001'
+  locations             A list of locations ("City, ST" or zip code in 5 digit format "12345") - US Cities and Zip codes only.
+                        Examples:
+                        	'Madison, WI'
+                        	'12345'
+                        	'Madison, WI' '12345' 'Chicago, IL' '10001'
 
 options:
-  -h, --help    show this help message and exit
-  -p, --print   Outputs pretty print to stdout instead of json string
-  -j, --json    Converts all strings to ascii in json output
-  -e, --errors  Prints out Error messages to stdout
+  -h, --help            show this help message and exit
+  -p, --print           Outputs pretty print to stdout instead of json string
+  -j, --json            Converts all strings to ascii in json output
+  -e, --errors          Prints out Error messages to stdout
+  --no-cache            Bypasses the on-disk cache of previous lookups
+  --warm-cache          Looks up every location again and refreshes the on-disk cache
+  --purge-cache         Empties the on-disk cache and exits
+  --input FILE          Reads locations line by line from FILE (`-` for stdin) and streams NDJSON results
+  --format {json,compact,ndjson,csv,binary}
+                        Output format (default: json, ndjson with --input).
+                        compact is json without whitespace, binary is a columnar format for large batches
+  --output FILE         Writes results to FILE instead of stdout
+  --stats               Prints lookup timings, API status codes, retries and cache hit rate to stderr when done
+  --stats-format {text,json,prometheus}
+                        Format of --stats (default: text)
+  --checkpoint FILE     Records every finished lookup in FILE, so a run stopped by an error (rate limit,
+                        connection, API key) can be continued with --resume
+  --resume              Continues the run recorded in the --checkpoint FILE without repeating its lookups
+  --server ADDRESS      Forwards lookups to `python -m src.server` at ADDRESS (`host:port` or `unix:/path`)
+                        when it is running (default: $GEOLOC_SERVER).  Not used with --no-cache, --warm-cache, --stats or --checkpoint
+  --cache-path CACHE_PATH
+                        Location of the on-disk cache (default: $GEOLOC_CACHE_PATH or ~/.cache/geolocutil)
 """
 
 SKIPPED_MESSAGE = "Any queries not included was skipped due to an error.  Please use `-e` in the function call to include errors in the output."
@@ -41,6 +77,8 @@ VALID_SAN_JUAN_PR = {"name": "San Juan", "lat": 18.465299, "lon": -66.116666}
 
 VALID_HAGATNA = {"name": "Hagåtña", "lat": 13.4748148, "lon": 144.7516191}
 
+FOUND = {"name": "Beverly Hills", "lat": 34.09, "lon": -118.41}
+
 VALID_12345 = {
     "name": "Schenectady",
     "lat": 42.8142,
@@ -97,3 +135,140 @@ VALID_MULTIPLE_P_FLAG = f"""|---------------------------------------------------
 |-------------------------------------------------------------------------------------|
 {SKIPPED_MESSAGE}
 """
+
+
+
+class FakeClock:
+    """A clock that only moves when told to, `sleep` records and advances it"""
+
+    def __init__(self, now: float = 0.0) -> None:
+        self.now = now
+        self.sleeps: list[float] = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@dataclass
+class FakeResponse:
+    """The subset of `requests.Response` the client reads"""
+
+    status_code: int
+    data: object = None
+    url: str = ""
+    headers: dict = field(default_factory=dict)
+
+    @property
+    def text(self) -> str:
+        return json.dumps(self.data)
+
+    def json(self):
+        return self.data
+
+
+class FakeProvider(Provider):
+    """
+    Answers ZIP and `City, ST` queries from `places`, keyed by any spelling of the
+    search term, and is its own transport so no request leaves the process:
+
+        FakeProvider({"90210": ("Beverly Hills", 34.09, -118.41)}, rate_limit=60)
+
+    Set `error` to an HTTP status code or an exception to fail every request
+    with it, and `latency` to delay the answers.  `calls` holds the cache keys
+    of the queries received and `max_in_flight` the most requests it served at
+    once.  Works with the synchronous client only.
+    """
+
+    paths = frozenset((ZIP_PATH, DIRECT_PATH))
+
+    def __init__(
+        self,
+        places: Optional[dict[str, tuple[str, float, float]]] = None,
+        name: str = "fake",
+        error: Union[int, Exception, None] = None,
+        latency: float = 0.0,
+        **kwargs,
+    ) -> None:
+        super().__init__(transport=self, **kwargs)
+        self.name = name
+        self.error = error
+        self.latency = latency
+        self.places: dict[str, tuple[str, float, float]] = {}
+        self.calls: list[str] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        for term, place in (places or {}).items():
+            self.add(term, place)
+
+    def add(self, term: str, place: tuple[str, float, float]) -> None:
+        query = classify(term)
+        if query is None:
+            raise ValueError(f"`{term}` is not a ZIP code or `City, ST`")
+        self.places[query.key] = place
+
+    def request(self, path: str, params: dict) -> tuple[str, dict]:
+        return f"fake://{self.name}/{path}", {"path": path, **params}
+
+    def parse(self, data) -> Optional[tuple[str, float, float]]:
+        return tuple(data) if data else None
+
+    def get(self, url: str, params: dict, timeout=None) -> FakeResponse:
+        params = dict(params)
+        key = normalize_query(params.pop("path"), params)
+        with self._lock:
+            self.calls.append(key)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.in_flight -= 1
+        if isinstance(self.error, Exception):
+            raise self.error
+        if self.error is not None:
+            return FakeResponse(self.error, {"message": "fake error"}, url)
+        place = self.places.get(key)
+        return FakeResponse(200, list(place) if place else [], url)
+
+    def close(self) -> None:
+        pass
+
+
+FAKE_PLACES = {
+    "00901": {"name": "Río Piedras", "lat": 1, "lon": 2},
+    "33101": {"name": "Miami", "lat": 25.7617, "lon": -80.1918},
+}
+
+SEATTLE = {"name": "Seattle", "lat": 47.6062, "lon": -122.3321}
+
+
+def fake_get(url, params, timeout, delay=0.0, delays=None):
+    """
+    Answers like the API without leaving the process: ZIP codes starting with
+    `000` are not found, the others are named after FAKE_PLACES or echo the ZIP
+    code back.  Reverse lookups at latitude 0 find nothing, any other point is
+    Seattle.  `delays` slows down single ZIP codes, `delay` all the others.
+    """
+    if "zip" not in params:
+        time.sleep(delay)
+        places = [] if params["lat"] == 0 else [dict(SEATTLE)]
+        return Mock(status_code=200, json=lambda: places)
+
+    zip_code = params["zip"].split(",")[0]
+    time.sleep((delays or {}).get(zip_code, delay))
+    if zip_code.startswith("000"):
+        return Mock(status_code=404)
+    place = dict(FAKE_PLACES.get(zip_code, {"name": zip_code, "lat": 1, "lon": 2}))
+    return Mock(status_code=200, json=lambda: place)
+
+
+def fake_transport(**kwargs) -> Mock:
+    """A transport whose `get` is `fake_get`, called with `kwargs`"""
+    transport = Mock()
+    transport.get.side_effect = partial(fake_get, **kwargs)
+    return transport